@@ -5,6 +5,33 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     openai_api_key: str = ""
     database_url: PostgresDsn
+    summary_max_concurrency: int = 4
+    batch_max_concurrency: int = 4
+    fallacy_chunk_tokens: int = 12_000
+    fallacy_chunk_overlap_tokens: int = 500
+    fallacy_max_concurrency: int = 4
+    qa_passage_tokens: int = 400
+    qa_passage_overlap_tokens: int = 80
+    qa_top_k: int = 6
+    qa_index_cache_size: int = 32
+    qa_history_turns: int = 4
+    qa_prompt_token_budget: int = 6_000
+    transcript_cache_max_bytes: int = 64 * 1024 * 1024
+    openai_max_connections: int = 100
+    openai_max_keepalive_connections: int = 20
+    openai_keepalive_expiry: float = 30.0
+    openai_rpm_limit: int = 500
+    openai_tpm_limit: int = 200_000
+    llm_cache_max_bytes: int = 64 * 1024 * 1024
+    llm_cache_ttl_seconds: int = 7 * 24 * 60 * 60
+    llm_cache_persistent: bool = False
+    llm_cache_acquire_timeout: float = 0.5
+    job_workers: int = 4
+    job_max_attempts: int = 3
+    job_lease_seconds: float = 60.0
+    job_poll_seconds: float = 1.0
+    job_retry_backoff_seconds: float = 5.0
+    job_retention_seconds: int = 7 * 24 * 60 * 60
     backend_cors_origins: list[str] = [
         "http://localhost:5173",
         "http://127.0.0.1:5173",
@@ -1,10 +1,23 @@
+import hashlib
 import json
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
 
 import asyncpg  # type: ignore[import-untyped]
 from fastapi import Request
 
-from app.models import FallacyAnalysisResult, Highlight, HistoryItem, QaMessage, VideoRecord
+from app.models import (
+    FallacyAnalysisResult,
+    Highlight,
+    HistoryItem,
+    Job,
+    QaMessage,
+    StoredQaMessage,
+    SummaryStats,
+    SummaryVariant,
+    VideoRecord,
+)
 
 
 async def create_pool(dsn: str) -> asyncpg.Pool:
@@ -20,6 +33,34 @@ async def get_db(request: Request) -> AsyncGenerator[asyncpg.Connection, None]:
         yield conn
 
 
+@asynccontextmanager
+async def advisory_lock(conn: asyncpg.Connection, name: str) -> AsyncIterator[None]:
+    """Hold a session-level Postgres advisory lock named ``name``.
+
+    Serializes work on the same key across every worker sharing the database.
+    """
+    lock_id = _lock_id(name)
+    await conn.execute("SELECT pg_advisory_lock($1)", lock_id)
+    try:
+        yield
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", lock_id)
+
+
+def _lock_id(name: str) -> int:
+    """The 64-bit Postgres advisory lock key for ``name``."""
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+# Columns a VideoRecord is built from. Spelled out rather than ``s.*`` so
+# legacy columns still present on migrated tables are never read.
+_RECORD_COLUMNS = (
+    "s.id, s.video_id, s.title, s.thumbnail_url, s.summary, "
+    "s.fallacy_analysis, s.highlights, s.created_at"
+)
+
+
 async def create_table(conn: asyncpg.Connection) -> None:
     await conn.execute(
         """
@@ -29,7 +70,6 @@ async def create_table(conn: asyncpg.Connection) -> None:
             title            TEXT,
             thumbnail_url    TEXT,
             summary          TEXT         NOT NULL,
-            transcript       TEXT         NOT NULL,
             fallacy_analysis JSONB        DEFAULT NULL,
             created_at       TIMESTAMPTZ  NOT NULL DEFAULT now(),
             deleted_at       TIMESTAMPTZ  DEFAULT NULL
@@ -87,23 +127,194 @@ async def create_table(conn: asyncpg.Connection) -> None:
         END $$;
         """
     )
-    # Add qa_history column to existing tables if it doesn't exist
+    # Q&A messages are appended one row at a time rather than rewriting a
+    # growing JSONB array per question; id order is conversation order
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS youtube_summarizer.qa_messages (
+            id          BIGSERIAL    PRIMARY KEY,
+            video_id    TEXT         NOT NULL,
+            role        TEXT         NOT NULL,
+            content     TEXT         NOT NULL,
+            created_at  TIMESTAMPTZ  NOT NULL DEFAULT now()
+        )
+        """
+    )
+    await conn.execute(
+        "CREATE INDEX IF NOT EXISTS qa_messages_video_id_idx "
+        "ON youtube_summarizer.qa_messages (video_id, id)"
+    )
+    # Copy histories out of the qa_history column of existing tables. The
+    # column stays until no replica reads it; each start copies only the
+    # messages past those a video already has in qa_messages, so messages
+    # older replicas appended since the last copy are picked up and none
+    # is copied twice. The lock keeps replicas starting together from
+    # copying the same messages.
     await conn.execute(
         """
         DO $$
         BEGIN
-            IF NOT EXISTS (
+            IF EXISTS (
                 SELECT 1 FROM information_schema.columns
                 WHERE table_schema = 'youtube_summarizer'
                 AND table_name = 'summaries'
                 AND column_name = 'qa_history'
+            ) THEN
+                LOCK TABLE youtube_summarizer.qa_messages
+                    IN SHARE ROW EXCLUSIVE MODE;
+                INSERT INTO youtube_summarizer.qa_messages (video_id, role, content)
+                SELECT s.video_id, m.value->>'role', m.value->>'content'
+                  FROM youtube_summarizer.summaries s,
+                       jsonb_array_elements(COALESCE(s.qa_history, '[]'::jsonb))
+                       WITH ORDINALITY AS m(value, ord)
+                 WHERE m.ord > (
+                       SELECT count(*) FROM youtube_summarizer.qa_messages q
+                        WHERE q.video_id = s.video_id
+                 )
+                 ORDER BY s.video_id, m.ord;
+            END IF;
+        END $$;
+        """
+    )
+    # Q&A turns older than the verbatim window are folded into qa_summary;
+    # qa_summary_covers counts the Q&A messages it stands for
+    await conn.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'youtube_summarizer'
+                AND table_name = 'summaries'
+                AND column_name = 'qa_summary'
             ) THEN
                 ALTER TABLE youtube_summarizer.summaries
-                ADD COLUMN qa_history JSONB DEFAULT '[]'::jsonb;
+                ADD COLUMN qa_summary TEXT DEFAULT NULL,
+                ADD COLUMN qa_summary_covers INTEGER NOT NULL DEFAULT 0;
             END IF;
         END $$;
         """
     )
+    # qa_summary_digest fingerprints the messages qa_summary covers, so it is
+    # only reused by the conversation it summarizes
+    await conn.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'youtube_summarizer'
+                AND table_name = 'summaries'
+                AND column_name = 'qa_summary_digest'
+            ) THEN
+                ALTER TABLE youtube_summarizer.summaries
+                ADD COLUMN qa_summary_digest TEXT DEFAULT NULL;
+            END IF;
+        END $$;
+        """
+    )
+    # Transcripts live apart from summaries so record queries stay small.
+    # Segment timing is stored as parallel arrays: segment i starts at
+    # starts[i] seconds, lasts durations[i] and begins at character
+    # offsets[i] of text (segments are joined with single spaces).
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS youtube_summarizer.transcripts (
+            video_id         TEXT                PRIMARY KEY,
+            text             TEXT                NOT NULL,
+            starts           DOUBLE PRECISION[]  NOT NULL DEFAULT '{}',
+            durations        DOUBLE PRECISION[]  NOT NULL DEFAULT '{}',
+            offsets          INTEGER[]           NOT NULL DEFAULT '{}',
+            created_at       TIMESTAMPTZ         NOT NULL DEFAULT now()
+        )
+        """
+    )
+    # Copy transcripts out of existing summaries tables (without timing,
+    # which was never stored). The old column stays until no replica reads
+    # it: older ones still write it during a rolling deploy, and each start
+    # copies whatever they added. Rows created here leave it out, so it
+    # defaults to '' (older replicas read it as a required string);
+    # NULLs written before it had a default are filled in the same way.
+    await conn.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = 'youtube_summarizer'
+                AND table_name = 'summaries'
+                AND column_name = 'transcript'
+            ) THEN
+                ALTER TABLE youtube_summarizer.summaries
+                ALTER COLUMN transcript SET DEFAULT '';
+                UPDATE youtube_summarizer.summaries
+                   SET transcript = ''
+                 WHERE transcript IS NULL;
+                INSERT INTO youtube_summarizer.transcripts (video_id, text)
+                SELECT video_id, transcript FROM youtube_summarizer.summaries
+                 WHERE transcript <> ''
+                ON CONFLICT (video_id) DO NOTHING;
+            END IF;
+        END $$;
+        """
+    )
+    # One row per generated summary variant; the unique key is the cache key
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS youtube_summarizer.summary_variants (
+            id               BIGSERIAL    PRIMARY KEY,
+            video_id         TEXT         NOT NULL,
+            length_percent   INTEGER      NOT NULL,
+            model            TEXT         NOT NULL,
+            prompt_hash      TEXT         NOT NULL,
+            summary          TEXT         NOT NULL,
+            stats            JSONB        DEFAULT NULL,
+            created_at       TIMESTAMPTZ  NOT NULL DEFAULT now(),
+            UNIQUE (video_id, length_percent, model, prompt_hash)
+        )
+        """
+    )
+    # Shared tier of the LLM response cache, keyed by a hash of the request
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS youtube_summarizer.llm_cache (
+            key                TEXT         PRIMARY KEY,
+            content            TEXT         NOT NULL,
+            prompt_tokens      INTEGER      NOT NULL,
+            completion_tokens  INTEGER      NOT NULL,
+            created_at         TIMESTAMPTZ  NOT NULL DEFAULT now()
+        )
+        """
+    )
+    # Durable work queue shared by every replica; workers claim rows with
+    # FOR UPDATE SKIP LOCKED and hold them under a renewable lease
+    await conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS youtube_summarizer.jobs (
+            id                TEXT         PRIMARY KEY,
+            kind              TEXT         NOT NULL,
+            payload           JSONB        NOT NULL,
+            status            TEXT         NOT NULL DEFAULT 'queued',
+            progress          JSONB        DEFAULT NULL,
+            result            JSONB        DEFAULT NULL,
+            error             JSONB        DEFAULT NULL,
+            attempts          INTEGER      NOT NULL DEFAULT 0,
+            max_attempts      INTEGER      NOT NULL,
+            run_after         TIMESTAMPTZ  NOT NULL DEFAULT now(),
+            lease_owner       TEXT         DEFAULT NULL,
+            lease_expires_at  TIMESTAMPTZ  DEFAULT NULL,
+            created_at        TIMESTAMPTZ  NOT NULL DEFAULT now(),
+            updated_at        TIMESTAMPTZ  NOT NULL DEFAULT now()
+        )
+        """
+    )
+    await conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS jobs_claimable_idx
+            ON youtube_summarizer.jobs (run_after)
+         WHERE status IN ('queued', 'running')
+        """
+    )
 
 
 async def save_record(
@@ -112,20 +323,22 @@ async def save_record(
     title: str | None,
     thumbnail_url: str | None,
     summary: str,
-    transcript: str,
 ) -> VideoRecord:
     # Step 1: try insert (silently skip if conflict)
     await conn.execute(
-        "INSERT INTO youtube_summarizer.summaries (video_id, title, thumbnail_url, summary, transcript) "
-        "VALUES ($1, $2, $3, $4, $5) ON CONFLICT (video_id) DO NOTHING",
+        "INSERT INTO youtube_summarizer.summaries (video_id, title, thumbnail_url, summary) "
+        "VALUES ($1, $2, $3, $4) ON CONFLICT (video_id) DO NOTHING",
         video_id,
         title,
         thumbnail_url,
         summary,
-        transcript,
     )
     # Step 2: always fetch (inserted or existing)
-    row = await conn.fetchrow("SELECT * FROM youtube_summarizer.summaries WHERE video_id = $1", video_id)
+    row = await conn.fetchrow(
+        f"SELECT {_RECORD_COLUMNS} FROM youtube_summarizer.summaries s "
+        "WHERE s.video_id = $1",
+        video_id,
+    )
     return _parse_video_record(row)
 
 
@@ -133,7 +346,8 @@ async def get_by_video_id(
     conn: asyncpg.Connection, video_id: str
 ) -> VideoRecord | None:
     row = await conn.fetchrow(
-        "SELECT * FROM youtube_summarizer.summaries WHERE video_id = $1 AND deleted_at IS NULL",
+        f"SELECT {_RECORD_COLUMNS} FROM youtube_summarizer.summaries s "
+        "WHERE s.video_id = $1 AND s.deleted_at IS NULL",
         video_id,
     )
     if row is None:
@@ -141,6 +355,436 @@ async def get_by_video_id(
     return _parse_video_record(row)
 
 
+async def save_transcript(
+    conn: asyncpg.Connection,
+    video_id: str,
+    text: str,
+    starts: list[float],
+    durations: list[float],
+    offsets: list[int],
+) -> None:
+    """Save a video's transcript. An existing transcript is kept."""
+    await conn.execute(
+        "INSERT INTO youtube_summarizer.transcripts "
+        "(video_id, text, starts, durations, offsets) "
+        "VALUES ($1, $2, $3, $4, $5) ON CONFLICT (video_id) DO NOTHING",
+        video_id,
+        text,
+        starts,
+        durations,
+        offsets,
+    )
+
+
+async def get_stored_transcript(
+    conn: asyncpg.Connection, video_id: str
+) -> dict[str, Any] | None:
+    """Get a video's stored transcript text and segment timing arrays.
+
+    Transcripts outlive their summaries, so a soft-deleted video still has one.
+    """
+    row = await conn.fetchrow(
+        "SELECT text, starts, durations, offsets "
+        "FROM youtube_summarizer.transcripts WHERE video_id = $1",
+        video_id,
+    )
+    if row is None:
+        return None
+    return dict(row)
+
+
+async def get_transcript_text(conn: asyncpg.Connection, video_id: str) -> str | None:
+    """Get only a video's stored transcript text, without the timing arrays."""
+    text: str | None = await conn.fetchval(
+        "SELECT text FROM youtube_summarizer.transcripts WHERE video_id = $1",
+        video_id,
+    )
+    return text
+
+
+async def get_summary_variant(
+    conn: asyncpg.Connection,
+    video_id: str,
+    length_percent: int,
+    model: str,
+    prompt_hash: str,
+) -> SummaryVariant | None:
+    """Get a cached summary variant by its full cache key."""
+    row = await conn.fetchrow(
+        "SELECT * FROM youtube_summarizer.summary_variants "
+        "WHERE video_id = $1 AND length_percent = $2 "
+        "AND model = $3 AND prompt_hash = $4",
+        video_id,
+        length_percent,
+        model,
+        prompt_hash,
+    )
+    if row is None:
+        return None
+    return _parse_summary_variant(row)
+
+
+async def get_derivation_source(
+    conn: asyncpg.Connection,
+    video_id: str,
+    length_percent: int,
+    model: str,
+    prompt_hash: str,
+) -> SummaryVariant | None:
+    """Get the best cached variant to derive a shorter summary from.
+
+    Picks the closest longer variant that was generated from the transcript,
+    so derived summaries are never derived again.
+    """
+    row = await conn.fetchrow(
+        "SELECT * FROM youtube_summarizer.summary_variants "
+        "WHERE video_id = $1 AND model = $2 AND prompt_hash = $3 "
+        "AND length_percent > $4 "
+        "AND NOT COALESCE((stats->>'derived')::boolean, false) "
+        "ORDER BY length_percent ASC LIMIT 1",
+        video_id,
+        model,
+        prompt_hash,
+        length_percent,
+    )
+    if row is None:
+        return None
+    return _parse_summary_variant(row)
+
+
+async def get_cached_summaries(
+    conn: asyncpg.Connection,
+    video_ids: list[str],
+    length_percent: int,
+    model: str,
+    prompt_hash: str,
+) -> dict[str, tuple[VideoRecord, SummaryVariant]]:
+    """Get the stored record and exact cached variant for many videos at once.
+
+    Videos without both are left out of the result.
+    """
+    rows = await conn.fetch(
+        f"SELECT {_RECORD_COLUMNS}, COALESCE(t.text, '') AS transcript, "
+        "to_jsonb(v) AS variant "
+        "FROM youtube_summarizer.summaries s "
+        "JOIN youtube_summarizer.summary_variants v "
+        "ON v.video_id = s.video_id AND v.length_percent = $2 "
+        "AND v.model = $3 AND v.prompt_hash = $4 "
+        "LEFT JOIN youtube_summarizer.transcripts t ON t.video_id = s.video_id "
+        "WHERE s.video_id = ANY($1) AND s.deleted_at IS NULL",
+        video_ids,
+        length_percent,
+        model,
+        prompt_hash,
+    )
+    cached: dict[str, tuple[VideoRecord, SummaryVariant]] = {}
+    for row in rows:
+        data = dict(row)
+        variant = data.pop("variant")
+        if isinstance(variant, str):
+            variant = json.loads(variant)
+        record = _parse_video_record(data)
+        assert record is not None
+        cached[record.video_id] = (record, _parse_summary_variant(variant))
+    return cached
+
+
+async def save_summary_variant(
+    conn: asyncpg.Connection,
+    video_id: str,
+    length_percent: int,
+    model: str,
+    prompt_hash: str,
+    summary: str,
+    stats: SummaryStats | None,
+) -> None:
+    """Save a summary variant. An existing variant for the same key is kept."""
+    await conn.execute(
+        "INSERT INTO youtube_summarizer.summary_variants "
+        "(video_id, length_percent, model, prompt_hash, summary, stats) "
+        "VALUES ($1, $2, $3, $4, $5, $6) "
+        "ON CONFLICT (video_id, length_percent, model, prompt_hash) DO NOTHING",
+        video_id,
+        length_percent,
+        model,
+        prompt_hash,
+        summary,
+        json.dumps(stats.model_dump()) if stats else None,
+    )
+
+
+def _parse_summary_variant(row: asyncpg.Record) -> SummaryVariant:
+    data = dict(row)
+    raw = data.get("stats")
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    data["stats"] = SummaryStats(**raw) if raw else None
+    return SummaryVariant(**data)
+
+
+async def get_llm_cache_entry(
+    conn: asyncpg.Connection, key: str, ttl_seconds: int
+) -> dict[str, Any] | None:
+    """Get a cached LLM response that is younger than ``ttl_seconds``."""
+    row = await conn.fetchrow(
+        "SELECT content, prompt_tokens, completion_tokens "
+        "FROM youtube_summarizer.llm_cache "
+        "WHERE key = $1 AND created_at > now() - make_interval(secs => $2)",
+        key,
+        ttl_seconds,
+    )
+    if row is None:
+        return None
+    return dict(row)
+
+
+async def save_llm_cache_entry(
+    conn: asyncpg.Connection,
+    key: str,
+    content: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+) -> None:
+    """Save an LLM response, replacing any expired entry for the same key."""
+    await conn.execute(
+        "INSERT INTO youtube_summarizer.llm_cache "
+        "(key, content, prompt_tokens, completion_tokens) "
+        "VALUES ($1, $2, $3, $4) "
+        "ON CONFLICT (key) DO UPDATE SET content = EXCLUDED.content, "
+        "prompt_tokens = EXCLUDED.prompt_tokens, "
+        "completion_tokens = EXCLUDED.completion_tokens, created_at = now()",
+        key,
+        content,
+        prompt_tokens,
+        completion_tokens,
+    )
+
+
+async def delete_llm_cache_entry(conn: asyncpg.Connection, key: str) -> None:
+    await conn.execute("DELETE FROM youtube_summarizer.llm_cache WHERE key = $1", key)
+
+
+async def purge_llm_cache(conn: asyncpg.Connection, ttl_seconds: int) -> int:
+    """Delete LLM cache entries older than ``ttl_seconds``. Returns the count."""
+    result = await conn.execute(
+        "DELETE FROM youtube_summarizer.llm_cache "
+        "WHERE created_at <= now() - make_interval(secs => $1)",
+        ttl_seconds,
+    )
+    return int(result.split()[-1])
+
+
+async def insert_job(
+    conn: asyncpg.Connection,
+    job_id: str,
+    kind: str,
+    payload: dict[str, Any],
+    max_attempts: int,
+) -> Job:
+    row = await conn.fetchrow(
+        """
+        INSERT INTO youtube_summarizer.jobs (id, kind, payload, max_attempts)
+        VALUES ($1, $2, $3, $4)
+        RETURNING *
+        """,
+        job_id,
+        kind,
+        json.dumps(payload),
+        max_attempts,
+    )
+    return _parse_job(row)
+
+
+async def get_job(conn: asyncpg.Connection, job_id: str) -> Job | None:
+    row = await conn.fetchrow(
+        "SELECT * FROM youtube_summarizer.jobs WHERE id = $1", job_id
+    )
+    return _parse_job(row) if row is not None else None
+
+
+async def claim_job(
+    conn: asyncpg.Connection, worker_id: str, lease_seconds: float
+) -> Job | None:
+    """Claim the next runnable job for ``worker_id`` and lease it.
+
+    Runnable jobs are queued jobs whose backoff has elapsed and running jobs
+    whose lease expired with attempts left. SKIP LOCKED lets every worker on
+    every replica poll at once without claiming the same row.
+    """
+    row = await conn.fetchrow(
+        """
+        UPDATE youtube_summarizer.jobs
+           SET status = 'running',
+               attempts = attempts + 1,
+               lease_owner = $1,
+               lease_expires_at = now() + make_interval(secs => $2),
+               updated_at = now()
+         WHERE id = (
+                SELECT id
+                  FROM youtube_summarizer.jobs
+                 WHERE (status = 'queued' AND run_after <= now())
+                    OR (status = 'running'
+                        AND lease_expires_at < now()
+                        AND attempts < max_attempts)
+                 ORDER BY run_after
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+               )
+        RETURNING *
+        """,
+        worker_id,
+        lease_seconds,
+    )
+    return _parse_job(row) if row is not None else None
+
+
+async def heartbeat_job(
+    conn: asyncpg.Connection,
+    job_id: str,
+    worker_id: str,
+    lease_seconds: float,
+    progress: dict[str, Any] | None,
+) -> bool:
+    """Extend a job's lease and record its progress.
+
+    Returns False if ``worker_id`` no longer holds the lease.
+    """
+    result: str = await conn.execute(
+        """
+        UPDATE youtube_summarizer.jobs
+           SET lease_expires_at = now() + make_interval(secs => $3),
+               progress = $4,
+               updated_at = now()
+         WHERE id = $1 AND lease_owner = $2 AND status = 'running'
+        """,
+        job_id,
+        worker_id,
+        lease_seconds,
+        json.dumps(progress) if progress is not None else None,
+    )
+    return result == "UPDATE 1"
+
+
+async def complete_job(
+    conn: asyncpg.Connection,
+    job_id: str,
+    worker_id: str,
+    result: dict[str, Any],
+    progress: dict[str, Any] | None,
+) -> bool:
+    """Mark a leased job succeeded. Returns False if the lease was lost."""
+    status: str = await conn.execute(
+        """
+        UPDATE youtube_summarizer.jobs
+           SET status = 'succeeded',
+               result = $3,
+               progress = $4,
+               error = NULL,
+               lease_owner = NULL,
+               lease_expires_at = NULL,
+               updated_at = now()
+         WHERE id = $1 AND lease_owner = $2 AND status = 'running'
+        """,
+        job_id,
+        worker_id,
+        json.dumps(result),
+        json.dumps(progress) if progress is not None else None,
+    )
+    return status == "UPDATE 1"
+
+
+async def fail_job(
+    conn: asyncpg.Connection,
+    job_id: str,
+    worker_id: str,
+    error: dict[str, Any],
+    progress: dict[str, Any] | None,
+    *,
+    retry_delay: float | None,
+) -> bool:
+    """Record a failed attempt of a leased job.
+
+    With a ``retry_delay`` the job is queued again to run after the delay,
+    unless it has used all its attempts; otherwise it fails for good.
+    Returns False if the lease was lost.
+    """
+    status: str = await conn.execute(
+        """
+        UPDATE youtube_summarizer.jobs
+           SET status = CASE WHEN $4 AND attempts < max_attempts
+                             THEN 'queued' ELSE 'failed' END,
+               run_after = now() + make_interval(secs => $5),
+               error = $3,
+               progress = $6,
+               lease_owner = NULL,
+               lease_expires_at = NULL,
+               updated_at = now()
+         WHERE id = $1 AND lease_owner = $2 AND status = 'running'
+        """,
+        job_id,
+        worker_id,
+        json.dumps(error),
+        retry_delay is not None,
+        retry_delay or 0.0,
+        json.dumps(progress) if progress is not None else None,
+    )
+    return status == "UPDATE 1"
+
+
+async def fail_expired_jobs(conn: asyncpg.Connection, error: dict[str, Any]) -> int:
+    """Fail running jobs whose lease expired on their last attempt.
+
+    Returns the number of jobs failed.
+    """
+    result = await conn.execute(
+        """
+        UPDATE youtube_summarizer.jobs
+           SET status = 'failed',
+               error = $1,
+               lease_owner = NULL,
+               lease_expires_at = NULL,
+               updated_at = now()
+         WHERE status = 'running'
+           AND lease_expires_at < now()
+           AND attempts >= max_attempts
+        """,
+        json.dumps(error),
+    )
+    return int(result.split()[-1])
+
+
+async def purge_finished_jobs(conn: asyncpg.Connection, retention_seconds: int) -> int:
+    """Delete finished jobs older than ``retention_seconds``. Returns the count."""
+    result = await conn.execute(
+        """
+        DELETE FROM youtube_summarizer.jobs
+         WHERE status IN ('succeeded', 'failed')
+           AND updated_at <= now() - make_interval(secs => $1)
+        """,
+        retention_seconds,
+    )
+    return int(result.split()[-1])
+
+
+def _parse_job(row: asyncpg.Record) -> Job:
+    data = dict(row)
+    for column in ("payload", "progress", "result", "error"):
+        if isinstance(data.get(column), str):
+            data[column] = json.loads(data[column])
+    return Job(
+        job_id=data["id"],
+        kind=data["kind"],
+        status=data["status"],
+        payload=data["payload"],
+        progress=data["progress"],
+        result=data["result"],
+        error=data["error"],
+        attempts=data["attempts"],
+        created_at=data["created_at"],
+        updated_at=data["updated_at"],
+    )
+
+
 async def list_recent(conn: asyncpg.Connection, limit: int) -> list[HistoryItem]:
     rows = await conn.fetch(
         "SELECT video_id, title, thumbnail_url, summary, created_at, "
@@ -156,8 +800,16 @@ async def list_recent(conn: asyncpg.Connection, limit: int) -> list[HistoryItem]
 async def get_full_record(
     conn: asyncpg.Connection, video_id: str
 ) -> VideoRecord | None:
+    """Get a video record together with its transcript text."""
     row = await conn.fetchrow(
-        "SELECT * FROM youtube_summarizer.summaries WHERE video_id = $1 AND deleted_at IS NULL",
+        f"SELECT {_RECORD_COLUMNS}, COALESCE(t.text, '') AS transcript, "
+        "(SELECT COALESCE(jsonb_agg(jsonb_build_object("
+        "'role', m.role, 'content', m.content) ORDER BY m.id), '[]'::jsonb) "
+        "FROM youtube_summarizer.qa_messages m "
+        "WHERE m.video_id = s.video_id) AS qa_history "
+        "FROM youtube_summarizer.summaries s "
+        "LEFT JOIN youtube_summarizer.transcripts t ON t.video_id = s.video_id "
+        "WHERE s.video_id = $1 AND s.deleted_at IS NULL",
         video_id,
     )
     if row is None:
@@ -195,7 +847,7 @@ def _parse_video_record(row: asyncpg.Record | None) -> VideoRecord | None:
 async def save_fallacy_analysis(
     conn: asyncpg.Connection,
     video_id: str,
-    fallacy_analysis: dict,
+    fallacy_analysis: dict[str, Any],
 ) -> bool:
     """Save fallacy analysis for a video.
 
@@ -213,18 +865,106 @@ async def save_fallacy_analysis(
     return result == "UPDATE 1"
 
 
-async def save_qa_history(
-    conn: asyncpg.Connection, video_id: str, history: list[dict]
+async def append_qa_exchange(
+    conn: asyncpg.Connection, video_id: str, question: str, answer: str
 ) -> None:
+    """Append one question and its answer to a video's Q&A history.
+
+    A single INSERT, so concurrent chats on the same video add their pairs
+    rather than overwrite each other. Each row draws its own id, so the
+    statement first takes a per-video lock held until it commits: ids of
+    one pair are then never interleaved with another's, and reads in id
+    order see every question next to its answer.
+    """
+    await conn.execute(
+        """
+        WITH lock AS (SELECT pg_advisory_xact_lock($4))
+        INSERT INTO youtube_summarizer.qa_messages (video_id, role, content)
+        SELECT s.video_id, m.role, m.content
+          FROM lock, youtube_summarizer.summaries s
+         CROSS JOIN (
+               VALUES (1, 'user', $2::text), (2, 'assistant', $3::text)
+               ) AS m(ord, role, content)
+         WHERE s.video_id = $1
+           AND s.deleted_at IS NULL
+         ORDER BY m.ord
+        """,
+        video_id,
+        question,
+        answer,
+        _lock_id(f"qa_messages:{video_id}"),
+    )
+
+
+async def get_qa_messages(
+    conn: asyncpg.Connection,
+    video_id: str,
+    *,
+    limit: int,
+    before: int | None = None,
+) -> list[StoredQaMessage]:
+    """Get a page of a video's Q&A history, oldest first.
+
+    Pages run backwards from the newest message: pass the id of the first
+    message of a page as ``before`` to get the page preceding it.
+    """
+    rows = await conn.fetch(
+        """
+        SELECT id, role, content
+          FROM youtube_summarizer.qa_messages
+         WHERE video_id = $1
+           AND ($2::bigint IS NULL OR id < $2)
+         ORDER BY id DESC
+         LIMIT $3
+        """,
+        video_id,
+        before,
+        limit,
+    )
+    return [StoredQaMessage(**dict(row)) for row in reversed(rows)]
+
+
+async def get_qa_summary(
+    conn: asyncpg.Connection, video_id: str
+) -> dict[str, Any] | None:
+    """Get the running summary of a video's older Q&A turns, if any."""
+    row = await conn.fetchrow(
+        """
+        SELECT qa_summary AS text,
+               qa_summary_covers AS covers,
+               COALESCE(qa_summary_digest, '') AS digest
+          FROM youtube_summarizer.summaries
+         WHERE video_id = $1
+           AND deleted_at IS NULL
+           AND qa_summary IS NOT NULL
+        """,
+        video_id,
+    )
+    return dict(row) if row is not None else None
+
+
+async def save_qa_summary(
+    conn: asyncpg.Connection, video_id: str, text: str, covers: int, digest: str
+) -> None:
+    """Store the running Q&A summary with the count and digest of what it covers.
+
+    The last write wins. A summary is only reused by the conversation whose
+    digest it carries, so replacing one costs at most a refold, never a
+    wrong answer.
+    """
     await conn.execute(
         """
         UPDATE youtube_summarizer.summaries
-           SET qa_history = $2
+           SET qa_summary = $2,
+               qa_summary_covers = $3,
+               qa_summary_digest = $4
          WHERE video_id = $1
            AND deleted_at IS NULL
         """,
         video_id,
-        json.dumps(history),
+        text,
+        covers,
+        digest,
     )
 
 
@@ -0,0 +1,265 @@
+"""Bulk-ingest a file of YouTube URLs into the summaries database.
+
+Reads one URL per line (blank lines and ``#`` comments are skipped),
+summarizes each video with a pool of workers and stores the result like
+``POST /api/summarize`` does. Finished videos are appended to a checkpoint
+file, so rerunning the same command after an interruption resumes where
+it stopped. Throughput is printed as the run progresses.
+
+Run from backend/:
+
+    python -m app.ingest urls.txt --workers 8
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import asyncpg  # type: ignore[import-untyped]
+from openai import APIError, AsyncOpenAI
+from youtube_transcript_api._errors import (
+    NoTranscriptFound,
+    TranscriptsDisabled,
+    VideoUnavailable,
+)
+
+from app.config import settings
+from app.db import (
+    close_pool,
+    create_pool,
+    create_table,
+    get_by_video_id,
+    save_record,
+    save_summary_variant,
+)
+from app.models import SummaryStats
+from app.services.llm import create_openai_client
+from app.services.summarizer import generate_summary, summary_cache_key
+from app.services.transcript import resolve_transcript
+from app.services.youtube import extract_video_id, get_video_metadata
+
+_DEFAULT_CHECKPOINT_DIR = Path("data")
+
+# Failures that will not go away on a rerun; the video is checkpointed
+_PERMANENT_ERRORS = (VideoUnavailable, TranscriptsDisabled, NoTranscriptFound)
+
+
+def read_urls(path: Path) -> list[str]:
+    """Read URLs from ``path``, one per line, skipping blanks and comments."""
+    lines = path.read_text().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+class Checkpoint:
+    """Append-only record of videos a previous run already finished.
+
+    Each line is ``<video_id>\\t<outcome>``. Lines are flushed as they are
+    written, so at most the videos in flight are lost on a crash.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            for line in path.read_text().splitlines():
+                video_id, _, _ = line.partition("\t")
+                if video_id:
+                    self.done.add(video_id)
+
+    def record(self, video_id: str, outcome: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as f:
+            f.write(f"{video_id}\t{outcome}\n")
+        self.done.add(video_id)
+
+
+@dataclass
+class IngestStats:
+    total: int
+    summarized: int = 0
+    skipped: int = 0
+    failed: int = 0
+    tokens: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def line(self) -> str:
+        minutes = max(time.monotonic() - self.started, 1e-9) / 60
+        finished = self.summarized + self.skipped + self.failed
+        return (
+            f"{finished}/{self.total} videos "
+            f"({self.summarized} summarized, {self.skipped} skipped, "
+            f"{self.failed} failed) | "
+            f"{self.summarized / minutes:.1f} videos/min | "
+            f"{self.tokens / minutes:,.0f} tokens/min"
+        )
+
+
+async def ingest_video(
+    conn: asyncpg.Connection,
+    client: AsyncOpenAI,
+    video_id: str,
+    length_percent: int,
+) -> int | None:
+    """Summarize and store one video.
+
+    Returns the tokens spent, or None if the video was already stored.
+    """
+    if await get_by_video_id(conn, video_id) is not None:
+        return None
+
+    full_text = (await resolve_transcript(conn, video_id)).text
+    t0 = time.monotonic()
+    result = await generate_summary(
+        full_text,
+        transcript_word_count=len(full_text.split()),
+        length_percent=length_percent,
+        client=client,
+    )
+    duration = time.monotonic() - t0
+    tokens = result.total_prompt_tokens + result.total_completion_tokens
+
+    try:
+        metadata = await asyncio.to_thread(get_video_metadata, video_id)
+    except Exception:
+        metadata = None
+
+    await save_record(
+        conn,
+        video_id=video_id,
+        title=metadata.title if metadata else None,
+        thumbnail_url=metadata.thumbnail_url if metadata else None,
+        summary=result.content,
+    )
+    model, prompt_hash = summary_cache_key()
+    stats = SummaryStats(
+        chars_in=len(full_text),
+        chars_out=len(result.content),
+        total_tokens=tokens,
+        generation_seconds=round(duration, 2),
+    )
+    await save_summary_variant(
+        conn, video_id, length_percent, model, prompt_hash, result.content, stats
+    )
+    return tokens
+
+
+async def run(
+    urls: list[str],
+    *,
+    pool: asyncpg.Pool,
+    client: AsyncOpenAI,
+    checkpoint: Checkpoint,
+    workers: int,
+    length_percent: int,
+    progress_interval: float,
+) -> IngestStats:
+    """Ingest ``urls`` with ``workers`` in parallel, skipping checkpointed ones."""
+    video_ids: list[str] = []
+    for url in urls:
+        try:
+            video_id = extract_video_id(url)
+        except ValueError as e:
+            print(f"skipping {url}: {e}")
+            continue
+        if video_id not in checkpoint.done and video_id not in video_ids:
+            video_ids.append(video_id)
+
+    stats = IngestStats(total=len(video_ids))
+    pending: asyncio.Queue[str] = asyncio.Queue()
+    for video_id in video_ids:
+        pending.put_nowait(video_id)
+
+    async def work() -> None:
+        while not pending.empty():
+            video_id = pending.get_nowait()
+            try:
+                async with pool.acquire() as conn:
+                    tokens = await ingest_video(conn, client, video_id, length_percent)
+            except _PERMANENT_ERRORS as e:
+                print(f"{video_id}: no transcript ({type(e).__name__})")
+                checkpoint.record(video_id, "unavailable")
+                stats.failed += 1
+            except APIError as e:
+                # Not checkpointed, so a rerun tries the video again
+                print(f"{video_id}: summarization failed ({e})")
+                stats.failed += 1
+            except Exception as e:
+                print(f"{video_id}: failed ({type(e).__name__}: {e})")
+                stats.failed += 1
+            else:
+                checkpoint.record(video_id, "exists" if tokens is None else "ok")
+                if tokens is None:
+                    stats.skipped += 1
+                else:
+                    stats.summarized += 1
+                    stats.tokens += tokens
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(progress_interval)
+            print(stats.line())
+
+    reporter = asyncio.create_task(report())
+    try:
+        await asyncio.gather(*(work() for _ in range(max(1, workers))))
+    finally:
+        reporter.cancel()
+    print(stats.line())
+    return stats
+
+
+async def _main(args: argparse.Namespace) -> None:
+    urls_file = Path(args.urls_file)
+    checkpoint_path = args.checkpoint or (
+        _DEFAULT_CHECKPOINT_DIR / f"ingest-{urls_file.stem}.checkpoint"
+    )
+    checkpoint = Checkpoint(Path(checkpoint_path))
+    if checkpoint.done:
+        print(f"resuming: {len(checkpoint.done)} videos already done")
+
+    pool = await create_pool(str(settings.database_url))
+    client = create_openai_client()
+    try:
+        async with pool.acquire() as conn:
+            await create_table(conn)
+        await run(
+            read_urls(urls_file),
+            pool=pool,
+            client=client,
+            checkpoint=checkpoint,
+            workers=args.workers,
+            length_percent=args.length_percent,
+            progress_interval=args.progress_interval,
+        )
+    finally:
+        await client.close()
+        await close_pool(pool)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.ingest", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("urls_file", help="file with one YouTube URL per line")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--length-percent", type=int, default=25)
+    parser.add_argument(
+        "--checkpoint",
+        help="checkpoint file (default: data/ingest-<urls file name>.checkpoint)",
+    )
+    parser.add_argument(
+        "--progress-interval",
+        type=float,
+        default=10.0,
+        help="seconds between throughput reports",
+    )
+    args = parser.parse_args(argv)
+    if not 10 <= args.length_percent <= 50 or args.length_percent % 5:
+        parser.error("--length-percent must be a multiple of 5 from 10 to 50")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
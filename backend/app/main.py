@@ -1,13 +1,16 @@
+import asyncio
+import json
 import logging
 import time
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from typing import Any
 
 import asyncpg  # type: ignore[import-untyped]
 from fastapi import Depends, FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from openai import APIError
+from fastapi.responses import JSONResponse, StreamingResponse
+from openai import APIError, AsyncOpenAI
 from youtube_transcript_api._errors import (
     NoTranscriptFound,
     TranscriptsDisabled,
@@ -17,24 +20,36 @@ from youtube_transcript_api._errors import (
 from app.config import settings
 from app.db import (
     add_highlight,
+    advisory_lock,
+    append_qa_exchange,
     close_pool,
     create_pool,
     create_table,
     get_by_video_id,
+    get_cached_summaries,
     get_db,
+    get_derivation_source,
     get_fallacy_analysis,
     get_full_record,
+    get_job,
+    get_qa_messages,
+    get_qa_summary,
+    get_summary_variant,
+    get_transcript_text,
     list_recent,
     remove_highlight,
     restore,
     save_fallacy_analysis,
-    save_qa_history,
+    save_qa_summary,
     save_record,
+    save_summary_variant,
     soft_delete,
 )
 from app.models import (
     AskRequest,
     AskResponse,
+    BatchSummarizeItem,
+    BatchSummarizeRequest,
     ErrorResponse,
     FallacyAnalysisRequest,
     FallacyAnalysisResult,
@@ -42,29 +57,78 @@ from app.models import (
     HighlightRequest,
     HistoryItem,
     HistoryResponse,
+    Job,
+    QaHistoryPage,
     SummarizeRequest,
     SummarizeResponse,
+    SummaryJobResult,
     SummaryStats,
+    SummaryVariant,
+    TimestampsResponse,
+    TranscriptTimestamp,
     VideoMetadata,
     VideoRecord,
 )
+from app.services.alignment import align_fallacies
 from app.services.fallacy_analyzer import analyze_fallacies
-from app.services.qa import ask_question
-from app.services.summarizer import generate_summary
-from app.services.transcript import calculate_duration, get_transcript
+from app.services.jobs import JobFailedError, JobQueue, ProgressCallback
+from app.services.llm import (
+    OpenAIResult,
+    create_openai_client,
+    get_openai_client,
+    llm_cache,
+)
+from app.services.qa import (
+    HistorySummary,
+    QuestionTooLongError,
+    ask_question,
+    compact_history,
+    stream_answer,
+)
+from app.services.scheduler import llm_scheduler
+from app.services.singleflight import SingleFlight
+from app.services.summarizer import (
+    SummaryResult,
+    generate_summary,
+    stream_summary,
+    summary_cache_key,
+)
+from app.services.timestamps import TimestampIndex, format_timestamp
+from app.services.transcript import (
+    calculate_duration,
+    load_transcript,
+    resolve_transcript,
+    transcript_texts,
+)
 from app.services.youtube import extract_video_id, get_video_metadata
 
 logger = logging.getLogger(__name__)
 
+_summary_flights = SingleFlight()
+_fallacy_flights = SingleFlight()
+
+job_queue = JobQueue()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     app.state.pool = await create_pool(str(settings.database_url))
+    app.state.openai_client = create_openai_client()
     async with app.state.pool.acquire() as conn:
         await create_table(conn)
+    if settings.llm_cache_persistent:
+        await llm_cache.attach_pool(app.state.pool)
+    await job_queue.start(
+        app.state.pool,
+        {"summarize": _summarize_job, "fallacies": _fallacy_job},
+        workers=settings.job_workers,
+    )
     try:
         yield
     finally:
+        await job_queue.stop()
+        llm_cache.detach_pool()
+        await app.state.openai_client.close()
         await close_pool(app.state.pool)
 
 
@@ -79,11 +143,107 @@ app.add_middleware(
 )
 
 
+def _url_error_response(e: ValueError) -> JSONResponse:
+    msg = str(e)
+    if "Playlist" in msg:
+        return JSONResponse(
+            status_code=400,
+            content=ErrorResponse(
+                error="playlist_not_supported",
+                message=msg,
+            ).model_dump(),
+        )
+    return JSONResponse(
+        status_code=400,
+        content=ErrorResponse(
+            error="invalid_url",
+            message=msg,
+            details=(
+                "Supported formats: youtube.com/watch?v=..., "
+                "youtu.be/..., youtube.com/shorts/..."
+            ),
+        ).model_dump(),
+    )
+
+
+def _transcript_error_response(e: Exception) -> JSONResponse:
+    if isinstance(e, VideoUnavailable):
+        return JSONResponse(
+            status_code=404,
+            content=ErrorResponse(
+                error="video_not_found",
+                message=(
+                    "The video could not be found. "
+                    "It may have been removed or "
+                    "the URL may be incorrect."
+                ),
+            ).model_dump(),
+        )
+    return JSONResponse(
+        status_code=404,
+        content=ErrorResponse(
+            error="transcript_unavailable",
+            message=(
+                "No transcript is available for this video. "
+                "Try a different video that has "
+                "captions enabled."
+            ),
+        ).model_dump(),
+    )
+
+
+async def _fetch_metadata(
+    video_id: str, segments: list[dict[str, Any]]
+) -> VideoMetadata | None:
+    """Fetch video metadata. Failures must not block the summary."""
+    try:
+        metadata = await asyncio.to_thread(get_video_metadata, video_id)
+        duration = calculate_duration(segments)
+        if metadata and duration is not None:
+            metadata.duration_seconds = duration
+        return metadata
+    except Exception:
+        logger.warning("Failed to retrieve metadata for %s", video_id)
+        return None
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @app.get("/api/health")
 async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/api/cache/stats")
+async def cache_stats() -> dict[str, int]:
+    return llm_cache.stats()
+
+
+@app.get("/api/scheduler/stats")
+async def scheduler_stats() -> dict[str, float]:
+    return llm_scheduler.stats()
+
+
+@app.get("/api/jobs/{job_id}", response_model=None)
+async def get_job_status(
+    job_id: str,
+    conn: asyncpg.Connection = Depends(get_db),  # noqa: B008
+) -> Job | JSONResponse:
+    job = await get_job(conn, job_id)
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content=ErrorResponse(
+                error="not_found",
+                message=f"No job found with id: {job_id}",
+            ).model_dump(),
+        )
+    return job
+
+
 @app.get("/api/history")
 async def get_history(
     limit: int = Query(default=50, ge=1, le=100),
@@ -93,6 +253,22 @@ async def get_history(
     return HistoryResponse(items=items)
 
 
+@app.get("/api/history/{video_id}/qa")
+async def get_qa_history(
+    video_id: str,
+    limit: int = Query(default=50, ge=1, le=200),
+    before: int | None = Query(default=None, ge=1),
+    conn: asyncpg.Connection = Depends(get_db),  # noqa: B008
+) -> QaHistoryPage:
+    """Page through a video's Q&A history, newest page first."""
+    messages = await get_qa_messages(conn, video_id, limit=limit, before=before)
+    return QaHistoryPage(
+        video_id=video_id,
+        messages=messages,
+        next_before=messages[0].id if len(messages) == limit else None,
+    )
+
+
 @app.get("/api/history/{video_id}", response_model=None)
 async def get_history_item(
     video_id: str,
@@ -179,85 +355,238 @@ async def remove_highlight_endpoint(
     return result
 
 
-@app.post("/api/summarize", response_model=None)
-async def summarize_video(
-    request: SummarizeRequest,
+@app.get("/api/transcripts/{video_id}/timestamps", response_model=None)
+async def get_transcript_timestamps(
+    video_id: str,
+    offset: list[int] = Query(min_length=1, max_length=1000),  # noqa: B008
     conn: asyncpg.Connection = Depends(get_db),  # noqa: B008
-) -> SummarizeResponse | JSONResponse:
-    try:
-        video_id = extract_video_id(request.url)
-    except ValueError as e:
-        msg = str(e)
-        if "Playlist" in msg:
-            return JSONResponse(
-                status_code=400,
-                content=ErrorResponse(
-                    error="playlist_not_supported",
-                    message=msg,
-                ).model_dump(),
-            )
+) -> TimestampsResponse | JSONResponse:
+    """Map character offsets in a stored transcript to video times."""
+    transcript = await load_transcript(conn, video_id)
+    if transcript is None:
         return JSONResponse(
-            status_code=400,
+            status_code=404,
             content=ErrorResponse(
-                error="invalid_url",
-                message=msg,
-                details=(
-                    "Supported formats: youtube.com/watch?v=..., "
-                    "youtu.be/..., youtube.com/shorts/..."
-                ),
+                error="not_found",
+                message=f"No stored transcript found for video_id: {video_id}",
             ).model_dump(),
         )
-
-    # Cache check: return stored result if available
-    existing = await get_by_video_id(conn, video_id)
-    if existing is not None:
-        cached_metadata = VideoMetadata(
-            video_id=existing.video_id,
-            title=existing.title,
-            thumbnail_url=existing.thumbnail_url,
-        )
-        return SummarizeResponse(
-            summary=existing.summary,
-            transcript=existing.transcript,
-            metadata=cached_metadata,
-            highlights=existing.highlights,
-            storage_warning=False,
-        )
-
-    try:
-        full_text, segments = get_transcript(video_id)
-    except VideoUnavailable:
+    index = TimestampIndex(transcript)
+    if not index.timed:
         return JSONResponse(
             status_code=404,
             content=ErrorResponse(
-                error="video_not_found",
-                message=(
-                    "The video could not be found. "
-                    "It may have been removed or "
-                    "the URL may be incorrect."
-                ),
+                error="timing_unavailable",
+                message="This transcript was stored without segment timing.",
             ).model_dump(),
         )
-    except (TranscriptsDisabled, NoTranscriptFound):
+    timestamps: list[TranscriptTimestamp] = []
+    invalid: list[str] = []
+    for position in offset:
+        seconds = index.seconds_at(position)
+        if seconds is None:
+            invalid.append(str(position))
+        else:
+            timestamps.append(
+                TranscriptTimestamp(
+                    offset=position,
+                    seconds=seconds,
+                    timestamp=format_timestamp(seconds),
+                )
+            )
+    if invalid:
         return JSONResponse(
-            status_code=404,
+            status_code=400,
             content=ErrorResponse(
-                error="transcript_unavailable",
+                error="invalid_offset",
                 message=(
-                    "No transcript is available for this video. "
-                    "Try a different video that has "
-                    "captions enabled."
+                    f"Offsets must be between 0 and {len(transcript.text)}, "
+                    "the transcript length."
                 ),
+                details="Invalid offsets: " + ", ".join(invalid),
             ).model_dump(),
         )
+    return TimestampsResponse(video_id=video_id, timestamps=timestamps)
+
+
+@app.post("/api/summarize", response_model=None)
+async def summarize_video(
+    request: SummarizeRequest,
+    conn: asyncpg.Connection = Depends(get_db),  # noqa: B008
+    openai_client: AsyncOpenAI = Depends(get_openai_client),  # noqa: B008
+) -> SummarizeResponse | JSONResponse:
+    try:
+        video_id = extract_video_id(request.url)
+    except ValueError as e:
+        return _url_error_response(e)
+
+    # Long videos can outlast proxy timeouts; hand them to a worker and let
+    # the client poll GET /api/jobs/{job_id}
+    if request.background:
+        job = await job_queue.submit(
+            conn,
+            "summarize",
+            {"video_id": video_id, "length_percent": request.length_percent},
+        )
+        return JSONResponse(status_code=202, content=job.model_dump(mode="json"))
+
+    # Cache check: the stored record supplies the transcript, the variant the
+    # summary for this length, model and prompt version
+    existing, variant, _ = await _lookup_summary(conn, video_id, request.length_percent)
+    if existing is not None and variant is not None:
+        return _variant_response(existing, variant)
+
+    # Concurrent requests for the same summary share one generation
+    return await _summary_flights.do(
+        (video_id, request.length_percent),
+        lambda: _summarize_locked(
+            conn, openai_client, video_id, request.length_percent
+        ),
+    )
+
+
+@asynccontextmanager
+async def _worker_lock(conn: asyncpg.Connection, name: str) -> AsyncIterator[None]:
+    """Hold the advisory lock ``name``, or run unlocked if the database fails.
+
+    The lock only saves duplicate work, so it must not block the response.
+    """
+    lock = advisory_lock(conn, name)
+    try:
+        await lock.__aenter__()
+    except Exception:
+        logger.warning("Advisory lock %s unavailable; continuing without it", name)
+        yield
+        return
+    try:
+        yield
+    finally:
+        try:
+            await lock.__aexit__(None, None, None)
+        except Exception:
+            logger.warning("Failed to release advisory lock %s", name)
+
+
+async def _summarize_pooled(
+    openai_client: AsyncOpenAI,
+    video_id: str,
+    length_percent: int,
+    *,
+    on_progress: ProgressCallback | None = None,
+) -> SummarizeResponse | JSONResponse:
+    """Run the summarize pipeline outside a request, on its own connection."""
+    async with app.state.pool.acquire() as conn:
+        existing, variant, _ = await _lookup_summary(conn, video_id, length_percent)
+        if existing is not None and variant is not None:
+            return _variant_response(existing, variant)
+        return await _summary_flights.do(
+            (video_id, length_percent),
+            lambda: _summarize_locked(
+                conn, openai_client, video_id, length_percent, on_progress=on_progress
+            ),
+        )
+
+
+async def _summarize_job(
+    payload: dict[str, Any], report: ProgressCallback
+) -> SummaryJobResult:
+    """Run the summarize pipeline for a background job.
+
+    The transcript is left out of the stored result; it is already saved
+    with the video and served by /api/history/{video_id}.
+    """
+    result = await _summarize_pooled(
+        app.state.openai_client,
+        payload["video_id"],
+        payload["length_percent"],
+        on_progress=report,
+    )
+    if isinstance(result, JSONResponse):
+        raise _job_error(result)
+    return SummaryJobResult.model_validate(result.model_dump(exclude={"transcript"}))
+
+
+def _job_error(response: JSONResponse) -> JobFailedError:
+    """Turn an endpoint error response into a job failure.
+
+    Server-side failures (5xx) are worth retrying; client errors are not.
+    """
+    return JobFailedError(
+        ErrorResponse.model_validate_json(bytes(response.body)),
+        retryable=response.status_code >= 500,
+    )
+
+
+def _variant_response(
+    record: VideoRecord, variant: SummaryVariant
+) -> SummarizeResponse:
+    return SummarizeResponse(
+        summary=variant.summary,
+        transcript=record.transcript or "",
+        metadata=_stored_metadata(record),
+        highlights=record.highlights,
+        storage_warning=False,
+    )
+
+
+async def _summarize_locked(
+    conn: asyncpg.Connection,
+    openai_client: AsyncOpenAI,
+    video_id: str,
+    length_percent: int,
+    *,
+    on_progress: ProgressCallback | None = None,
+) -> SummarizeResponse | JSONResponse:
+    """Generate a summary while holding its advisory lock.
+
+    Workers in other processes wait on the lock; the cache is re-checked
+    once it is held, so only the first of them pays for generation.
+    """
+    async with _worker_lock(conn, f"summary:{video_id}:{length_percent}"):
+        existing, variant, source = await _lookup_summary(
+            conn, video_id, length_percent
+        )
+        if existing is not None and variant is not None:
+            return _variant_response(existing, variant)
+        return await _summarize(
+            conn,
+            openai_client,
+            video_id,
+            length_percent,
+            existing,
+            source,
+            on_progress=on_progress,
+        )
+
+
+async def _summarize(
+    conn: asyncpg.Connection,
+    openai_client: AsyncOpenAI,
+    video_id: str,
+    length_percent: int,
+    existing: VideoRecord | None,
+    source: SummaryVariant | None,
+    *,
+    on_progress: ProgressCallback | None = None,
+) -> SummarizeResponse | JSONResponse:
+    report = on_progress or (lambda stage, current, total: None)
+    report("transcript", 0, 1)
+    try:
+        transcript = await resolve_transcript(conn, video_id)
+    except (VideoUnavailable, TranscriptsDisabled, NoTranscriptFound) as e:
+        return _transcript_error_response(e)
+    full_text = transcript.text
 
     try:
         transcript_word_count = len(full_text.split())
         t0 = time.monotonic()
-        summary_result = generate_summary(
+        summary_result = await generate_summary(
             full_text,
             transcript_word_count=transcript_word_count,
-            length_percent=request.length_percent,
+            length_percent=length_percent,
+            source_summary=source.summary if source else None,
+            client=openai_client,
+            on_progress=report,
         )
         duration = time.monotonic() - t0
         summary = summary_result.content
@@ -281,15 +610,10 @@ async def summarize_video(
             ).model_dump(),
         )
 
-    # Fetch metadata — failures must not block the summary
-    metadata: VideoMetadata | None = None
-    try:
-        metadata = get_video_metadata(video_id)
-        duration = calculate_duration(segments)
-        if metadata and duration is not None:
-            metadata.duration_seconds = duration
-    except Exception:
-        logger.warning("Failed to retrieve metadata for %s", video_id)
+    if existing is not None:
+        metadata: VideoMetadata | None = _stored_metadata(existing)
+    else:
+        metadata = await _fetch_metadata(video_id, transcript.segments)
 
     # Build response
     stats = SummaryStats(
@@ -298,123 +622,637 @@ async def summarize_video(
         total_tokens=summary_result.total_prompt_tokens
         + summary_result.total_completion_tokens,
         generation_seconds=round(duration, 2),
+        derived=source is not None,
     )
     response = SummarizeResponse(
-        summary=summary, transcript=full_text, metadata=metadata, stats=stats
+        summary=summary,
+        transcript=full_text,
+        metadata=metadata,
+        stats=stats,
+        highlights=existing.highlights if existing else [],
     )
 
     # Persist to database — failures must not block the response
+    report("persist", 0, 1)
+    response.storage_warning = not await _persist_summary(
+        conn,
+        video_id,
+        existing=existing,
+        metadata=metadata,
+        length_percent=length_percent,
+        summary=summary,
+        stats=stats,
+    )
+
+    return response
+
+
+@app.post("/api/summarize/batch", response_model=None)
+async def summarize_batch(
+    request: BatchSummarizeRequest,
+    openai_client: AsyncOpenAI = Depends(get_openai_client),  # noqa: B008
+) -> StreamingResponse | JSONResponse:
+    """Summarize many videos, streaming one NDJSON line per video.
+
+    Every URL is validated before any work starts. Cached summaries are
+    resolved with one query and sent first; the rest run through the
+    pipeline at most ``settings.batch_max_concurrency`` at a time and are
+    sent as they complete. A URL repeated in the batch is summarized once.
+
+    The cache query borrows a pool connection only for its duration: a
+    request-scoped one would stay checked out until the stream ends.
+    """
+    urls: dict[str, str] = {}
+    invalid: list[str] = []
+    for url in request.urls:
+        try:
+            urls.setdefault(extract_video_id(url), url)
+        except ValueError:
+            invalid.append(url)
+    if invalid:
+        return JSONResponse(
+            status_code=400,
+            content=ErrorResponse(
+                error="invalid_url",
+                message=f"{len(invalid)} of {len(request.urls)} URLs are invalid.",
+                details="Invalid URLs: " + ", ".join(invalid),
+            ).model_dump(),
+        )
+
+    model, prompt_hash = summary_cache_key()
+    async with app.state.pool.acquire() as conn:
+        cached = await get_cached_summaries(
+            conn, list(urls), request.length_percent, model, prompt_hash
+        )
+    return StreamingResponse(
+        _batch_lines(urls, cached, request.length_percent, openai_client),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _batch_lines(
+    urls: dict[str, str],
+    cached: dict[str, tuple[VideoRecord, SummaryVariant]],
+    length_percent: int,
+    openai_client: AsyncOpenAI,
+) -> AsyncIterator[str]:
+    for video_id, (record, variant) in cached.items():
+        item = BatchSummarizeItem(
+            url=urls[video_id],
+            video_id=video_id,
+            result=_variant_response(record, variant),
+        )
+        yield item.model_dump_json() + "\n"
+
+    semaphore = asyncio.Semaphore(max(1, settings.batch_max_concurrency))
+
+    async def summarize(video_id: str) -> BatchSummarizeItem:
+        item = BatchSummarizeItem(url=urls[video_id], video_id=video_id)
+        async with semaphore:
+            try:
+                result = await _summarize_pooled(
+                    openai_client, video_id, length_percent
+                )
+            except Exception:
+                logger.exception("Batch summarization failed for %s", video_id)
+                item.error = ErrorResponse(
+                    error="internal_error",
+                    message="An unexpected error occurred. Please try again.",
+                )
+                return item
+        if isinstance(result, JSONResponse):
+            item.error = ErrorResponse.model_validate_json(bytes(result.body))
+        else:
+            item.result = result
+        return item
+
+    tasks = [
+        asyncio.create_task(summarize(video_id))
+        for video_id in urls
+        if video_id not in cached
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            yield item.model_dump_json() + "\n"
+    finally:
+        # The client went away; stop the videos not yet summarized
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/api/summarize/stream", response_model=None)
+async def summarize_video_stream(
+    request: SummarizeRequest,
+    conn: asyncpg.Connection = Depends(get_db),  # noqa: B008
+    openai_client: AsyncOpenAI = Depends(get_openai_client),  # noqa: B008
+) -> StreamingResponse | JSONResponse:
+    """Stream a summary as Server-Sent Events.
+
+    Events are sent in order: ``metadata`` (metadata and transcript), one
+    ``token`` per summary delta, then ``stats``. Failures after the stream
+    has started are reported as an ``error`` event. Request validation and
+    transcript errors are returned as regular JSON errors.
+    """
+    try:
+        video_id = extract_video_id(request.url)
+    except ValueError as e:
+        return _url_error_response(e)
+
+    existing, variant, source = await _lookup_summary(
+        conn, video_id, request.length_percent
+    )
+    if existing is not None and variant is not None:
+        return StreamingResponse(
+            _cached_summary_events(existing, variant.summary),
+            media_type="text/event-stream",
+        )
+
     try:
-        await save_record(
+        transcript = await resolve_transcript(conn, video_id)
+    except (VideoUnavailable, TranscriptsDisabled, NoTranscriptFound) as e:
+        return _transcript_error_response(e)
+    full_text = transcript.text
+    if existing is not None:
+        metadata: VideoMetadata | None = _stored_metadata(existing)
+    else:
+        metadata = await _fetch_metadata(video_id, transcript.segments)
+
+    return StreamingResponse(
+        _summary_events(
             conn,
-            video_id=video_id,
-            title=metadata.title if metadata else None,
-            thumbnail_url=metadata.thumbnail_url if metadata else None,
-            summary=summary,
-            transcript=full_text,
+            video_id,
+            existing,
+            full_text,
+            metadata,
+            request.length_percent,
+            source_summary=source.summary if source else None,
+            client=openai_client,
+        ),
+        media_type="text/event-stream",
+    )
+
+
+async def _lookup_summary(
+    conn: asyncpg.Connection, video_id: str, length_percent: int
+) -> tuple[VideoRecord | None, SummaryVariant | None, SummaryVariant | None]:
+    """Look up the stored record and cached variants for this request.
+
+    Returns (record, exact variant, longer variant to derive from). The
+    derivation source is only looked up when the exact variant is missing.
+    The record's transcript text is loaded only for an exact hit, which
+    returns it; a miss resolves the transcript as it generates.
+    """
+    existing = await get_by_video_id(conn, video_id)
+    if existing is None:
+        return None, None, None
+    model, prompt_hash = summary_cache_key()
+    variant = await get_summary_variant(
+        conn, video_id, length_percent, model, prompt_hash
+    )
+    if variant is not None:
+        if existing.transcript is None:
+            existing.transcript = await get_transcript_text(conn, video_id) or ""
+        return existing, variant, None
+    source = await get_derivation_source(
+        conn, video_id, length_percent, model, prompt_hash
+    )
+    return existing, None, source
+
+
+def _stored_metadata(record: VideoRecord) -> VideoMetadata:
+    return VideoMetadata(
+        video_id=record.video_id,
+        title=record.title,
+        thumbnail_url=record.thumbnail_url,
+    )
+
+
+async def _persist_summary(
+    conn: asyncpg.Connection,
+    video_id: str,
+    *,
+    existing: VideoRecord | None,
+    metadata: VideoMetadata | None,
+    length_percent: int,
+    summary: str,
+    stats: SummaryStats,
+) -> bool:
+    """Persist a new record (first summary only) and the summary variant.
+
+    Returns False if anything failed to save.
+    """
+    model, prompt_hash = summary_cache_key()
+    try:
+        if existing is None:
+            await save_record(
+                conn,
+                video_id=video_id,
+                title=metadata.title if metadata else None,
+                thumbnail_url=metadata.thumbnail_url if metadata else None,
+                summary=summary,
+            )
+        await save_summary_variant(
+            conn, video_id, length_percent, model, prompt_hash, summary, stats
         )
     except Exception:
         logger.warning("Failed to persist record for %s", video_id)
-        response.storage_warning = True
+        return False
+    return True
 
-    return response
+
+async def _cached_summary_events(
+    record: VideoRecord, summary: str
+) -> AsyncIterator[str]:
+    yield _sse(
+        "metadata",
+        {
+            "metadata": _stored_metadata(record).model_dump(),
+            "transcript": record.transcript,
+            "highlights": [h.model_dump() for h in record.highlights],
+        },
+    )
+    yield _sse("token", {"text": summary})
+    yield _sse("stats", {"stats": None, "storage_warning": False})
+
+
+async def _summary_events(
+    conn: asyncpg.Connection,
+    video_id: str,
+    existing: VideoRecord | None,
+    full_text: str,
+    metadata: VideoMetadata | None,
+    length_percent: int,
+    *,
+    source_summary: str | None = None,
+    client: AsyncOpenAI | None = None,
+) -> AsyncIterator[str]:
+    yield _sse(
+        "metadata",
+        {
+            "metadata": metadata.model_dump() if metadata else None,
+            "transcript": full_text,
+            "highlights": [h.model_dump() for h in existing.highlights]
+            if existing
+            else [],
+        },
+    )
+
+    summary_result: SummaryResult | None = None
+    t0 = time.monotonic()
+    try:
+        async for item in stream_summary(
+            full_text,
+            transcript_word_count=len(full_text.split()),
+            length_percent=length_percent,
+            source_summary=source_summary,
+            client=client,
+        ):
+            if isinstance(item, SummaryResult):
+                summary_result = item
+            else:
+                yield _sse("token", {"text": item})
+    except APIError:
+        yield _sse(
+            "error",
+            ErrorResponse(
+                error="summarization_failed",
+                message=(
+                    "Unable to generate summary at this time. Please try again later."
+                ),
+            ).model_dump(),
+        )
+        return
+    except Exception:
+        logger.exception("Unexpected error during streamed summarization")
+        yield _sse(
+            "error",
+            ErrorResponse(
+                error="internal_error",
+                message="An unexpected error occurred. Please try again.",
+            ).model_dump(),
+        )
+        return
+    duration = time.monotonic() - t0
+
+    if summary_result is None:
+        return
+    summary = summary_result.content
+    stats = SummaryStats(
+        chars_in=len(full_text),
+        chars_out=len(summary),
+        total_tokens=summary_result.total_prompt_tokens
+        + summary_result.total_completion_tokens,
+        generation_seconds=round(duration, 2),
+        derived=source_summary is not None,
+    )
+
+    # Persist once the summary is complete — failures are reported, not raised
+    saved = await _persist_summary(
+        conn,
+        video_id,
+        existing=existing,
+        metadata=metadata,
+        length_percent=length_percent,
+        summary=summary,
+        stats=stats,
+    )
+
+    yield _sse("stats", {"stats": stats.model_dump(), "storage_warning": not saved})
 
 
 @app.post("/api/fallacies", response_model=None)
 async def analyze_video_fallacies(
     request: FallacyAnalysisRequest,
     conn: asyncpg.Connection = Depends(get_db),  # noqa: B008
+    openai_client: AsyncOpenAI = Depends(get_openai_client),  # noqa: B008
 ) -> FallacyAnalysisResult | JSONResponse:
     try:
         video_id = extract_video_id(request.url)
     except ValueError as e:
-        msg = str(e)
-        if "Playlist" in msg:
-            return JSONResponse(
-                status_code=400,
-                content=ErrorResponse(
-                    error="playlist_not_supported",
-                    message=msg,
-                ).model_dump(),
-            )
-        return JSONResponse(
-            status_code=400,
-            content=ErrorResponse(
-                error="invalid_url",
-                message=msg,
-                details=(
-                    "Supported formats: youtube.com/watch?v=..., "
-                    "youtu.be/..., youtube.com/shorts/..."
-                ),
-            ).model_dump(),
-        )
+        return _url_error_response(e)
+
+    if request.background:
+        job = await job_queue.submit(conn, "fallacies", {"video_id": video_id})
+        return JSONResponse(status_code=202, content=job.model_dump(mode="json"))
 
     # Check for cached analysis first
     cached = await get_fallacy_analysis(conn, video_id)
     if cached is not None:
         return cached
 
+    # Concurrent requests for the same video share one analysis
+    return await _fallacy_flights.do(
+        video_id, lambda: _analyze_fallacies_locked(conn, openai_client, video_id)
+    )
+
+
+async def _fallacy_job(
+    payload: dict[str, Any], report: ProgressCallback
+) -> FallacyAnalysisResult:
+    """Run a fallacy analysis for a background job on its own connection."""
+    video_id = payload["video_id"]
+    openai_client = app.state.openai_client
+    async with app.state.pool.acquire() as conn:
+        cached = await get_fallacy_analysis(conn, video_id)
+        if cached is not None:
+            return cached
+        result = await _fallacy_flights.do(
+            video_id,
+            lambda: _analyze_fallacies_locked(
+                conn, openai_client, video_id, on_progress=report
+            ),
+        )
+    if isinstance(result, JSONResponse):
+        raise _job_error(result)
+    return result
+
+
+async def _analyze_fallacies_locked(
+    conn: asyncpg.Connection,
+    openai_client: AsyncOpenAI,
+    video_id: str,
+    *,
+    on_progress: ProgressCallback | None = None,
+) -> FallacyAnalysisResult | JSONResponse:
+    """Analyze fallacies while holding the video's advisory lock."""
+    report = on_progress or (lambda stage, current, total: None)
+    async with _worker_lock(conn, f"fallacies:{video_id}"):
+        # Another worker may have finished the analysis while we waited
+        cached = await get_fallacy_analysis(conn, video_id)
+        if cached is not None:
+            return cached
+
+        report("transcript", 0, 1)
+        # Reuse the transcript stored by an earlier summary when there is one
+        try:
+            transcript = await resolve_transcript(conn, video_id)
+        except (VideoUnavailable, TranscriptsDisabled, NoTranscriptFound) as e:
+            return _transcript_error_response(e)
+
+        result = await analyze_fallacies(
+            transcript.text, client=openai_client, on_progress=report
+        )
+        if result is None:
+            return JSONResponse(
+                status_code=502,
+                content=ErrorResponse(
+                    error="analysis_failed",
+                    message=(
+                        "Unable to analyze fallacies at this time. "
+                        "Please try again later."
+                    ),
+                ).model_dump(),
+            )
+        await asyncio.to_thread(align_fallacies, result, transcript)
+
+        # Save to database (fire and forget - don't block response)
+        report("persist", 0, 1)
+        try:
+            await save_fallacy_analysis(conn, video_id, result.model_dump())
+        except Exception:
+            logger.warning("Failed to save fallacy analysis for %s", video_id)
+
+        return result
+
+
+@app.post("/api/ask", response_model=None)
+async def ask(
+    request: AskRequest,
+    conn: asyncpg.Connection = Depends(get_db),  # noqa: B008
+    openai_client: AsyncOpenAI = Depends(get_openai_client),  # noqa: B008
+) -> AskResponse | JSONResponse:
+    transcript = await _ask_transcript(conn, request)
+    if isinstance(transcript, JSONResponse):
+        return transcript
+
+    history, history_summary = await _compact_history(conn, request, openai_client)
     try:
-        full_text, _segments = get_transcript(video_id)
-    except VideoUnavailable:
+        answer = await ask_question(
+            transcript=transcript,
+            question=request.question,
+            history=history,
+            video_id=request.video_id,
+            history_summary=history_summary,
+            client=openai_client,
+        )
+    except QuestionTooLongError as e:
+        return _question_too_long_response(e)
+    await _save_exchange(conn, request, answer)
+    return AskResponse(answer=answer)
+
+
+@app.post("/api/ask/stream", response_model=None)
+async def ask_stream(
+    request: AskRequest,
+    conn: asyncpg.Connection = Depends(get_db),  # noqa: B008
+    openai_client: AsyncOpenAI = Depends(get_openai_client),  # noqa: B008
+) -> StreamingResponse | JSONResponse:
+    """Stream an answer as Server-Sent Events.
+
+    Events are sent in order: one ``token`` per answer delta, then ``done``
+    with the full answer once the exchange is saved to the Q&A history.
+    Failures after the stream has started are reported as an ``error``
+    event. If the client disconnects, the upstream completion is abandoned
+    and nothing is saved.
+    """
+    transcript = await _ask_transcript(conn, request)
+    if isinstance(transcript, JSONResponse):
+        return transcript
+    history, history_summary = await _compact_history(conn, request, openai_client)
+    return StreamingResponse(
+        _answer_events(
+            conn,
+            request,
+            transcript,
+            history,
+            history_summary=history_summary,
+            client=openai_client,
+        ),
+        media_type="text/event-stream",
+    )
+
+
+async def _ask_transcript(
+    conn: asyncpg.Connection, request: AskRequest
+) -> str | JSONResponse:
+    """The transcript to answer from: supplied, or stored for the video."""
+    if request.transcript is not None:
+        return request.transcript
+    if not request.video_id:
         return JSONResponse(
-            status_code=404,
+            status_code=400,
             content=ErrorResponse(
-                error="video_not_found",
-                message=(
-                    "The video could not be found. "
-                    "It may have been removed or "
-                    "the URL may be incorrect."
-                ),
+                error="invalid_request",
+                message="Either transcript or video_id is required",
             ).model_dump(),
         )
-    except (TranscriptsDisabled, NoTranscriptFound):
+    transcript = await transcript_texts.get(conn, request.video_id)
+    if transcript is None:
         return JSONResponse(
             status_code=404,
             content=ErrorResponse(
-                error="transcript_unavailable",
-                message=(
-                    "No transcript is available for this video. "
-                    "Try a different video that has "
-                    "captions enabled."
-                ),
+                error="not_found",
+                message=f"No transcript stored for video: {request.video_id}",
             ).model_dump(),
         )
+    return transcript
 
-    result = analyze_fallacies(full_text)
-    if result is None:
-        return JSONResponse(
-            status_code=502,
-            content=ErrorResponse(
-                error="analysis_failed",
-                message=(
-                    "Unable to analyze fallacies at this time. Please try again later."
-                ),
-            ).model_dump(),
-        )
 
-    # Save to database (fire and forget - don't block response)
+async def _compact_history(
+    conn: asyncpg.Connection, request: AskRequest, client: AsyncOpenAI | None
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Recent turns to send verbatim, and a summary of the ones before.
+
+    The running summary is stored with the video record, so each question
+    only folds in the turns that dropped out of the window since the last
+    one. It is only reused by the conversation it was built from. If
+    compaction fails, the full history is sent and the prompt budget trims
+    its oldest turns instead.
+    """
+    history = [m.model_dump() for m in request.history]
+    if len(history) <= 2 * settings.qa_history_turns:
+        return history, None
+
+    stored: HistorySummary | None = None
+    if request.video_id:
+        try:
+            row = await get_qa_summary(conn, request.video_id)
+        except Exception:
+            logger.warning("Failed to load qa_summary for %s", request.video_id)
+            row = None
+        stored = HistorySummary(**row) if row is not None else None
     try:
-        await save_fallacy_analysis(conn, video_id, result.model_dump())
+        recent, summary = await compact_history(history, stored, client=client)
     except Exception:
-        logger.warning("Failed to save fallacy analysis for %s", video_id)
+        logger.warning("Failed to compact Q&A history", exc_info=True)
+        return history, None
+    if summary is None:
+        return recent, None
 
-    return result
+    if request.video_id and summary is not stored:
+        try:
+            await save_qa_summary(
+                conn, request.video_id, summary.text, summary.covers, summary.digest
+            )
+        except Exception:
+            logger.warning("Failed to save qa_summary for %s", request.video_id)
+    return recent, summary.text
 
 
-@app.post("/api/ask", response_model=AskResponse)
-async def ask(request: AskRequest, conn: asyncpg.Connection = Depends(get_db)) -> AskResponse:  # noqa: B008
-    answer = await ask_question(
-        transcript=request.transcript,
-        question=request.question,
-        history=[m.model_dump() for m in request.history],
+async def _answer_events(
+    conn: asyncpg.Connection,
+    request: AskRequest,
+    transcript: str,
+    history: list[dict[str, Any]],
+    *,
+    history_summary: str | None = None,
+    client: AsyncOpenAI | None = None,
+) -> AsyncIterator[str]:
+    answer: OpenAIResult | None = None
+    try:
+        async for item in stream_answer(
+            transcript,
+            request.question,
+            history,
+            video_id=request.video_id,
+            history_summary=history_summary,
+            client=client,
+        ):
+            if isinstance(item, OpenAIResult):
+                answer = item
+            else:
+                yield _sse("token", {"text": item})
+    except QuestionTooLongError as e:
+        yield _sse("error", _question_too_long_error(e).model_dump())
+        return
+    except APIError:
+        yield _sse(
+            "error",
+            ErrorResponse(
+                error="answer_failed",
+                message="Unable to answer at this time. Please try again later.",
+            ).model_dump(),
+        )
+        return
+    except Exception:
+        logger.exception("Unexpected error during streamed answer")
+        yield _sse(
+            "error",
+            ErrorResponse(
+                error="internal_error",
+                message="An unexpected error occurred. Please try again.",
+            ).model_dump(),
+        )
+        return
+
+    if answer is None:
+        return
+    await _save_exchange(conn, request, answer.content)
+    yield _sse("done", {"answer": answer.content})
+
+
+def _question_too_long_error(e: QuestionTooLongError) -> ErrorResponse:
+    return ErrorResponse(
+        error="question_too_long",
+        message="The question is too long. Please shorten it and try again.",
+        details=str(e),
     )
-    if request.video_id:
-        full_history = [m.model_dump() for m in request.history]
-        full_history.append({"role": "user", "content": request.question})
-        full_history.append({"role": "assistant", "content": answer})
-        try:
-            await save_qa_history(conn, request.video_id, full_history)
-        except Exception:
-            logger.warning("Failed to save qa_history for %s", request.video_id)
-    return AskResponse(answer=answer)
+
+
+def _question_too_long_response(e: QuestionTooLongError) -> JSONResponse:
+    return JSONResponse(
+        status_code=400, content=_question_too_long_error(e).model_dump()
+    )
+
+
+async def _save_exchange(
+    conn: asyncpg.Connection, request: AskRequest, answer: str
+) -> None:
+    """Append a finished question and answer to the video's Q&A history."""
+    if not request.video_id:
+        return
+    try:
+        await append_qa_exchange(conn, request.video_id, request.question, answer)
+    except Exception:
+        logger.warning("Failed to save Q&A exchange for %s", request.video_id)
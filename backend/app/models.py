@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 
@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field, field_validator, model_validator
 class SummarizeRequest(BaseModel):
     url: str
     length_percent: int = Field(default=25, ge=10, le=50)
+    background: bool = False
 
     @field_validator("url")
     @classmethod
@@ -23,6 +24,25 @@ class SummarizeRequest(BaseModel):
         return v
 
 
+class BatchSummarizeRequest(BaseModel):
+    urls: list[str] = Field(min_length=1, max_length=500)
+    length_percent: int = Field(default=25, ge=10, le=50)
+
+    @field_validator("urls")
+    @classmethod
+    def urls_must_not_be_empty(cls, v: list[str]) -> list[str]:
+        if any(not url.strip() for url in v):
+            raise ValueError("URLs must not be empty")
+        return [url.strip() for url in v]
+
+    @field_validator("length_percent")
+    @classmethod
+    def length_percent_must_be_multiple_of_5(cls, v: int) -> int:
+        if v % 5 != 0:
+            raise ValueError("length_percent must be a multiple of 5")
+        return v
+
+
 class VideoMetadata(BaseModel):
     video_id: str
     title: str | None = None
@@ -44,6 +64,10 @@ class Fallacy(BaseModel):
     severity: str
     explanation: str
     clear_example: ClearExample
+    # Where the quote was found in the transcript, set by quote alignment
+    quote_match: Literal["exact", "fuzzy", "not_found"] | None = None
+    quote_start: int | None = None
+    quote_end: int | None = None
 
 
 class FallacySummary(BaseModel):
@@ -61,6 +85,7 @@ class FallacyAnalysisResult(BaseModel):
 
 class FallacyAnalysisRequest(BaseModel):
     url: str
+    background: bool = False
 
     @field_validator("url")
     @classmethod
@@ -91,35 +116,84 @@ class SummaryStats(BaseModel):
     chars_out: int
     total_tokens: int
     generation_seconds: float
+    derived: bool = False
 
 
-class SummarizeResponse(BaseModel):
+class SummaryVariant(BaseModel):
+    video_id: str
+    length_percent: int
+    model: str
+    prompt_hash: str
+    summary: str
+    stats: SummaryStats | None = None
+    created_at: datetime
+
+
+# Stored as a summarize job's result; clients fetch the transcript from
+# /api/history/{video_id} rather than keeping a copy per job
+class SummaryJobResult(BaseModel):
     summary: str
-    transcript: str
     metadata: VideoMetadata | None = None
     storage_warning: bool = False
     stats: SummaryStats | None = None
     highlights: list[Highlight] = []
 
 
+class SummarizeResponse(SummaryJobResult):
+    transcript: str
+
+
 class ErrorResponse(BaseModel):
     error: str
     message: str
     details: str | None = None
 
 
+class BatchSummarizeItem(BaseModel):
+    url: str
+    video_id: str
+    result: SummarizeResponse | None = None
+    error: ErrorResponse | None = None
+
+
+JobStage = Literal["transcript", "chunks", "combine", "analyze", "persist"]
+
+
+class JobProgress(BaseModel):
+    stage: JobStage
+    current: int
+    total: int
+
+
+class Job(BaseModel):
+    job_id: str
+    kind: Literal["summarize", "fallacies"]
+    status: Literal["queued", "running", "succeeded", "failed"]
+    payload: dict[str, Any] = {}
+    progress: JobProgress | None = None
+    result: SummaryJobResult | FallacyAnalysisResult | None = None
+    error: ErrorResponse | None = None
+    attempts: int = 0
+    created_at: datetime
+    updated_at: datetime
+
+
 class QaMessage(BaseModel):
     role: Literal["user", "assistant"]
     content: str
 
 
+class StoredQaMessage(QaMessage):
+    id: int
+
+
 class VideoRecord(BaseModel):
     id: int
     video_id: str
     title: str | None
     thumbnail_url: str | None
     summary: str
-    transcript: str
+    transcript: str | None = None  # loaded only by queries that need it
     fallacy_analysis: FallacyAnalysisResult | None = None
     highlights: list[Highlight] = []
     qa_history: list[QaMessage] = []
@@ -139,8 +213,25 @@ class HistoryResponse(BaseModel):
     items: list[HistoryItem]
 
 
+class TranscriptTimestamp(BaseModel):
+    offset: int
+    seconds: float
+    timestamp: str  # m:ss or h:mm:ss
+
+
+class TimestampsResponse(BaseModel):
+    video_id: str
+    timestamps: list[TranscriptTimestamp]
+
+
+class QaHistoryPage(BaseModel):
+    video_id: str
+    messages: list[StoredQaMessage]
+    next_before: int | None = None  # pass as ``before`` for the older page
+
+
 class AskRequest(BaseModel):
-    transcript: str
+    transcript: str | None = None  # omit to use the stored transcript of video_id
     question: str
     history: list[QaMessage] = []
     video_id: str | None = None
@@ -0,0 +1,272 @@
+import re
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Literal
+
+from app.models import Fallacy, FallacyAnalysisResult
+from app.services.timestamps import TimestampIndex, format_timestamp
+from app.services.transcript import Transcript
+
+# Every non-word character is read as a space and runs of spaces as one, so
+# quotes match regardless of punctuation, case, curly quotes or line breaks.
+# Spaces themselves are left out of the pattern: replacing every one of them
+# would more than double the time spent normalizing a long transcript.
+_NON_WORD = re.compile(r"[^\w ]|_")
+
+# Fuzzy matches may differ from the quote in at most this share of characters.
+_MAX_ERROR_RATE = 0.2
+
+_WORD = re.compile(r"\S+")
+
+# Quotes not found verbatim are located by voting: each occurrence of one of
+# their words suggests where the quote starts. Words more common than this
+# are ignored, and only the few windows with the most votes are compared.
+_MAX_OCCURRENCES_PER_WORD = 50
+_MAX_WINDOWS = 3
+_MIN_VOTES = 2
+
+# Shorter quotes are too ambiguous to match approximately.
+_MIN_FUZZY_WORDS = 3
+
+# Cap on the approximate comparisons of one align_quotes call, counted in
+# quote characters times window characters. It allows hundreds of typical
+# quotes; past it, the remaining quotes are only searched verbatim.
+_MAX_FUZZY_CELLS = 20_000_000
+
+
+@dataclass
+class QuoteMatch:
+    start: int  # character offsets of the match in the original text
+    end: int
+    exact: bool
+
+
+class NormalizedText:
+    """Text normalized for matching, able to map positions back.
+
+    Normalization lowercases and turns every run of punctuation and
+    whitespace into one space. Only runs longer than one character change
+    the length, so positions map back through a short list of breakpoints.
+    """
+
+    def __init__(self, text: str) -> None:
+        lowered = _lower(_NON_WORD.sub(" ", text))
+        # Collapse the padded runs, remembering how far each shifts the text
+        self._breaks: list[int] = []
+        self._shifts: list[int] = []
+        parts: list[str] = []
+        last = 0
+        shift = 0
+        for run in re.finditer(r" {2,}", lowered):
+            parts.append(lowered[last : run.start() + 1])
+            self._breaks.append(run.start() + 1 - shift)
+            shift += len(run.group()) - 1
+            self._shifts.append(shift)
+            last = run.end()
+        parts.append(lowered[last:])
+        self.text = "".join(parts)
+
+    @cached_property
+    def word_positions(self) -> dict[str, list[int]]:
+        """Where each word occurs, built on first use by a fuzzy search."""
+        # Words are separated by exactly one space after normalization, so
+        # their offsets follow from their lengths without a regex scan
+        positions: dict[str, list[int]] = {}
+        position = 0
+        for word in self.text.split(" "):
+            if word:
+                positions.setdefault(word, []).append(position)
+            position += len(word) + 1
+        return positions
+
+    def original(self, position: int) -> int:
+        """Map a position in the normalized text to the original text."""
+        i = bisect_right(self._breaks, position) - 1
+        return position + (self._shifts[i] if i >= 0 else 0)
+
+
+def normalize(text: str) -> str:
+    """Normalize a quote the same way transcripts are normalized."""
+    return " ".join(_lower(_NON_WORD.sub(" ", text)).split())
+
+
+def _lower(text: str) -> str:
+    """Lowercase without changing the length of the text.
+
+    A few characters (e.g. "İ") lowercase to more than one; they are kept
+    as they are so positions still line up with the original.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c if len(c.lower()) > 1 else c.lower() for c in text)
+
+
+def align_quotes(text: str, quotes: list[str]) -> list[QuoteMatch | None]:
+    """Find each quote in ``text``, exactly or approximately.
+
+    The text is normalized once and every quote is searched in it. Quotes
+    not found verbatim fall back to a bounded edit-distance search around
+    places where runs of their words occur. Returns None for quotes that
+    cannot be found within the error budget.
+
+    CPU-bound on long transcripts; async callers run it in a thread.
+    """
+    haystack = NormalizedText(text)
+    budget = _MAX_FUZZY_CELLS
+    matches: list[QuoteMatch | None] = []
+    for quote in quotes:
+        needle = normalize(quote)
+        if not needle:
+            matches.append(None)
+            continue
+        position = haystack.text.find(needle)
+        if position >= 0:
+            span: tuple[int, int] | None = (position, position + len(needle))
+            exact = True
+        else:
+            span, cost = _fuzzy_find(haystack, needle, budget)
+            budget -= cost
+            exact = False
+        if span is None:
+            matches.append(None)
+            continue
+        start, end = span
+        matches.append(
+            QuoteMatch(
+                start=haystack.original(start),
+                end=haystack.original(end - 1) + 1,
+                exact=exact,
+            )
+        )
+    return matches
+
+
+def align_fallacies(result: FallacyAnalysisResult, transcript: Transcript) -> None:
+    """Anchor each fallacy's quote in the transcript.
+
+    Found quotes get their position, a match kind and the time they are
+    spoken, replacing the model's timestamp guess. Quotes that cannot be
+    found are flagged ``not_found`` and keep the model's timestamp.
+    Fallacies already marked by mark_quote are not searched again.
+    """
+    pending = [f for f in result.fallacies if f.quote_match is None]
+    matches = align_quotes(transcript.text, [f.quote for f in pending])
+    for fallacy, match in zip(pending, matches, strict=True):
+        mark_quote(fallacy, match)
+
+    index = TimestampIndex(transcript)
+    for fallacy in result.fallacies:
+        if fallacy.quote_start is None:
+            continue
+        seconds = index.seconds_at(fallacy.quote_start)
+        if seconds is not None:
+            fallacy.timestamp = format_timestamp(seconds)
+
+
+def mark_quote(fallacy: Fallacy, match: QuoteMatch | None) -> None:
+    """Record where a fallacy's quote was found, or that it was not."""
+    if match is None:
+        fallacy.quote_match = "not_found"
+        return
+    kind: Literal["exact", "fuzzy"] = "exact" if match.exact else "fuzzy"
+    fallacy.quote_match = kind
+    fallacy.quote_start = match.start
+    fallacy.quote_end = match.end
+
+
+def _fuzzy_find(
+    haystack: NormalizedText, needle: str, budget: int
+) -> tuple[tuple[int, int] | None, int]:
+    """Best approximate occurrence of ``needle`` in the text, if close enough.
+
+    Windows are compared while their cost fits in ``budget``. Returns the
+    span found, or None, and the cost spent.
+    """
+    max_edits = int(len(needle) * _MAX_ERROR_RATE)
+    words = list(_WORD.finditer(needle))
+    if len(words) < _MIN_FUZZY_WORDS or max_edits == 0:
+        return None, 0
+
+    # Every occurrence of a quote word votes for where the quote would start;
+    # votes within the error budget of each other fall in the same bucket
+    votes: Counter[int] = Counter()
+    earliest: dict[int, int] = {}
+    for word in words:
+        occurrences = haystack.word_positions.get(word.group(), ())
+        if len(occurrences) > _MAX_OCCURRENCES_PER_WORD:
+            continue  # too common to say anything about where the quote is
+        for position in occurrences:
+            quote_start = max(position - word.start(), 0)
+            bucket = quote_start // (max_edits + 1)
+            votes[bucket] += 1
+            earliest[bucket] = min(earliest.get(bucket, quote_start), quote_start)
+
+    # Windows are tried from the most votes down; the first close enough wins
+    spent = 0
+    for bucket, count in votes.most_common(_MAX_WINDOWS):
+        if count < _MIN_VOTES:
+            break
+        window_start = max(earliest[bucket] - max_edits, 0)
+        window = haystack.text[
+            window_start : window_start + len(needle) + 2 * max_edits
+        ]
+        cost = len(needle) * len(window)
+        if spent + cost > budget:
+            break
+        spent += cost
+        distance, start, end = _substring_distance(needle, window)
+        if distance <= max_edits:
+            return (window_start + start, window_start + end), spent
+    return None, spent
+
+
+def _substring_distance(pattern: str, text: str) -> tuple[int, int, int]:
+    """Edit distance of ``pattern`` to its closest substring of ``text``.
+
+    Returns (distance, start, end) of that substring. The end is found by
+    a forward search and the start by searching backwards from it.
+    """
+    distances = _search_distances(pattern, text)
+    end = min(range(len(distances)), key=distances.__getitem__)
+    distance = distances[end]
+    backwards = _search_distances(pattern[::-1], text[:end][::-1])
+    length = next(i for i, d in enumerate(backwards) if d == distance)
+    return distance, end - length, end
+
+
+def _search_distances(pattern: str, text: str) -> list[int]:
+    """Edit distance of ``pattern`` to the best substring of ``text`` ending
+    at each position, where skipping text before the match is free.
+
+    Myers' bit-parallel algorithm: one column of Sellers' dynamic program
+    per character of ``text``, held as bit vectors of vertical deltas, so
+    each column costs a few integer operations instead of a Python loop
+    over the pattern.
+    """
+    mask = (1 << len(pattern)) - 1
+    last = 1 << (len(pattern) - 1)
+    peq: dict[str, int] = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | 1 << i
+    positive, negative = mask, 0  # vertical deltas of +1 and -1
+    distance = len(pattern)
+    distances = [distance]
+    for c in text:
+        eq = peq.get(c, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        hp = negative | (~(xh | positive) & mask)
+        hn = positive & xh
+        if hp & last:
+            distance += 1
+        elif hn & last:
+            distance -= 1
+        hp = (hp << 1) & mask
+        hn = (hn << 1) & mask
+        positive = hn | (~(xv | hp) & mask)
+        negative = hp & xv
+        distances.append(distance)
+    return distances
@@ -0,0 +1,133 @@
+import logging
+import re
+from collections import deque
+from collections.abc import Callable, Iterator
+from functools import lru_cache
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+_TOKENIZER_MODEL = "gpt-4o-mini"
+
+# Used only when the tokenizer's BPE file cannot be loaded (e.g. offline).
+_FALLBACK_CHARS_PER_TOKEN = 4
+
+# A sentence is any run of text up to and including terminal punctuation.
+# The second alternative picks up a trailing fragment with no terminator.
+_SENTENCE_PATTERN = re.compile(r"[^.!?]*[.!?]+|[^.!?]+")
+
+# A word together with its leading whitespace, matching how BPE attaches spaces.
+_WORD_PATTERN = re.compile(r"\s*\S+")
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding | None:
+    try:
+        return tiktoken.encoding_for_model(_TOKENIZER_MODEL)
+    except Exception:
+        logger.warning(
+            "Tokenizer unavailable, falling back to ~%d chars per token",
+            _FALLBACK_CHARS_PER_TOKEN,
+            exc_info=True,
+        )
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in text using the model's local tokenizer."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return round(len(text) / _FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode_ordinary(text))
+
+
+def iter_chunks(
+    text: str,
+    max_tokens: int,
+    count: Callable[[str], int] = count_tokens,
+) -> Iterator[str]:
+    """Lazily split text into chunks of at most ``max_tokens`` tokens.
+
+    Chunks end on sentence boundaries where possible. A sentence that alone
+    exceeds the budget is split at word boundaries instead. Chunks are
+    slices of ``text``, so no intermediate word list is built.
+
+    Args:
+        text: The text to split.
+        max_tokens: Token budget for each chunk.
+        count: Token counter, defaults to the model tokenizer.
+
+    Yields:
+        Non-empty chunks in order, stripped of surrounding whitespace.
+    """
+    chunk_start = 0
+    chunk_end = 0
+    used = 0
+    for start, end, tokens in _iter_units(text, max_tokens, count):
+        if used and used + tokens > max_tokens:
+            chunk = text[chunk_start:chunk_end].strip()
+            if chunk:
+                yield chunk
+            chunk_start = start
+            used = 0
+        chunk_end = end
+        used += tokens
+
+    chunk = text[chunk_start:chunk_end].strip()
+    if chunk:
+        yield chunk
+
+
+def iter_windows(
+    text: str,
+    max_tokens: int,
+    overlap_tokens: int,
+    count: Callable[[str], int] = count_tokens,
+) -> Iterator[str]:
+    """Lazily split text into overlapping windows of at most ``max_tokens``.
+
+    Like ``iter_chunks``, but each window after the first starts with the
+    last sentences of the previous one, up to ``overlap_tokens``, so a
+    passage cut at a boundary is still seen whole by one window.
+
+    Yields:
+        Non-empty windows in order, stripped of surrounding whitespace.
+    """
+    units: deque[tuple[int, int, int]] = deque()
+    used = 0
+    for start, end, tokens in _iter_units(text, max_tokens, count):
+        if units and used + tokens > max_tokens:
+            window = text[units[0][0] : units[-1][1]].strip()
+            if window:
+                yield window
+            # Carry the tail over, leaving room for at least this unit
+            carried: deque[tuple[int, int, int]] = deque()
+            carried_tokens = 0
+            while len(carried) < len(units) - 1:
+                tail = units[-1 - len(carried)]
+                if carried_tokens + tail[2] > min(overlap_tokens, max_tokens - tokens):
+                    break
+                carried.appendleft(tail)
+                carried_tokens += tail[2]
+            units, used = carried, carried_tokens
+        units.append((start, end, tokens))
+        used += tokens
+
+    if units:
+        window = text[units[0][0] : units[-1][1]].strip()
+        if window:
+            yield window
+
+
+def _iter_units(
+    text: str, max_tokens: int, count: Callable[[str], int]
+) -> Iterator[tuple[int, int, int]]:
+    """Yield (start, end, tokens) for each sentence, or word if it won't fit."""
+    for sentence in _SENTENCE_PATTERN.finditer(text):
+        tokens = count(sentence.group())
+        if tokens <= max_tokens:
+            yield sentence.start(), sentence.end(), tokens
+            continue
+        for word in _WORD_PATTERN.finditer(text, sentence.start(), sentence.end()):
+            yield word.start(), word.end(), count(word.group())
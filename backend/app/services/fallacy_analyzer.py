@@ -1,16 +1,27 @@
+import asyncio
 import json
 import logging
+from collections import Counter
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.config import settings
-from app.models import FallacyAnalysisResult
+from app.models import Fallacy, FallacyAnalysisResult, FallacySummary
+from app.services.alignment import QuoteMatch, align_quotes, mark_quote, normalize
+from app.services.chunking import count_tokens, iter_windows
+from app.services.jobs import ProgressCallback, ignore_progress
+from app.services.llm import cache_key, chat_completion, llm_cache
+from app.services.scheduler import Priority
 
 logger = logging.getLogger(__name__)
 
 _MODEL = "gpt-4o-mini"
 _TIMEOUT = 30
 
+# Number of most frequent fallacy names listed as primary tactics when
+# window results are merged.
+_PRIMARY_TACTICS = 3
+
 _FALLACY_SYSTEM_PROMPT = (
     "You are an expert in logic, rhetoric, and critical thinking. "
     "Analyze the following transcript for logical fallacies.\n\n"
@@ -54,25 +65,136 @@ _FALLACY_SYSTEM_PROMPT = (
 )
 
 
-def analyze_fallacies(transcript_text: str) -> FallacyAnalysisResult | None:
+async def analyze_fallacies(
+    transcript_text: str,
+    *,
+    client: AsyncOpenAI | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> FallacyAnalysisResult | None:
     """Analyze a transcript for logical fallacies using OpenAI.
 
+    Transcripts longer than ``settings.fallacy_chunk_tokens`` are analyzed
+    in overlapping windows, in parallel, and the results merged, so no
+    single request grows with the video.
+
+    Uses the shared ``client`` when given, otherwise a one-off client.
     Returns FallacyAnalysisResult on success, None on any failure.
     """
+    report = on_progress or ignore_progress
+    if client is None:
+        client = AsyncOpenAI(api_key=settings.openai_api_key)
+
+    # Tokenizing a multi-hour transcript is CPU-bound; keep it off the event loop
+    windows = await asyncio.to_thread(
+        list,
+        iter_windows(
+            transcript_text,
+            settings.fallacy_chunk_tokens,
+            settings.fallacy_chunk_overlap_tokens,
+            count_tokens,
+        ),
+    )
+    if len(windows) <= 1:
+        report("analyze", 0, 1)
+        result = await _analyze_window(client, transcript_text)
+        report("analyze", 1, 1)
+        return result
+
+    semaphore = asyncio.Semaphore(max(1, settings.fallacy_max_concurrency))
+    done = 0
+
+    async def analyze(window: str) -> FallacyAnalysisResult | None:
+        nonlocal done
+        async with semaphore:
+            result = await _analyze_window(client, window)
+        done += 1
+        report("analyze", done, len(windows))
+        return result
+
+    report("analyze", 0, len(windows))
+    results = await asyncio.gather(*(analyze(w) for w in windows))
+    if any(r is None for r in results):
+        # A partial analysis would silently miss fallacies; windows that
+        # succeeded are cached, so a retry only repeats the failed ones
+        return None
+    # Aligning quotes across a long transcript is CPU-bound too
+    return await asyncio.to_thread(
+        merge_results, transcript_text, [r for r in results if r is not None]
+    )
+
+
+def merge_results(
+    transcript_text: str, results: list[FallacyAnalysisResult]
+) -> FallacyAnalysisResult:
+    """Merge window results into one analysis of the whole transcript.
+
+    Windows overlap, so a fallacy near a boundary can be reported twice,
+    quoted slightly differently. Fallacies with the same name whose quotes
+    overlap in the transcript (or normalize to the same text, when they
+    cannot be found) are kept once. The summary is recounted from the
+    merged fallacies. Kept fallacies are marked with where their quote
+    was found, so align_fallacies does not search for them again.
+    """
+    fallacies = [f for r in results for f in r.fallacies]
+    spans = align_quotes(transcript_text, [f.quote for f in fallacies])
+    kept: list[tuple[Fallacy, QuoteMatch | None]] = []
+    for fallacy, span in zip(fallacies, spans, strict=True):
+        if not any(
+            _same_fallacy(fallacy, span, other, other_span)
+            for other, other_span in kept
+        ):
+            kept.append((fallacy, span))
+    for fallacy, span in kept:
+        mark_quote(fallacy, span)
+    return _with_summary([f for f, _ in kept])
+
+
+def _same_fallacy(
+    a: Fallacy, a_span: QuoteMatch | None, b: Fallacy, b_span: QuoteMatch | None
+) -> bool:
+    if a.fallacy_name.casefold() != b.fallacy_name.casefold():
+        return False
+    if a_span is not None and b_span is not None:
+        return a_span.start < b_span.end and b_span.start < a_span.end
+    return normalize(a.quote) == normalize(b.quote)
+
+
+def _with_summary(fallacies: list[Fallacy]) -> FallacyAnalysisResult:
+    severities = Counter(f.severity.casefold() for f in fallacies)
+    names = Counter(f.fallacy_name for f in fallacies)
+    return FallacyAnalysisResult(
+        summary=FallacySummary(
+            total_fallacies=len(fallacies),
+            high_severity=severities["high"],
+            medium_severity=severities["medium"],
+            low_severity=severities["low"],
+            primary_tactics=[name for name, _ in names.most_common(_PRIMARY_TACTICS)],
+        ),
+        fallacies=fallacies,
+    )
+
+
+async def _analyze_window(
+    client: AsyncOpenAI, text: str
+) -> FallacyAnalysisResult | None:
+    messages = [
+        {"role": "system", "content": _FALLACY_SYSTEM_PROMPT},
+        {"role": "user", "content": text},
+    ]
+    response_format = {"type": "json_object"}
     try:
-        client = OpenAI(api_key=settings.openai_api_key)
-        response = client.chat.completions.create(
+        result = await chat_completion(
+            client,
             model=_MODEL,
-            messages=[
-                {"role": "system", "content": _FALLACY_SYSTEM_PROMPT},
-                {"role": "user", "content": transcript_text},
-            ],
-            response_format={"type": "json_object"},
+            messages=messages,
+            response_format=response_format,
             timeout=_TIMEOUT,
+            priority=Priority.BACKGROUND,
         )
-        raw = response.choices[0].message.content or ""
-        data = json.loads(raw)
+        data = json.loads(result.content)
         return FallacyAnalysisResult(**data)
     except Exception:
+        # Don't keep serving a response that could not be parsed
+        await llm_cache.discard(cache_key(_MODEL, messages, response_format))
         logger.warning("Fallacy analysis failed", exc_info=True)
         return None
@@ -0,0 +1,247 @@
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+import uuid
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+import asyncpg  # type: ignore[import-untyped]
+from pydantic import BaseModel
+
+from app.config import settings
+from app.db import (
+    claim_job,
+    complete_job,
+    fail_expired_jobs,
+    fail_job,
+    heartbeat_job,
+    insert_job,
+    purge_finished_jobs,
+)
+from app.models import ErrorResponse, Job, JobProgress, JobStage
+from app.services.singleflight import current_task_cancelling
+
+logger = logging.getLogger(__name__)
+
+# Reports the running stage and how much of it is done, e.g. ("chunks", 3, 8)
+ProgressCallback = Callable[[JobStage, int, int], None]
+
+
+def ignore_progress(stage: JobStage, current: int, total: int) -> None:
+    """A ProgressCallback for callers that don't track progress."""
+
+
+JobHandler = Callable[
+    [dict[str, Any], ProgressCallback], Coroutine[Any, Any, BaseModel]
+]
+
+_INTERNAL_ERROR = ErrorResponse(
+    error="internal_error",
+    message="An unexpected error occurred. Please try again.",
+)
+
+_LEASE_EXPIRED = ErrorResponse(
+    error="lease_expired",
+    message="The job stopped responding and ran out of attempts.",
+)
+
+
+class JobFailedError(Exception):
+    """Raised by a job to fail with an error the client should see.
+
+    Retryable failures are queued again with backoff while attempts remain.
+    """
+
+    def __init__(self, error: ErrorResponse, *, retryable: bool = False) -> None:
+        super().__init__(error.message)
+        self.error = error
+        self.retryable = retryable
+
+
+class JobQueue:
+    """Run jobs from the Postgres jobs table on a pool of worker tasks.
+
+    Every replica runs its own workers against the same table. A worker
+    claims one job at a time under a lease it renews while the job runs;
+    if the replica dies, the lease expires and another worker picks the job
+    up. Failed attempts are retried with exponential backoff.
+    """
+
+    def __init__(self) -> None:
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pool: asyncpg.Pool | None = None
+        self._handlers: dict[str, JobHandler] = {}
+        self._workers: list[asyncio.Task[None]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._last_sweep = 0.0
+
+    async def start(
+        self, pool: asyncpg.Pool, handlers: dict[str, JobHandler], workers: int
+    ) -> None:
+        self._pool = pool
+        self._handlers = handlers
+        self._wakeup = asyncio.Event()
+        try:
+            async with pool.acquire() as conn:
+                await purge_finished_jobs(conn, settings.job_retention_seconds)
+        except Exception:
+            logger.warning("Failed to purge finished jobs")
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(max(1, workers))
+        ]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._pool = None
+
+    async def submit(
+        self, conn: asyncpg.Connection, kind: str, payload: dict[str, Any]
+    ) -> Job:
+        """Queue a job and return it, still queued."""
+        job = await insert_job(
+            conn, uuid.uuid4().hex, kind, payload, settings.job_max_attempts
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()  # local workers need not wait for the next poll
+        return job
+
+    async def _work(self) -> None:
+        assert self._pool is not None and self._wakeup is not None
+        while True:
+            try:
+                async with self._pool.acquire() as conn:
+                    job = await claim_job(
+                        conn, self.worker_id, settings.job_lease_seconds
+                    )
+            except Exception:
+                logger.warning("Failed to claim a job")
+                job = None
+            if job is not None:
+                await self._run(job)
+                continue
+            await self._sweep_expired()
+            self._wakeup.clear()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), settings.job_poll_seconds)
+
+    async def _run(self, job: Job) -> None:
+        progress_changed = asyncio.Event()
+
+        def report(stage: JobStage, current: int, total: int) -> None:
+            job.progress = JobProgress(stage=stage, current=current, total=total)
+            progress_changed.set()
+
+        handler = self._handlers.get(job.kind)
+        if handler is None:
+            logger.error("No handler for job kind %s", job.kind)
+            await self._finish(job, error=_INTERNAL_ERROR)
+            return
+
+        work = asyncio.create_task(handler(job.payload, report))
+        heartbeat = asyncio.create_task(self._heartbeat(job, work, progress_changed))
+        try:
+            result = await work
+        except JobFailedError as e:
+            await self._finish(job, error=e.error, retry=e.retryable)
+        except asyncio.CancelledError:
+            if work.cancelled() and not current_task_cancelling():
+                return  # the lease was lost; its new owner runs the job
+            raise
+        except Exception:
+            logger.exception("Job %s failed", job.job_id)
+            await self._finish(job, error=_INTERNAL_ERROR, retry=True)
+        else:
+            await self._finish(job, result=result)
+        finally:
+            work.cancel()
+            heartbeat.cancel()
+
+    async def _heartbeat(
+        self, job: Job, work: asyncio.Task[Any], progress_changed: asyncio.Event
+    ) -> None:
+        """Renew the lease every third of its length, and on progress.
+
+        Waiting for a pooled connection is bounded by the same third, so a
+        pool exhausted by request traffic costs one missed renewal, not the
+        lease: the next attempt still lands before it expires.
+        """
+        assert self._pool is not None
+        interval = settings.job_lease_seconds / 3
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(progress_changed.wait(), interval)
+            progress_changed.clear()
+            try:
+                async with self._pool.acquire(timeout=interval) as conn:
+                    owned = await heartbeat_job(
+                        conn,
+                        job.job_id,
+                        self.worker_id,
+                        settings.job_lease_seconds,
+                        job.progress.model_dump() if job.progress else None,
+                    )
+            except Exception:
+                logger.warning("Failed to renew the lease on job %s", job.job_id)
+                continue
+            if not owned:
+                logger.warning("Lost the lease on job %s", job.job_id)
+                work.cancel()
+                return
+
+    async def _finish(
+        self,
+        job: Job,
+        *,
+        result: BaseModel | None = None,
+        error: ErrorResponse | None = None,
+        retry: bool = False,
+    ) -> None:
+        assert self._pool is not None
+        progress = job.progress.model_dump() if job.progress else None
+        try:
+            async with self._pool.acquire() as conn:
+                if error is None:
+                    assert result is not None
+                    await complete_job(
+                        conn,
+                        job.job_id,
+                        self.worker_id,
+                        result.model_dump(mode="json"),
+                        progress,
+                    )
+                else:
+                    await fail_job(
+                        conn,
+                        job.job_id,
+                        self.worker_id,
+                        error.model_dump(),
+                        progress,
+                        retry_delay=retry_delay(job.attempts) if retry else None,
+                    )
+        except Exception:
+            # The lease will expire and the job will run again
+            logger.warning("Failed to record the outcome of job %s", job.job_id)
+
+    async def _sweep_expired(self) -> None:
+        """Fail jobs abandoned on their last attempt, at most once per lease."""
+        now = time.monotonic()
+        if now - self._last_sweep < settings.job_lease_seconds:
+            return
+        self._last_sweep = now
+        assert self._pool is not None
+        try:
+            async with self._pool.acquire() as conn:
+                await fail_expired_jobs(conn, _LEASE_EXPIRED.model_dump())
+        except Exception:
+            logger.warning("Failed to sweep expired jobs")
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt, doubling with each one made."""
+    return settings.job_retry_backoff_seconds * 2.0 ** max(attempts - 1, 0)
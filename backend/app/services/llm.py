@@ -0,0 +1,308 @@
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from typing import Any
+
+import asyncpg  # type: ignore[import-untyped]
+import httpx
+from fastapi import Request
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.config import settings
+from app.db import (
+    delete_llm_cache_entry,
+    get_llm_cache_entry,
+    purge_llm_cache,
+    save_llm_cache_entry,
+)
+from app.services.scheduler import Priority, estimate_tokens, llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OpenAIResult:
+    content: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+def create_openai_client() -> AsyncOpenAI:
+    """Create the process-wide OpenAI client.
+
+    Its HTTP pool keeps connections alive between calls, so requests after
+    the first skip the TCP and TLS handshakes. Created once in the app
+    lifespan and handed to the services through get_openai_client.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.openai_max_connections,
+        max_keepalive_connections=settings.openai_max_keepalive_connections,
+        keepalive_expiry=settings.openai_keepalive_expiry,
+    )
+    return AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        http_client=DefaultAsyncHttpxClient(limits=limits),
+    )
+
+
+def get_openai_client(request: Request) -> AsyncOpenAI:
+    client: AsyncOpenAI = request.app.state.openai_client
+    return client
+
+
+def cache_key(
+    model: str,
+    messages: list[dict[str, Any]],
+    response_format: dict[str, Any] | None = None,
+) -> str:
+    """Content-address a chat completion request."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "response_format": response_format},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """Two-tier cache of chat completion results keyed by request content.
+
+    The first tier is an in-process LRU bounded by the total size of cached
+    content. The optional second tier is a Postgres table with a TTL, shared
+    by every worker; it is enabled by attaching a connection pool.
+
+    Callers often hold a connection from the same pool for a whole
+    generation, so the second tier waits at most
+    ``settings.llm_cache_acquire_timeout`` for one of its own: on a busy
+    pool a lookup is a miss and a write or delete is skipped, instead of
+    every in-flight completion waiting on every other.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: int) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, OpenAIResult] = OrderedDict()
+        self._bytes = 0
+        self._pool: asyncpg.Pool | None = None
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    async def attach_pool(self, pool: asyncpg.Pool) -> None:
+        """Enable the Postgres tier and drop entries past their TTL."""
+        self._pool = pool
+        async with pool.acquire() as conn:
+            await purge_llm_cache(conn, self.ttl_seconds)
+
+    def detach_pool(self) -> None:
+        self._pool = None
+
+    async def get(self, key: str) -> OpenAIResult | None:
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return result
+
+        if self._pool is not None:
+            try:
+                async with self._connection() as conn:
+                    row = await get_llm_cache_entry(conn, key, self.ttl_seconds)
+            except Exception:
+                logger.warning("LLM cache lookup failed", exc_info=True)
+                row = None
+            if row is not None:
+                result = OpenAIResult(**row)
+                self._store(key, result)
+                self.db_hits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, result: OpenAIResult) -> None:
+        self._store(key, result)
+        if self._pool is not None:
+            try:
+                async with self._connection() as conn:
+                    await save_llm_cache_entry(
+                        conn,
+                        key,
+                        result.content,
+                        result.prompt_tokens,
+                        result.completion_tokens,
+                    )
+            except Exception:
+                logger.warning("LLM cache write failed", exc_info=True)
+
+    async def discard(self, key: str) -> None:
+        """Forget an entry in both tiers, e.g. when its content failed to parse."""
+        self._forget(key)
+        if self._pool is not None:
+            try:
+                async with self._connection() as conn:
+                    await delete_llm_cache_entry(conn, key)
+            except Exception:
+                logger.warning("LLM cache delete failed", exc_info=True)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _connection(self) -> Any:
+        assert self._pool is not None
+        return self._pool.acquire(timeout=settings.llm_cache_acquire_timeout)
+
+    def _forget(self, key: str) -> None:
+        result = self._entries.pop(key, None)
+        if result is not None:
+            self._bytes -= _size(result)
+
+    def _store(self, key: str, result: OpenAIResult) -> None:
+        size = _size(result)
+        if size > self.max_bytes:
+            return
+        self._forget(key)
+        self._entries[key] = result
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= _size(evicted)
+
+
+def _size(result: OpenAIResult) -> int:
+    return len(result.content.encode())
+
+
+llm_cache = LLMCache(
+    max_bytes=settings.llm_cache_max_bytes,
+    ttl_seconds=settings.llm_cache_ttl_seconds,
+)
+
+
+async def chat_completion(
+    client: AsyncOpenAI,
+    *,
+    model: str,
+    messages: list[dict[str, Any]],
+    timeout: float,
+    response_format: dict[str, Any] | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+) -> OpenAIResult:
+    """Make a chat completion call, served from llm_cache when possible.
+
+    Cache misses wait for llm_scheduler to admit them at ``priority``.
+    Cached results keep the token counts of the original call, so usage
+    reported to callers reflects what the answer cost to produce.
+    """
+    key = cache_key(model, messages, response_format)
+    cached = await llm_cache.get(key)
+    if cached is not None:
+        return cached
+
+    kwargs: dict[str, Any] = {}
+    if response_format is not None:
+        kwargs["response_format"] = response_format
+    estimated = estimate_tokens(messages)
+    await llm_scheduler.acquire(estimated, priority)
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,  # type: ignore[arg-type]
+            timeout=timeout,
+            **kwargs,
+        )
+    except BaseException:
+        llm_scheduler.reconcile(estimated, 0)
+        raise
+    usage = response.usage
+    result = OpenAIResult(
+        content=response.choices[0].message.content or "",
+        prompt_tokens=usage.prompt_tokens if usage else 0,
+        completion_tokens=usage.completion_tokens if usage else 0,
+    )
+    llm_scheduler.reconcile(estimated, result.prompt_tokens + result.completion_tokens)
+    await llm_cache.set(key, result)
+    return result
+
+
+async def stream_completion(
+    client: AsyncOpenAI,
+    *,
+    model: str,
+    messages: list[dict[str, Any]],
+    timeout: float,
+    priority: Priority = Priority.INTERACTIVE,
+) -> AsyncGenerator[str | OpenAIResult, None]:
+    """Stream a chat completion, served from llm_cache when possible.
+
+    The streaming counterpart to chat_completion. If the consumer stops
+    early (e.g. the client disconnected), the upstream stream is closed so
+    the model stops generating, and nothing is cached.
+
+    Yields:
+        Text deltas as they arrive, then one OpenAIResult with the full
+        content and its token counts. A cached result is yielded as a
+        single delta.
+    """
+    key = cache_key(model, messages)
+    cached = await llm_cache.get(key)
+    if cached is not None:
+        yield cached.content
+        yield cached
+        return
+
+    estimated = estimate_tokens(messages)
+    await llm_scheduler.acquire(estimated, priority)
+    try:
+        stream = await client.chat.completions.create(  # type: ignore[call-overload]
+            model=model,
+            messages=messages,
+            timeout=timeout,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+    except BaseException:
+        llm_scheduler.reconcile(estimated, 0)
+        raise
+    parts: list[str] = []
+    prompt_tokens = 0
+    completion_tokens = 0
+    completed = False
+    try:
+        async for chunk in stream:
+            if chunk.usage:
+                prompt_tokens += chunk.usage.prompt_tokens
+                completion_tokens += chunk.usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                delta = chunk.choices[0].delta.content
+                parts.append(delta)
+                yield delta
+        completed = True
+    finally:
+        if not completed:
+            # Closing the response tells the API to stop generating
+            await stream.close()
+            llm_scheduler.reconcile(estimated, 0)
+
+    # Only a stream that ran to completion is cached
+    llm_scheduler.reconcile(estimated, prompt_tokens + completion_tokens)
+    result = OpenAIResult("".join(parts), prompt_tokens, completion_tokens)
+    await llm_cache.set(key, result)
+    yield result
@@ -1,28 +1,257 @@
+import hashlib
+import json
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any
+
 from openai import AsyncOpenAI
 
 from app.config import settings
+from app.services.chunking import count_tokens, iter_chunks
+from app.services.llm import OpenAIResult, chat_completion, stream_completion
+from app.services.retrieval import build_index, passage_indexes
+from app.services.scheduler import TOKENS_PER_MESSAGE
 
 _MODEL = "gpt-4o-mini"
 _TIMEOUT = 30
 
 _SYSTEM_PROMPT = (
     "You are a helpful assistant answering questions about a YouTube video transcript. "
-    "Use only the transcript content to answer. Be concise and accurate.\n\n"
-    "Transcript:\n{transcript}"
+    "Use only the transcript excerpts below to answer. Be concise and accurate. "
+    "If the excerpts do not cover the question, say so.\n\n"
+    "Transcript excerpts:\n{transcript}"
+)
+
+_PASSAGE_SEPARATOR = "\n\n[...]\n\n"
+
+_HISTORY_SUMMARY_PROMPT = "\n\nSummary of the earlier conversation:\n{summary}"
+
+_COMPACT_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation about a YouTube video. "
+    "Merge the new turns into the existing summary. Keep the questions asked, "
+    "the facts given in answers and anything the user said about themselves "
+    "or their goals. Drop pleasantries. Reply with the updated summary only, "
+    "in at most 150 words."
 )
 
 
-async def ask_question(transcript: str, question: str, history: list[dict]) -> str:
-    messages: list[dict] = [
-        {"role": "system", "content": _SYSTEM_PROMPT.format(transcript=transcript)}
+class QuestionTooLongError(ValueError):
+    """Raised when the question alone exceeds the prompt token budget."""
+
+
+@dataclass
+class HistorySummary:
+    """Running summary of the oldest ``covers`` messages of a Q&A history.
+
+    ``digest`` is history_digest of those messages, so a summary stored
+    for one conversation is never applied to another about the same video.
+    """
+
+    text: str
+    covers: int
+    digest: str
+
+
+def history_digest(messages: list[dict[str, Any]]) -> str:
+    """Fingerprint of a run of Q&A messages, by role and content."""
+    pairs = [[m["role"], m["content"]] for m in messages]
+    return hashlib.sha256(json.dumps(pairs).encode()).hexdigest()
+
+
+async def compact_history(
+    history: list[dict[str, Any]],
+    summary: HistorySummary | None,
+    *,
+    client: AsyncOpenAI | None = None,
+) -> tuple[list[dict[str, Any]], HistorySummary | None]:
+    """Keep the last ``settings.qa_history_turns`` turns verbatim.
+
+    Older messages are folded into the running summary, a few at a time:
+    only messages the summary does not cover yet are sent to the model.
+    A summary of messages this history does not start with (e.g. from a
+    chat in a different browser tab) is ignored and rebuilt.
+
+    Returns:
+        The verbatim recent messages and the summary of everything before.
+    """
+    keep = 2 * max(settings.qa_history_turns, 0)
+    split = max(len(history) - keep, 0)
+    if summary is not None and (
+        summary.covers > len(history)
+        or summary.digest != history_digest(history[: summary.covers])
+    ):
+        summary = None
+    if summary is not None and summary.covers >= split:
+        # Already summarized up to here; never send a message twice
+        return history[summary.covers :], summary
+    if split == 0:
+        return history, None
+
+    covered = summary.covers if summary else 0
+    new_turns = "\n".join(
+        f"{m['role']}: {m['content']}" for m in history[covered:split]
+    )
+    messages = [
+        {"role": "system", "content": _COMPACT_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                f"Existing summary:\n{summary.text if summary else '(none)'}\n\n"
+                f"New turns:\n{new_turns}"
+            ),
+        },
     ]
-    messages.extend(history)
-    messages.append({"role": "user", "content": question})
-
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
-    response = await client.chat.completions.create(
-        model=_MODEL,
-        messages=messages,  # type: ignore[arg-type]
-        timeout=_TIMEOUT,
+    if client is None:
+        client = AsyncOpenAI(api_key=settings.openai_api_key)
+    result = await chat_completion(
+        client, model=_MODEL, messages=messages, timeout=_TIMEOUT
+    )
+    summary = HistorySummary(
+        text=result.content, covers=split, digest=history_digest(history[:split])
+    )
+    return history[split:], summary
+
+
+async def ask_question(
+    transcript: str,
+    question: str,
+    history: list[dict[str, Any]],
+    *,
+    video_id: str | None = None,
+    history_summary: str | None = None,
+    client: AsyncOpenAI | None = None,
+) -> str:
+    """Answer a question from the transcript passages most relevant to it.
+
+    Only the top ``settings.qa_top_k`` passages are sent, so the prompt
+    stays the same size however long the video is. The passage index is
+    cached per ``video_id`` across the turns of a chat.
+
+    ``history`` should already be compacted by compact_history, with the
+    summary of older turns passed as ``history_summary``. If the prompt
+    still exceeds ``settings.qa_prompt_token_budget``, the oldest turns and
+    then the weakest passages are left out; as a last resort the summary
+    and the one passage left are cut short.
+
+    Raises:
+        QuestionTooLongError: If the question alone exceeds the budget.
+    """
+    messages = await _build_messages(
+        transcript, question, history, video_id, history_summary
     )
-    return response.choices[0].message.content or ""
+    if client is None:
+        client = AsyncOpenAI(api_key=settings.openai_api_key)
+    result = await chat_completion(
+        client, model=_MODEL, messages=messages, timeout=_TIMEOUT
+    )
+    return result.content
+
+
+async def stream_answer(
+    transcript: str,
+    question: str,
+    history: list[dict[str, Any]],
+    *,
+    video_id: str | None = None,
+    history_summary: str | None = None,
+    client: AsyncOpenAI | None = None,
+) -> AsyncIterator[str | OpenAIResult]:
+    """Stream the answer ask_question would give.
+
+    If the consumer stops early (e.g. the client disconnected), the
+    upstream stream is closed so the model stops generating.
+
+    Yields:
+        Text deltas as they arrive, then one OpenAIResult with the full
+        answer and its token counts.
+    """
+    messages = await _build_messages(
+        transcript, question, history, video_id, history_summary
+    )
+    if client is None:
+        client = AsyncOpenAI(api_key=settings.openai_api_key)
+    async with aclosing(
+        stream_completion(client, model=_MODEL, messages=messages, timeout=_TIMEOUT)
+    ) as stream:
+        async for item in stream:
+            yield item
+
+
+async def _build_messages(
+    transcript: str,
+    question: str,
+    history: list[dict[str, Any]],
+    video_id: str | None,
+    history_summary: str | None,
+) -> list[dict[str, Any]]:
+    if video_id:
+        index = await passage_indexes.get(video_id, transcript)
+    else:
+        index = await build_index(transcript)
+    # Follow-ups ("what did they say next?") lean on the previous question
+    previous = next(
+        (m["content"] for m in reversed(history) if m.get("role") == "user"), ""
+    )
+    query = f"{question} {previous}"
+
+    # Shrink to the budget: oldest turns go first, then the weakest passages
+    budget = settings.qa_prompt_token_budget
+    top_k = settings.qa_top_k
+    while True:
+        passages = index.search(query, top_k)
+        messages = _assemble(passages, history_summary, history, question)
+        if _prompt_tokens(messages) <= budget:
+            return messages
+        if history:
+            history = history[2:]
+        elif top_k > 1:
+            top_k -= 1
+        else:
+            break
+
+    # Last resort: cut the summary, then the one passage left, to fit
+    room = budget - _prompt_tokens(_assemble([], None, [], question))
+    if room < 0:
+        raise QuestionTooLongError(
+            f"The question exceeds the prompt budget of {budget} tokens"
+        )
+    passage = passages[0] if passages else ""
+    summary_header = count_tokens(_HISTORY_SUMMARY_PROMPT.format(summary=""))
+    while True:
+        kept = _truncate(passage, room)
+        summary_room = room - count_tokens(kept) - summary_header
+        summary = _truncate(history_summary or "", summary_room) or None
+        messages = _assemble([kept], summary, [], question)
+        # Pieces can tokenize differently once joined; shrink by the excess
+        excess = _prompt_tokens(messages) - budget
+        if excess <= 0:
+            return messages
+        room -= excess
+
+
+def _assemble(
+    passages: list[str],
+    history_summary: str | None,
+    history: list[dict[str, Any]],
+    question: str,
+) -> list[dict[str, Any]]:
+    system = _SYSTEM_PROMPT.format(transcript=_PASSAGE_SEPARATOR.join(passages))
+    if history_summary:
+        system += _HISTORY_SUMMARY_PROMPT.format(summary=history_summary)
+    return [
+        {"role": "system", "content": system},
+        *history,
+        {"role": "user", "content": question},
+    ]
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """The start of ``text`` that fits in ``max_tokens``, cut between words."""
+    if max_tokens <= 0:
+        return ""
+    return next(iter_chunks(text, max_tokens, count_tokens), "")
+
+
+def _prompt_tokens(messages: list[dict[str, Any]]) -> int:
+    return sum(count_tokens(m["content"]) + TOKENS_PER_MESSAGE for m in messages)
@@ -0,0 +1,117 @@
+import asyncio
+import heapq
+import math
+import re
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+
+from app.config import settings
+from app.services.chunking import count_tokens, iter_windows
+
+# Okapi BM25 parameters: term frequency saturation and length normalization.
+_K1 = 1.5
+_B = 0.75
+
+_TERM = re.compile(r"\w+")
+
+
+def _terms(text: str) -> list[str]:
+    return _TERM.findall(text.lower())
+
+
+class PassageIndex:
+    """BM25 index over overlapping passages of one transcript.
+
+    Passages are sentence-aligned windows of at most ``passage_tokens``, so
+    the context built from the top matches has a size bounded by the number
+    of passages asked for, not by the length of the video.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        passage_tokens: int,
+        overlap_tokens: int,
+        count: Callable[[str], int] = count_tokens,
+    ) -> None:
+        self.text = text
+        self.passages = list(iter_windows(text, passage_tokens, overlap_tokens, count))
+        self._frequencies = [Counter(_terms(p)) for p in self.passages]
+        self._lengths = [sum(f.values()) for f in self._frequencies]
+        self._average_length = (
+            sum(self._lengths) / len(self._lengths) if self._lengths else 0
+        )
+        documents: Counter[str] = Counter()
+        for frequencies in self._frequencies:
+            documents.update(frequencies.keys())
+        total = len(self.passages)
+        self._idf = {
+            term: math.log(1 + (total - n + 0.5) / (n + 0.5))
+            for term, n in documents.items()
+        }
+
+    def search(self, query: str, k: int) -> list[str]:
+        """The ``k`` passages that best match ``query``, in transcript order.
+
+        Falls back to the opening passages when no query term occurs in the
+        transcript, e.g. for "what is this about?".
+        """
+        terms = [t for t in set(_terms(query)) if t in self._idf]
+        scores = [self._score(i, terms) for i in range(len(self.passages))]
+        best = heapq.nlargest(k, range(len(scores)), key=scores.__getitem__)
+        chosen = sorted(i for i in best if scores[i] > 0)
+        if not chosen:
+            return self.passages[:k]
+        return [self.passages[i] for i in chosen]
+
+    def _score(self, passage: int, terms: list[str]) -> float:
+        frequencies = self._frequencies[passage]
+        norm = _K1 * (
+            1 - _B + _B * self._lengths[passage] / (self._average_length or 1)
+        )
+        score = 0.0
+        for term in terms:
+            tf = frequencies.get(term, 0)
+            if tf:
+                score += self._idf[term] * tf * (_K1 + 1) / (tf + norm)
+        return score
+
+
+class PassageIndexCache:
+    """LRU of passage indexes keyed by video, so each is built once per chat.
+
+    An index is rebuilt when the transcript it was built from differs from
+    the one asked for.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, PassageIndex] = OrderedDict()
+
+    async def get(self, video_id: str, text: str) -> PassageIndex:
+        index = self._entries.get(video_id)
+        if index is not None and index.text == text:
+            self._entries.move_to_end(video_id)
+            return index
+        index = await build_index(text)
+        self._entries[video_id] = index
+        self._entries.move_to_end(video_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+async def build_index(text: str) -> PassageIndex:
+    """Build a passage index off the event loop; tokenizing is CPU-bound."""
+    return await asyncio.to_thread(
+        PassageIndex,
+        text,
+        settings.qa_passage_tokens,
+        settings.qa_passage_overlap_tokens,
+    )
+
+
+passage_indexes = PassageIndexCache(settings.qa_index_cache_size)
@@ -0,0 +1,146 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Any
+
+from app.config import settings
+
+# Output tokens reserved per call before the real usage is known. The
+# difference is settled with the token bucket once the call returns.
+_COMPLETION_TOKEN_ESTIMATE = 1_000
+
+# Per-message framing tokens added by the chat format, as counted by the API.
+TOKENS_PER_MESSAGE = 4
+
+
+class Priority(IntEnum):
+    """Queue priority of an LLM call; lower values are dispatched first."""
+
+    INTERACTIVE = 0  # summaries and Q&A a user is waiting on
+    BACKGROUND = 1  # fallacy analysis
+
+
+def estimate_tokens(messages: list[dict[str, Any]]) -> int:
+    """Estimate the tokens a chat completion will consume.
+
+    Uses ~4 characters per token for the prompt rather than the tokenizer,
+    so estimating never blocks the event loop on long transcripts.
+    """
+    prompt = sum(len(str(m.get("content") or "")) // 4 for m in messages)
+    return prompt + TOKENS_PER_MESSAGE * len(messages) + _COMPLETION_TOKEN_ESTIMATE
+
+
+class TokenBucket:
+    """A bucket refilled continuously at ``per_minute`` units per minute.
+
+    A limit of zero or less disables the bucket. The level may go negative
+    when actual usage exceeds what was reserved; later callers then wait
+    for the debt to refill.
+    """
+
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(max(per_minute, 0))
+        self.rate = self.capacity / 60
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken; 0 if it can be taken now."""
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.enabled:
+            self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        if self.enabled:
+            self.level = min(self.capacity, self.level + delta)
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class LLMScheduler:
+    """Admit LLM calls under request-per-minute and token-per-minute limits.
+
+    Callers wait in a priority queue and are released one at a time, in
+    priority then arrival order, as both buckets allow. Bursts over the
+    limit are spread out instead of failing with rate-limit errors.
+    """
+
+    def __init__(self, rpm: int, tpm: int) -> None:
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._queue: list[tuple[int, int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def acquire(self, tokens: int, priority: Priority) -> None:
+        """Wait until a call costing ``tokens`` may be sent."""
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), tokens, future))
+        t0 = time.monotonic()
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._dispatch()  # let the next waiter through
+            raise
+        waited = time.monotonic() - t0
+        self.completed += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Settle a call's reserved tokens against its reported usage."""
+        self._tokens.adjust(estimated - actual)
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "queue_depth": sum(not f.done() for *_, f in self._queue),
+            "completed": self.completed,
+            "avg_wait_ms": self.total_wait / self.completed * 1000
+            if self.completed
+            else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self._queue:
+            _, _, tokens, future = self._queue[0]
+            if future.done():  # the waiter was cancelled
+                heapq.heappop(self._queue)
+                continue
+            wait = max(self._requests.delay(1, now), self._tokens.delay(tokens, now))
+            if wait > 0:
+                loop = asyncio.get_running_loop()
+                self._timer = loop.call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            future.set_result(None)
+
+
+llm_scheduler = LLMScheduler(
+    rpm=settings.openai_rpm_limit,
+    tpm=settings.openai_tpm_limit,
+)
@@ -0,0 +1,50 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the work; callers arriving while it is
+    in flight await the same result (or exception). If the first caller is
+    cancelled its work is cancelled too, and a waiting caller takes over.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, asyncio.Task[Any]] = {}
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            flight = self._flights.get(key)
+            if flight is None or flight.done():
+                break
+            try:
+                result: T = await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if flight.cancelled() and not current_task_cancelling():
+                    continue  # the leader went away; retry as leader
+                raise
+            self.shared += 1
+            return result
+
+        leader: asyncio.Task[T] = asyncio.ensure_future(fn())
+        self._flights[key] = leader
+        leader.add_done_callback(lambda done: self._forget(key, done))
+        return await leader
+
+    def _forget(self, key: Hashable, flight: asyncio.Task[Any]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+def current_task_cancelling() -> bool:
+    """Whether the running task itself has been asked to cancel."""
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
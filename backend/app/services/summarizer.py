@@ -1,16 +1,26 @@
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
 from dataclasses import dataclass
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 
 from app.config import settings
+from app.services.chunking import count_tokens, iter_chunks
+from app.services.jobs import ProgressCallback, ignore_progress
+from app.services.llm import OpenAIResult, chat_completion, stream_completion
 
 _MODEL = "gpt-4o-mini"
 _TIMEOUT = 30
 
-# Approximate token limit for a single API call.
+# Token limit for a single API call.
 # GPT-4o-mini supports 128K input tokens; we leave headroom for the system prompt.
-# ~4 chars per token, so 100K tokens ≈ 400K chars.
-_MAX_CHARS_PER_CHUNK = 400_000
+_MAX_TOKENS_PER_CHUNK = 100_000
+
+# Number of partial summaries merged by a single combine call. Larger inputs
+# are reduced level by level, so depth grows with log(chunks) / log(group).
+_COMBINE_GROUP_SIZE = 8
 
 _SYSTEM_PROMPT = (
     "You are a helpful assistant that summarizes YouTube video transcripts. "
@@ -24,12 +34,12 @@ _COMBINE_SYSTEM_PROMPT = (
     "Remove redundancies and present the information clearly."
 )
 
-
-@dataclass
-class OpenAIResult:
-    content: str
-    prompt_tokens: int
-    completion_tokens: int
+_DERIVE_SYSTEM_PROMPT = (
+    "You are a helpful assistant. The following is a summary of a YouTube "
+    "video transcript. Condense it into a shorter summary that keeps the most "
+    "important points. Use well-structured paragraphs. Do not add information "
+    "that is not in the summary."
+)
 
 
 @dataclass
@@ -48,28 +58,154 @@ def _build_length_instruction(transcript_word_count: int, length_percent: int) -
     )
 
 
-def generate_summary(
+def summary_cache_key() -> tuple[str, str]:
+    """Return the (model, prompt_hash) pair that identifies summary output.
+
+    The hash covers every prompt that shapes a summary, so editing a prompt
+    or switching models invalidates previously cached variants.
+    """
+    prompts = (
+        _SYSTEM_PROMPT,
+        _COMBINE_SYSTEM_PROMPT,
+        _DERIVE_SYSTEM_PROMPT,
+        _build_length_instruction(0, 0),
+    )
+    digest = hashlib.sha256("\x00".join(prompts).encode()).hexdigest()
+    return _MODEL, digest[:16]
+
+
+async def generate_summary(
     transcript_text: str,
     *,
     transcript_word_count: int | None = None,
     length_percent: int | None = None,
+    max_concurrency: int | None = None,
+    source_summary: str | None = None,
+    client: AsyncOpenAI | None = None,
+    on_progress: ProgressCallback | None = None,
 ) -> SummaryResult:
     """Generate a summary of a YouTube video transcript using OpenAI.
 
-    For transcripts exceeding the token limit, uses chunked summarization:
-    splits the transcript into chunks, summarizes each, then combines.
+    Uses the async client so the event loop stays free to serve other
+    requests while the completion is in flight.
+
+    For transcripts exceeding the token limit, uses map-reduce summarization:
+    splits the transcript into chunks, summarizes them in parallel, then
+    combines the partial summaries. When there are too many partials for one
+    combine call they are merged in groups, level by level, first.
 
     Args:
         transcript_text: The full transcript text.
         transcript_word_count: Total word count of the transcript.
         length_percent: Target summary length as a percentage of transcript.
+        max_concurrency: Maximum chunk requests in flight at once. Defaults
+            to ``settings.summary_max_concurrency``.
+        source_summary: A longer summary to derive this one from.
+        client: The shared OpenAI client. A one-off client is created when
+            omitted.
+        on_progress: Called as each stage advances: ``("chunks", done, n)``
+            while transcript chunks are summarized (a single chunk when no
+            split is needed), then ``("combine", level, levels)`` while
+            partial summaries are merged.
 
     Returns:
         A SummaryResult with content and aggregated token counts.
     """
-    client = OpenAI(api_key=settings.openai_api_key)
+    if client is None:
+        client = AsyncOpenAI(api_key=settings.openai_api_key)
+    system_prompt, user_content, total_prompt, total_completion = await _reduce(
+        client,
+        transcript_text,
+        transcript_word_count=transcript_word_count,
+        length_percent=length_percent,
+        max_concurrency=max_concurrency,
+        source_summary=source_summary,
+        on_progress=on_progress,
+    )
+    result = await _call_openai(client, system_prompt, user_content)
+    return SummaryResult(
+        content=result.content,
+        total_prompt_tokens=total_prompt + result.prompt_tokens,
+        total_completion_tokens=total_completion + result.completion_tokens,
+    )
+
+
+async def stream_summary(
+    transcript_text: str,
+    *,
+    transcript_word_count: int | None = None,
+    length_percent: int | None = None,
+    max_concurrency: int | None = None,
+    source_summary: str | None = None,
+    client: AsyncOpenAI | None = None,
+) -> AsyncIterator[str | SummaryResult]:
+    """Stream a summary of a YouTube video transcript using OpenAI.
+
+    Runs the same pipeline as generate_summary, but streams the final
+    completion. For chunked transcripts only the combine step is streamed;
+    the map and reduce levels complete first.
+
+    Yields:
+        Text deltas as they arrive, then one SummaryResult with the full
+        content and aggregated token counts.
+    """
+    if client is None:
+        client = AsyncOpenAI(api_key=settings.openai_api_key)
+    system_prompt, user_content, total_prompt, total_completion = await _reduce(
+        client,
+        transcript_text,
+        transcript_word_count=transcript_word_count,
+        length_percent=length_percent,
+        max_concurrency=max_concurrency,
+        source_summary=source_summary,
+    )
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content},
+    ]
+    async with aclosing(
+        stream_completion(client, model=_MODEL, messages=messages, timeout=_TIMEOUT)
+    ) as stream:
+        async for item in stream:
+            if isinstance(item, OpenAIResult):
+                yield SummaryResult(
+                    content=item.content,
+                    total_prompt_tokens=total_prompt + item.prompt_tokens,
+                    total_completion_tokens=total_completion + item.completion_tokens,
+                )
+            else:
+                yield item
+
+
+async def _reduce(
+    client: AsyncOpenAI,
+    transcript_text: str,
+    *,
+    transcript_word_count: int | None,
+    length_percent: int | None,
+    max_concurrency: int | None,
+    source_summary: str | None,
+    on_progress: ProgressCallback | None = None,
+) -> tuple[str, str, int, int]:
+    """Run every step before the final completion.
+
+    Returns:
+        The final call's system prompt and user content, plus the prompt and
+        completion tokens spent on map and reduce calls so far.
+    """
     total_prompt = 0
     total_completion = 0
+    report = on_progress or ignore_progress
+
+    # Re-length path: condense an existing longer summary
+    if source_summary is not None:
+        derive_prompt = _DERIVE_SYSTEM_PROMPT
+        if transcript_word_count is not None and length_percent is not None:
+            derive_prompt += _build_length_instruction(
+                transcript_word_count, length_percent
+            )
+        report("chunks", 0, 1)
+        return derive_prompt, source_summary, 0, 0
 
     # Build system prompt with optional length guidance
     system_prompt = _SYSTEM_PROMPT
@@ -78,22 +214,41 @@ def generate_summary(
             transcript_word_count, length_percent
         )
 
-    if len(transcript_text) <= _MAX_CHARS_PER_CHUNK:
-        result = _call_openai(client, system_prompt, transcript_text)
-        return SummaryResult(
-            content=result.content,
-            total_prompt_tokens=result.prompt_tokens,
-            total_completion_tokens=result.completion_tokens,
-        )
+    # Tokenizing a multi-hour transcript is CPU-bound; keep it off the event loop
+    transcript_tokens = await asyncio.to_thread(count_tokens, transcript_text)
+    if transcript_tokens <= _MAX_TOKENS_PER_CHUNK:
+        report("chunks", 0, 1)
+        return system_prompt, transcript_text, 0, 0
+
+    # Map step: summarize chunks of long transcripts in parallel
+    chunks = await asyncio.to_thread(
+        list, iter_chunks(transcript_text, _MAX_TOKENS_PER_CHUNK, count_tokens)
+    )
+    if max_concurrency is None:
+        max_concurrency = settings.summary_max_concurrency
+    report("chunks", 0, len(chunks))
+    chunk_results = await _map_calls(
+        client,
+        system_prompt,
+        chunks,
+        max_concurrency,
+        on_done=lambda done: report("chunks", done, len(chunks)),
+    )
+    partials = [r.content for r in chunk_results]
+    total_prompt += sum(r.prompt_tokens for r in chunk_results)
+    total_completion += sum(r.completion_tokens for r in chunk_results)
 
-    # Chunked summarization for long transcripts
-    chunks = _split_into_chunks(transcript_text, _MAX_CHARS_PER_CHUNK)
-    chunk_contents = []
-    for chunk in chunks:
-        result = _call_openai(client, system_prompt, chunk)
-        chunk_contents.append(result.content)
-        total_prompt += result.prompt_tokens
-        total_completion += result.completion_tokens
+    # Tree-reduce step: merge partials in groups until one combine call fits
+    levels = _combine_levels(len(partials))
+    level = 0
+    while len(partials) > _COMBINE_GROUP_SIZE:
+        report("combine", level, levels)
+        level += 1
+        level_results = await _reduce_level(client, partials, max_concurrency)
+        partials = [r.content for r in level_results]
+        total_prompt += sum(r.prompt_tokens for r in level_results)
+        total_completion += sum(r.completion_tokens for r in level_results)
+    report("combine", level, levels)
 
     # Build combine prompt with optional length guidance
     combine_prompt = _COMBINE_SYSTEM_PROMPT
@@ -102,21 +257,69 @@ def generate_summary(
             transcript_word_count, length_percent
         )
 
-    combined = "\n\n".join(chunk_contents)
-    result = _call_openai(client, combine_prompt, combined)
-    total_prompt += result.prompt_tokens
-    total_completion += result.completion_tokens
+    return combine_prompt, "\n\n".join(partials), total_prompt, total_completion
 
-    return SummaryResult(
-        content=result.content,
-        total_prompt_tokens=total_prompt,
-        total_completion_tokens=total_completion,
+
+async def _map_calls(
+    client: AsyncOpenAI,
+    system_prompt: str,
+    contents: list[str],
+    max_concurrency: int,
+    on_done: Callable[[int], None] | None = None,
+) -> list[OpenAIResult]:
+    """Run one call per content concurrently, at most ``max_concurrency`` at once.
+
+    Results are returned in input order regardless of completion order.
+    ``on_done`` is called with the number of finished calls after each one.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    done = 0
+
+    async def call(content: str) -> OpenAIResult:
+        nonlocal done
+        async with semaphore:
+            result = await _call_openai(client, system_prompt, content)
+        done += 1
+        if on_done is not None:
+            on_done(done)
+        return result
+
+    return list(await asyncio.gather(*(call(c) for c in contents)))
+
+
+def _combine_levels(partials: int) -> int:
+    """Number of combine rounds needed for ``partials``, final call included."""
+    levels = 1
+    while partials > _COMBINE_GROUP_SIZE:
+        partials = -(-partials // _COMBINE_GROUP_SIZE)
+        levels += 1
+    return levels
+
+
+async def _reduce_level(
+    client: AsyncOpenAI, partials: list[str], max_concurrency: int
+) -> list[OpenAIResult]:
+    """Combine one level of partial summaries in groups of ``_COMBINE_GROUP_SIZE``.
+
+    A trailing group with a single partial is carried up unchanged.
+    """
+    groups = [
+        partials[i : i + _COMBINE_GROUP_SIZE]
+        for i in range(0, len(partials), _COMBINE_GROUP_SIZE)
+    ]
+    to_combine = ["\n\n".join(g) for g in groups if len(g) > 1]
+    combined = iter(
+        await _map_calls(client, _COMBINE_SYSTEM_PROMPT, to_combine, max_concurrency)
     )
+    return [next(combined) if len(g) > 1 else OpenAIResult(g[0], 0, 0) for g in groups]
 
 
-def _call_openai(client: OpenAI, system_prompt: str, user_content: str) -> OpenAIResult:
-    """Make a single OpenAI chat completion call."""
-    response = client.chat.completions.create(
+async def _call_openai(
+    client: AsyncOpenAI, system_prompt: str, user_content: str
+) -> OpenAIResult:
+    """Make a single OpenAI chat completion call, via the shared LLM cache."""
+    return await chat_completion(
+        client,
         model=_MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
@@ -124,31 +327,3 @@ def _call_openai(client: OpenAI, system_prompt: str, user_content: str) -> OpenA
         ],
         timeout=_TIMEOUT,
     )
-    usage = response.usage
-    return OpenAIResult(
-        content=response.choices[0].message.content or "",
-        prompt_tokens=usage.prompt_tokens if usage else 0,
-        completion_tokens=usage.completion_tokens if usage else 0,
-    )
-
-
-def _split_into_chunks(text: str, max_chars: int) -> list[str]:
-    """Split text into chunks at word boundaries."""
-    chunks = []
-    words = text.split()
-    current_chunk: list[str] = []
-    current_length = 0
-
-    for word in words:
-        word_len = len(word) + 1  # +1 for the space
-        if current_length + word_len > max_chars and current_chunk:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = []
-            current_length = 0
-        current_chunk.append(word)
-        current_length += word_len
-
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-
-    return chunks
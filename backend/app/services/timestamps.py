@@ -0,0 +1,40 @@
+from bisect import bisect_right
+
+from app.services.transcript import Transcript
+
+
+class TimestampIndex:
+    """Map character offsets in a transcript's text to video time.
+
+    Built once from the transcript's columnar segment timing: the segment
+    start offsets are already sorted, so each lookup is a binary search.
+    """
+
+    def __init__(self, transcript: Transcript) -> None:
+        self._offsets = transcript.offsets
+        self._starts = transcript.starts
+        self._length = len(transcript.text)
+
+    @property
+    def timed(self) -> bool:
+        """False for transcripts stored without segment timing."""
+        return bool(self._offsets)
+
+    def seconds_at(self, offset: int) -> float | None:
+        """Start time of the segment containing ``offset``.
+
+        Returns None if the offset is outside the text or there is no timing.
+        """
+        if not self.timed or not 0 <= offset <= self._length:
+            return None
+        segment = bisect_right(self._offsets, offset) - 1
+        return self._starts[max(segment, 0)]
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as m:ss, or h:mm:ss from an hour on."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
@@ -1,7 +1,65 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Any
 
+import asyncpg  # type: ignore[import-untyped]
 from youtube_transcript_api import YouTubeTranscriptApi
 
+from app.config import settings
+from app.db import get_stored_transcript, get_transcript_text, save_transcript
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Transcript:
+    """A transcript with its segment timing in columnar form.
+
+    Segment i starts ``starts[i]`` seconds into the video, lasts
+    ``durations[i]`` seconds and begins at character ``offsets[i]`` of
+    ``text``, where segments are joined with single spaces. Transcripts
+    stored before timing was kept have no segments.
+    """
+
+    text: str
+    starts: list[float]
+    durations: list[float]
+    offsets: list[int]
+    stored: bool  # True if it came from the database rather than YouTube
+
+    @classmethod
+    def from_segments(
+        cls, text: str, segments: list[dict[str, Any]], *, stored: bool = False
+    ) -> "Transcript":
+        """Build from ``get_transcript`` output: joined text and raw segments."""
+        offsets: list[int] = []
+        position = 0
+        for segment in segments:
+            offsets.append(position)
+            position += len(segment["text"]) + 1
+        return cls(
+            text=text,
+            starts=[float(segment["start"]) for segment in segments],
+            durations=[float(segment["duration"]) for segment in segments],
+            offsets=offsets,
+            stored=stored,
+        )
+
+    @property
+    def segments(self) -> list[dict[str, Any]]:
+        """The segments as dicts with text, start, and duration keys."""
+        if not self.offsets:
+            return []
+        ends = [offset - 1 for offset in self.offsets[1:]] + [len(self.text)]
+        return [
+            {"text": self.text[offset:end], "start": start, "duration": duration}
+            for offset, end, start, duration in zip(
+                self.offsets, ends, self.starts, self.durations, strict=True
+            )
+        ]
+
 
 def get_transcript(video_id: str) -> tuple[str, list[dict[str, Any]]]:
     """Retrieve the transcript for a YouTube video.
@@ -41,3 +99,95 @@ def calculate_duration(segments: list[dict[str, Any]]) -> int | None:
 
     last = segments[-1]
     return int(last["start"] + last["duration"])
+
+
+async def load_transcript(conn: asyncpg.Connection, video_id: str) -> Transcript | None:
+    """Get a video's stored transcript, or None if it was never fetched."""
+    row = await get_stored_transcript(conn, video_id)
+    if row is None:
+        return None
+    return Transcript(
+        text=row["text"],
+        starts=list(row["starts"]),
+        durations=list(row["durations"]),
+        offsets=list(row["offsets"]),
+        stored=True,
+    )
+
+
+async def resolve_transcript(conn: asyncpg.Connection, video_id: str) -> Transcript:
+    """Get a video's transcript, from the database if stored, else YouTube.
+
+    Every code path that needs transcript text goes through here, so a video
+    is fetched from YouTube at most once: a fetched transcript is stored
+    before it is returned. Database errors fall back to YouTube rather than
+    failing the request.
+
+    Raises:
+        TranscriptsDisabled, NoTranscriptFound, VideoUnavailable: As
+            get_transcript, when the transcript is not stored.
+    """
+    try:
+        stored = await load_transcript(conn, video_id)
+    except Exception:
+        logger.warning("Failed to look up stored transcript for %s", video_id)
+        stored = None
+    if stored is not None:
+        return stored
+
+    # The transcript API client is synchronous; keep it off the event loop
+    text, segments = await asyncio.to_thread(get_transcript, video_id)
+    transcript = Transcript.from_segments(text, segments)
+    try:
+        await save_transcript(
+            conn,
+            video_id,
+            transcript.text,
+            transcript.starts,
+            transcript.durations,
+            transcript.offsets,
+        )
+    except Exception:
+        logger.warning("Failed to store transcript for %s", video_id)
+    return transcript
+
+
+class TranscriptTextCache:
+    """In-process LRU of transcript text, bounded by total size.
+
+    Stored transcripts never change, so entries need no expiry. Lets
+    per-turn callers like Q&A skip both the database and the request body.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._bytes = 0
+
+    async def get(self, conn: asyncpg.Connection, video_id: str) -> str | None:
+        """Get a video's transcript text, loading it if not cached."""
+        text = self._entries.get(video_id)
+        if text is not None:
+            self._entries.move_to_end(video_id)
+            return text
+        text = await get_transcript_text(conn, video_id)
+        if text is not None:
+            self._store(video_id, text)
+        return text
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _store(self, video_id: str, text: str) -> None:
+        size = len(text.encode())
+        if size > self.max_bytes:
+            return
+        self._entries[video_id] = text
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.encode())
+
+
+transcript_texts = TranscriptTextCache(settings.transcript_cache_max_bytes)
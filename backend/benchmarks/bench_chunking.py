@@ -0,0 +1,108 @@
+"""Microbenchmark: token-aware chunker vs. the original word-list splitter.
+
+Builds synthetic transcripts of a given length (speech at ~150 words/min) and
+reports wall time, peak traced memory and chunk sizes for each splitter.
+
+Run from backend/:
+
+    python -m benchmarks.bench_chunking --hours 10
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable
+from functools import partial
+
+from app.services.chunking import count_tokens, iter_chunks
+
+_WORDS_PER_MINUTE = 150
+_MAX_TOKENS = 100_000
+_LEGACY_MAX_CHARS = 400_000
+
+_CORPUS = (
+    "the of and to in is that it was for on are as with they be at one have "
+    "this from or had by word but what some we can out other were all there "
+    "when up use your how said an each she which do their time if will way "
+    "about many then them write would like so these her long make thing see "
+    "him two has look more day could go come did number sound no most people"
+)
+
+
+def legacy_split_into_chunks(text: str, max_chars: int) -> list[str]:
+    """The splitter this benchmark replaces: ~4 chars/token over a word list."""
+    chunks = []
+    words = text.split()
+    current_chunk: list[str] = []
+    current_length = 0
+
+    for word in words:
+        word_len = len(word) + 1
+        if current_length + word_len > max_chars and current_chunk:
+            chunks.append(" ".join(current_chunk))
+            current_chunk = []
+            current_length = 0
+        current_chunk.append(word)
+        current_length += word_len
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks
+
+
+def make_transcript(hours: float, *, punctuated: bool, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vocabulary = _CORPUS.split()
+    words_left = int(hours * 60 * _WORDS_PER_MINUTE)
+    sentences = []
+    while words_left > 0:
+        n = min(words_left, rng.randint(6, 24))
+        sentence = " ".join(rng.choice(vocabulary) for _ in range(n))
+        sentences.append(sentence + "." if punctuated else sentence)
+        words_left -= n
+    return " ".join(sentences)
+
+
+def measure(fn: Callable[[], Iterable[str]]) -> tuple[float, int, list[str]]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    chunks = []
+    for chunk in fn():
+        chunks.append(chunk)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, chunks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=10.0)
+    args = parser.parse_args()
+
+    count_tokens("warm up")  # load the tokenizer outside the measurements
+
+    print(
+        f"{'transcript':<14}{'splitter':<10}{'seconds':>9}{'peak MiB':>10}"
+        f"{'chunks':>8}{'max tokens':>12}"
+    )
+    for punctuated in (True, False):
+        text = make_transcript(args.hours, punctuated=punctuated)
+        label = "punctuated" if punctuated else "unpunctuated"
+        runs = {
+            "legacy": partial(legacy_split_into_chunks, text, _LEGACY_MAX_CHARS),
+            "tokens": partial(iter_chunks, text, _MAX_TOKENS),
+        }
+        for name, fn in runs.items():
+            seconds, peak, chunks = measure(fn)
+            largest = max(count_tokens(c) for c in chunks)
+            print(
+                f"{label:<14}{name:<10}{seconds:>9.3f}"
+                f"{peak / 2**20:>10.1f}{len(chunks):>8}{largest:>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Benchmark: one OpenAI client per call vs. a shared, pooled client.
+
+Starts a local fake OpenAI server that answers chat completions instantly,
+then times the same sequence of calls made with a fresh AsyncOpenAI client
+per call (the old behaviour) and with one client reused across calls (what
+the app lifespan now creates). The difference is the per-call cost of
+setting up a connection, plus the TLS handshake when run with --tls.
+
+Run from backend/:
+
+    python -m benchmarks.bench_openai_client --calls 200
+    python -m benchmarks.bench_openai_client --tls cert.pem key.pem
+"""
+
+import argparse
+import asyncio
+import json
+import ssl
+import statistics
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+_COMPLETION = json.dumps(
+    {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "A summary."},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+    }
+).encode()
+
+_MESSAGES = [{"role": "user", "content": "Summarize this."}]
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_COMPLETION)))
+        self.end_headers()
+        self.wfile.write(_COMPLETION)
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+
+def start_fake_server(tls: tuple[str, str] | None) -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAIHandler)
+    scheme = "http"
+    if tls is not None:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*tls)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_port}/v1"
+
+
+def make_client(base_url: str, verify: bool) -> AsyncOpenAI:
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    return AsyncOpenAI(
+        api_key="bench",
+        base_url=base_url,
+        http_client=DefaultAsyncHttpxClient(limits=limits, verify=verify),
+    )
+
+
+async def call(client: AsyncOpenAI) -> None:
+    await client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=_MESSAGES,  # type: ignore[arg-type]
+    )
+
+
+async def measure(fn: Callable[[], Awaitable[None]], calls: int) -> list[float]:
+    await fn()  # warm up imports and, for the shared client, the pool
+    latencies = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+async def run(calls: int, tls: tuple[str, str] | None) -> None:
+    server, base_url = start_fake_server(tls)
+    verify = tls is None  # self-signed certificates are expected with --tls
+
+    async def per_call() -> None:
+        client = make_client(base_url, verify)
+        try:
+            await call(client)
+        finally:
+            await client.close()
+
+    shared = make_client(base_url, verify)
+
+    async def pooled() -> None:
+        await call(shared)
+
+    results = {
+        "per-call": await measure(per_call, calls),
+        "shared": await measure(pooled, calls),
+    }
+    await shared.close()
+    server.shutdown()
+
+    print(f"{'client':<10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, latencies in results.items():
+        ordered = sorted(latencies)
+        print(
+            f"{name:<10}{statistics.mean(ordered) * 1000:>10.2f}"
+            f"{ordered[len(ordered) // 2] * 1000:>10.2f}"
+            f"{ordered[int(len(ordered) * 0.95)] * 1000:>10.2f}"
+        )
+    saved = statistics.mean(results["per-call"]) - statistics.mean(results["shared"])
+    print(f"saved per call: {saved * 1000:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument(
+        "--tls",
+        nargs=2,
+        metavar=("CERTFILE", "KEYFILE"),
+        help="serve the fake API over TLS with this certificate",
+    )
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, tuple(args.tls) if args.tls else None))
+
+
+if __name__ == "__main__":
+    main()
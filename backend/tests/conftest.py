@@ -0,0 +1,213 @@
+import contextlib
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from app.models import Job
+from app.services.llm import llm_cache
+from app.services.retrieval import passage_indexes
+from app.services.transcript import transcript_texts
+
+
+@pytest.fixture(autouse=True)
+def clear_llm_cache() -> Iterator[None]:
+    """Keep cached LLM responses from leaking between tests."""
+    llm_cache.clear()
+    yield
+    llm_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_passage_indexes() -> Iterator[None]:
+    """Keep Q&A passage indexes and transcripts from leaking between tests."""
+    passage_indexes.clear()
+    transcript_texts.clear()
+    yield
+    passage_indexes.clear()
+    transcript_texts.clear()
+
+
+class FakeJobTable:
+    """In-memory stand-in for the jobs table functions in ``app.db``.
+
+    Mirrors their claim, lease and retry semantics so the job queue can be
+    exercised without Postgres.
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[str, dict[str, Any]] = {}
+
+    def _job(self, row: dict[str, Any]) -> Job:
+        return Job(
+            job_id=row["id"],
+            kind=row["kind"],
+            status=row["status"],
+            payload=row["payload"],
+            progress=row["progress"],
+            result=row["result"],
+            error=row["error"],
+            attempts=row["attempts"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    def _owned(self, job_id: str, worker_id: str) -> dict[str, Any] | None:
+        row = self.rows.get(job_id)
+        if row and row["lease_owner"] == worker_id and row["status"] == "running":
+            return row
+        return None
+
+    async def insert_job(
+        self,
+        _conn: object,
+        job_id: str,
+        kind: str,
+        payload: dict[str, Any],
+        max_attempts: int,
+    ) -> Job:
+        now = datetime.now(UTC)
+        self.rows[job_id] = {
+            "id": job_id,
+            "kind": kind,
+            "payload": payload,
+            "status": "queued",
+            "progress": None,
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_after": time.monotonic(),
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        return self._job(self.rows[job_id])
+
+    async def get_job(self, _conn: object, job_id: str) -> Job | None:
+        row = self.rows.get(job_id)
+        return self._job(row) if row else None
+
+    async def claim_job(
+        self, _conn: object, worker_id: str, lease_seconds: float
+    ) -> Job | None:
+        now = time.monotonic()
+        runnable = [
+            row
+            for row in self.rows.values()
+            if (row["status"] == "queued" and row["run_after"] <= now)
+            or (
+                row["status"] == "running"
+                and row["lease_expires_at"] < now
+                and row["attempts"] < row["max_attempts"]
+            )
+        ]
+        if not runnable:
+            return None
+        row = min(runnable, key=lambda r: r["run_after"])
+        row.update(
+            status="running",
+            attempts=row["attempts"] + 1,
+            lease_owner=worker_id,
+            lease_expires_at=now + lease_seconds,
+        )
+        return self._job(row)
+
+    async def heartbeat_job(
+        self,
+        _conn: object,
+        job_id: str,
+        worker_id: str,
+        lease_seconds: float,
+        progress: dict[str, Any] | None,
+    ) -> bool:
+        row = self._owned(job_id, worker_id)
+        if row is None:
+            return False
+        row.update(lease_expires_at=time.monotonic() + lease_seconds, progress=progress)
+        return True
+
+    async def complete_job(
+        self,
+        _conn: object,
+        job_id: str,
+        worker_id: str,
+        result: dict[str, Any],
+        progress: dict[str, Any] | None,
+    ) -> bool:
+        row = self._owned(job_id, worker_id)
+        if row is None:
+            return False
+        row.update(
+            status="succeeded",
+            result=result,
+            progress=progress,
+            error=None,
+            lease_owner=None,
+        )
+        return True
+
+    async def fail_job(
+        self,
+        _conn: object,
+        job_id: str,
+        worker_id: str,
+        error: dict[str, Any],
+        progress: dict[str, Any] | None,
+        *,
+        retry_delay: float | None,
+    ) -> bool:
+        row = self._owned(job_id, worker_id)
+        if row is None:
+            return False
+        retry = retry_delay is not None and row["attempts"] < row["max_attempts"]
+        row.update(
+            status="queued" if retry else "failed",
+            run_after=time.monotonic() + (retry_delay or 0.0),
+            error=error,
+            progress=progress,
+            lease_owner=None,
+        )
+        return True
+
+    async def fail_expired_jobs(self, _conn: object, error: dict[str, Any]) -> int:
+        now = time.monotonic()
+        expired = [
+            row
+            for row in self.rows.values()
+            if row["status"] == "running"
+            and row["lease_expires_at"] < now
+            and row["attempts"] >= row["max_attempts"]
+        ]
+        for row in expired:
+            row.update(status="failed", error=error, lease_owner=None)
+        return len(expired)
+
+    async def purge_finished_jobs(self, _conn: object, _retention: int) -> int:
+        return 0
+
+
+@pytest.fixture
+def fake_jobs() -> Iterator[FakeJobTable]:
+    """Back the job queue with an in-memory jobs table."""
+    table = FakeJobTable()
+    names = [
+        "insert_job",
+        "claim_job",
+        "heartbeat_job",
+        "complete_job",
+        "fail_job",
+        "fail_expired_jobs",
+        "purge_finished_jobs",
+    ]
+    with contextlib.ExitStack() as stack:
+        for name in names:
+            stack.enter_context(
+                patch(f"app.services.jobs.{name}", getattr(table, name))
+            )
+        stack.enter_context(patch("app.main.get_job", table.get_job))
+        yield table
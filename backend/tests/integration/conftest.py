@@ -12,6 +12,7 @@ import pytest
 
 from app.db import get_db
 from app.main import app
+from app.services.llm import get_openai_client
 
 
 def _make_default_conn() -> AsyncMock:
@@ -22,6 +23,8 @@ def _make_default_conn() -> AsyncMock:
     mock_record.__iter__ = MagicMock(return_value=iter([]))
     # Return a row-like mapping so VideoRecord(**dict(row)) works
     mock_conn.fetchrow.return_value = None
+    # No transcript stored, so the transcript comes from YouTube
+    mock_conn.fetchval.return_value = None
     mock_conn.execute.return_value = None
     # list_recent calls conn.fetch
     mock_conn.fetch.return_value = []
@@ -43,3 +46,15 @@ def default_get_db_override():
     app.dependency_overrides[get_db] = _override_get_db
     yield mock_conn
     app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(autouse=True)
+def default_openai_client_override():
+    """Skip the shared OpenAI client, which is only created by the lifespan.
+
+    With no client injected, services build their own, so tests can keep
+    patching ``AsyncOpenAI`` in the service modules.
+    """
+    app.dependency_overrides[get_openai_client] = lambda: None
+    yield
+    app.dependency_overrides.pop(get_openai_client, None)
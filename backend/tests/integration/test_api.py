@@ -1,12 +1,23 @@
+import asyncio
+import time
 from datetime import UTC, datetime
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import asyncpg
+import httpx
+import pytest
 from fastapi.testclient import TestClient
 
 from app.db import get_db
 from app.main import app
-from app.models import VideoRecord
+from app.models import (
+    FallacyAnalysisResult,
+    SummaryVariant,
+    VideoMetadata,
+    VideoRecord,
+)
+from app.services.llm import OpenAIResult
+from app.services.summarizer import SummaryResult, summary_cache_key
 
 client = TestClient(app)
 
@@ -24,7 +35,6 @@ _FAKE_DB_ROW: dict = {
     "title": "Test Video",
     "thumbnail_url": f"https://i.ytimg.com/vi/{_FAKE_VIDEO_ID}/hqdefault.jpg",
     "summary": "Test summary",
-    "transcript": "Test transcript",
     "created_at": _FAKE_CREATED_AT,
 }
 
@@ -38,6 +48,11 @@ _FAKE_HISTORY_ROW: dict = {
 }
 
 
+def _stored_transcript(text: str) -> dict:
+    """A transcripts row, as returned by get_stored_transcript, without timing."""
+    return {"text": text, "starts": [], "durations": [], "offsets": []}
+
+
 class TestSummarizeEndpointHappyPath:
     """Integration test for POST /api/summarize happy path."""
 
@@ -48,7 +63,7 @@ class TestSummarizeEndpointHappyPath:
         snippet.duration = duration
         return snippet
 
-    @patch("app.services.summarizer.OpenAI")
+    @patch("app.services.summarizer.AsyncOpenAI")
     @patch("app.services.transcript.YouTubeTranscriptApi")
     def test_returns_summary_for_valid_url(
         self, mock_ytt_class: MagicMock, mock_openai_class: MagicMock
@@ -76,7 +91,8 @@ class TestSummarizeEndpointHappyPath:
         mock_response.choices[
             0
         ].message.content = "This video talks about great content."
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         response = client.post(
             "/api/summarize",
@@ -89,7 +105,7 @@ class TestSummarizeEndpointHappyPath:
         assert data["summary"] == "This video talks about great content."
         assert "metadata" in data
 
-    @patch("app.services.summarizer.OpenAI")
+    @patch("app.services.summarizer.AsyncOpenAI")
     @patch("app.services.transcript.YouTubeTranscriptApi")
     def test_response_matches_schema(
         self, mock_ytt_class: MagicMock, mock_openai_class: MagicMock
@@ -111,7 +127,8 @@ class TestSummarizeEndpointHappyPath:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = "A concise summary."
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         response = client.post(
             "/api/summarize",
@@ -214,7 +231,7 @@ class TestSummarizeEndpointErrors:
         assert response.status_code == 404
         _assert_error_response(response.json(), "transcript_unavailable")
 
-    @patch("app.services.summarizer.OpenAI")
+    @patch("app.services.summarizer.AsyncOpenAI")
     @patch("app.services.transcript.YouTubeTranscriptApi")
     def test_openai_error_returns_502(
         self,
@@ -240,10 +257,12 @@ class TestSummarizeEndpointErrors:
         # Mock OpenAI failure
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = APIError(
-            message="Rate limit exceeded",
-            request=MagicMock(),
-            body=None,
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=APIError(
+                message="Rate limit exceeded",
+                request=MagicMock(),
+                body=None,
+            )
         )
 
         response = client.post(
@@ -313,7 +332,7 @@ class TestFallaciesEndpoint:
             }
         )
 
-    @patch("app.services.fallacy_analyzer.OpenAI")
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
     @patch("app.services.transcript.YouTubeTranscriptApi")
     def test_returns_fallacy_analysis_for_valid_url(
         self,
@@ -335,7 +354,10 @@ class TestFallaciesEndpoint:
         mock_fal_response = MagicMock()
         mock_fal_response.choices = [MagicMock()]
         mock_fal_response.choices[0].message.content = self._make_valid_fallacy_json()
-        mock_fal_client.chat.completions.create.return_value = mock_fal_response
+        mock_fal_response.usage = None
+        mock_fal_client.chat.completions.create = AsyncMock(
+            return_value=mock_fal_response
+        )
 
         response = client.post(
             "/api/fallacies",
@@ -349,6 +371,44 @@ class TestFallaciesEndpoint:
         assert data["summary"]["total_fallacies"] == 1
         assert len(data["fallacies"]) == 1
 
+    @patch("app.main.align_fallacies")
+    @patch("app.main.analyze_fallacies")
+    @patch("app.services.transcript.YouTubeTranscriptApi")
+    def test_quotes_are_aligned_off_the_event_loop(
+        self,
+        mock_ytt_class: MagicMock,
+        mock_analyze: MagicMock,
+        mock_align: MagicMock,
+    ) -> None:
+        mock_ytt = MagicMock()
+        mock_ytt_class.return_value = mock_ytt
+        mock_transcript = MagicMock()
+        mock_transcript.to_raw_data.return_value = [
+            {"text": "Hello world", "start": 0.0, "duration": 2.5},
+        ]
+        mock_ytt.fetch.return_value = mock_transcript
+        mock_analyze.return_value = FallacyAnalysisResult.model_validate_json(
+            self._make_valid_fallacy_json()
+        )
+        loops: list[bool] = []
+
+        def align(*_args: object) -> None:
+            try:
+                asyncio.get_running_loop()
+                loops.append(True)
+            except RuntimeError:
+                loops.append(False)
+
+        mock_align.side_effect = align
+
+        response = client.post(
+            "/api/fallacies",
+            json={"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"},
+        )
+
+        assert response.status_code == 200
+        assert loops == [False]
+
     def test_invalid_url_returns_400(self) -> None:
         response = client.post(
             "/api/fallacies",
@@ -400,6 +460,116 @@ class TestFallaciesEndpoint:
         assert response.status_code == 502
         _assert_error_response(response.json(), "analysis_failed")
 
+    @patch("app.main.analyze_fallacies")
+    @patch("app.services.transcript.YouTubeTranscriptApi")
+    @patch("app.services.transcript.get_stored_transcript", new_callable=AsyncMock)
+    def test_reuses_stored_transcript(
+        self,
+        mock_get_stored: AsyncMock,
+        mock_ytt_class: MagicMock,
+        mock_analyze: MagicMock,
+    ) -> None:
+        mock_get_stored.return_value = _stored_transcript("Stored transcript text")
+        mock_analyze.return_value = None
+
+        client.post(
+            "/api/fallacies",
+            json={"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"},
+        )
+
+        mock_ytt_class.assert_not_called()
+        assert mock_analyze.await_args.args[0] == "Stored transcript text"
+
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    @patch("app.services.transcript.get_stored_transcript", new_callable=AsyncMock)
+    def test_timestamps_come_from_the_transcript(
+        self, mock_get_stored: AsyncMock, mock_fallacy_openai: MagicMock
+    ) -> None:
+        mock_get_stored.return_value = {
+            "text": "Welcome back. You can't trust him.",
+            "starts": [0.0, 95.0],
+            "durations": [5.0, 4.0],
+            "offsets": [0, 14],
+        }
+        mock_fal_response = MagicMock()
+        mock_fal_response.choices = [MagicMock()]
+        mock_fal_response.choices[0].message.content = self._make_valid_fallacy_json()
+        mock_fal_response.usage = None
+        mock_fallacy_openai.return_value.chat.completions.create = AsyncMock(
+            return_value=mock_fal_response
+        )
+
+        response = client.post(
+            "/api/fallacies",
+            json={"url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"},
+        )
+
+        assert response.status_code == 200
+        fallacy = response.json()["fallacies"][0]
+        assert fallacy["timestamp"] == "1:35"
+        assert fallacy["quote_match"] == "exact"
+        assert fallacy["quote_start"] == 14
+
+
+class TestTranscriptTimestamps:
+    """Integration tests for GET /api/transcripts/{video_id}/timestamps."""
+
+    _URL = f"/api/transcripts/{_FAKE_VIDEO_ID}/timestamps"
+
+    def test_maps_offsets_to_segment_times(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        default_get_db_override.fetchrow.return_value = {
+            "text": "Hello there general Kenobi",
+            "starts": [0.0, 61.5],
+            "durations": [1.5, 2.0],
+            "offsets": [0, 12],
+        }
+
+        response = client.get(self._URL, params={"offset": [3, 20]})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "video_id": _FAKE_VIDEO_ID,
+            "timestamps": [
+                {"offset": 3, "seconds": 0.0, "timestamp": "0:00"},
+                {"offset": 20, "seconds": 61.5, "timestamp": "1:01"},
+            ],
+        }
+
+    def test_offsets_past_the_end_return_400(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        default_get_db_override.fetchrow.return_value = {
+            "text": "Hello",
+            "starts": [0.0],
+            "durations": [1.0],
+            "offsets": [0],
+        }
+
+        response = client.get(self._URL, params={"offset": [2, 99]})
+
+        assert response.status_code == 400
+        data = response.json()
+        _assert_error_response(data, "invalid_offset")
+        assert data["details"] == "Invalid offsets: 99"
+
+    def test_untimed_transcript_returns_404(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        default_get_db_override.fetchrow.return_value = _stored_transcript("Hello")
+
+        response = client.get(self._URL, params={"offset": [0]})
+
+        assert response.status_code == 404
+        _assert_error_response(response.json(), "timing_unavailable")
+
+    def test_unknown_video_returns_404(self) -> None:
+        response = client.get(self._URL, params={"offset": [0]})
+
+        assert response.status_code == 404
+        _assert_error_response(response.json(), "not_found")
+
 
 class TestSummarizeEndpointLengthPercent:
     """Integration tests for length_percent parameter (US1)."""
@@ -411,7 +581,7 @@ class TestSummarizeEndpointLengthPercent:
         snippet.duration = duration
         return snippet
 
-    @patch("app.services.summarizer.OpenAI")
+    @patch("app.services.summarizer.AsyncOpenAI")
     @patch("app.services.transcript.YouTubeTranscriptApi")
     def test_length_percent_passed_to_summarizer(
         self, mock_ytt_class: MagicMock, mock_openai_class: MagicMock
@@ -436,7 +606,8 @@ class TestSummarizeEndpointLengthPercent:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = "Short summary."
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         response = client.post(
             "/api/summarize",
@@ -453,7 +624,7 @@ class TestSummarizeEndpointLengthPercent:
         system_msg = next(m for m in messages if m["role"] == "system")
         assert "10%" in system_msg["content"]
 
-    @patch("app.services.summarizer.OpenAI")
+    @patch("app.services.summarizer.AsyncOpenAI")
     @patch("app.services.transcript.YouTubeTranscriptApi")
     def test_default_length_percent_is_25(
         self, mock_ytt_class: MagicMock, mock_openai_class: MagicMock
@@ -478,7 +649,8 @@ class TestSummarizeEndpointLengthPercent:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = "Default summary."
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         response = client.post(
             "/api/summarize",
@@ -575,9 +747,10 @@ class TestSummarizeStorageWarning:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = summary_text
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
-    @patch("app.services.summarizer.OpenAI")
+    @patch("app.services.summarizer.AsyncOpenAI")
     @patch("app.services.transcript.YouTubeTranscriptApi")
     @patch("app.services.youtube.httpx.get")
     def test_summarize_sets_storage_warning_false_on_success(
@@ -600,10 +773,11 @@ class TestSummarizeStorageWarning:
         }
         mock_httpx_get.return_value = mock_httpx_response
 
-        # Mock DB connection where save_record succeeds
+        # Mock DB connection: cache miss, miss again under the lock, no
+        # stored transcript, then save_record succeeds
         mock_conn = AsyncMock(spec=asyncpg.Connection)
         mock_conn.execute.return_value = None
-        mock_conn.fetchrow.return_value = _FAKE_DB_ROW
+        mock_conn.fetchrow.side_effect = [None, None, None, _FAKE_DB_ROW]
 
         async def override_get_db():
             yield mock_conn
@@ -622,7 +796,7 @@ class TestSummarizeStorageWarning:
         assert "summary" in data
         assert data.get("storage_warning") is False
 
-    @patch("app.services.summarizer.OpenAI")
+    @patch("app.services.summarizer.AsyncOpenAI")
     @patch("app.services.transcript.YouTubeTranscriptApi")
     @patch("app.services.youtube.httpx.get")
     def test_summarize_sets_storage_warning_true_on_db_failure(
@@ -677,47 +851,176 @@ class TestSummarizeStorageWarning:
 class TestSummarizeCacheHit:
     """Integration tests for the cache-hit path on POST /api/summarize (US2)."""
 
+    _FAKE_RECORD = VideoRecord(
+        id=1,
+        video_id=_FAKE_VIDEO_ID,
+        title="Cached Title",
+        thumbnail_url=f"https://i.ytimg.com/vi/{_FAKE_VIDEO_ID}/hqdefault.jpg",
+        summary="Cached summary",
+        created_at=datetime(2026, 1, 1, tzinfo=UTC),
+    )
+
     def test_summarize_returns_cached_result_without_reprocessing(self) -> None:
-        """When a video_id already exists in the DB, the stored result is returned
-        immediately. Transcript and summarize services must NOT be called."""
-        fake_record = VideoRecord(
-            id=1,
+        """When a variant for this length, model and prompt exists, the stored
+        result is returned immediately. Transcript and summarize services must
+        NOT be called."""
+        model, prompt_hash = summary_cache_key()
+        fake_variant = SummaryVariant(
             video_id=_FAKE_VIDEO_ID,
-            title="Cached Title",
-            thumbnail_url=f"https://i.ytimg.com/vi/{_FAKE_VIDEO_ID}/hqdefault.jpg",
-            summary="Cached summary",
-            transcript="Cached transcript",
+            length_percent=25,
+            model=model,
+            prompt_hash=prompt_hash,
+            summary="Cached 25% summary",
             created_at=datetime(2026, 1, 1, tzinfo=UTC),
         )
 
-        async def override_get_db():
-            mock_conn = AsyncMock()
-            yield mock_conn
-
-        app.dependency_overrides[get_db] = override_get_db
-
-        try:
-            with (
-                patch(
-                    "app.main.get_by_video_id",
-                    new_callable=AsyncMock,
-                    return_value=fake_record,
+        with (
+            patch(
+                "app.main.get_by_video_id",
+                new_callable=AsyncMock,
+                return_value=self._FAKE_RECORD,
+            ),
+            patch(
+                "app.main.get_summary_variant",
+                new_callable=AsyncMock,
+                return_value=fake_variant,
+            ) as mock_get_variant,
+            patch(
+                "app.main.get_transcript_text",
+                new_callable=AsyncMock,
+                return_value="Cached transcript",
+            ),
+            patch("app.services.transcript.get_transcript") as mock_transcript,
+            patch("app.main.generate_summary") as mock_summarize,
+        ):
+            response = client.post(
+                "/api/summarize",
+                json={"url": f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"},
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["summary"] == "Cached 25% summary"
+        assert data["transcript"] == "Cached transcript"
+        mock_get_variant.assert_awaited_once_with(
+            ANY, _FAKE_VIDEO_ID, 25, model, prompt_hash
+        )
+        mock_transcript.assert_not_called()
+        mock_summarize.assert_not_called()
+
+    def test_variant_miss_regenerates_from_stored_transcript(self) -> None:
+        """A different length for a stored video regenerates only that variant,
+        reusing the stored transcript instead of fetching it again."""
+        with (
+            patch(
+                "app.main.get_by_video_id",
+                new_callable=AsyncMock,
+                return_value=self._FAKE_RECORD,
+            ),
+            patch(
+                "app.main.get_summary_variant",
+                new_callable=AsyncMock,
+                return_value=None,
+            ),
+            patch(
+                "app.services.transcript.get_stored_transcript",
+                new_callable=AsyncMock,
+                return_value=_stored_transcript("Cached transcript"),
+            ),
+            patch("app.services.transcript.get_transcript") as mock_transcript,
+            patch(
+                "app.main.generate_summary",
+                new_callable=AsyncMock,
+                return_value=SummaryResult(
+                    content="Fresh 10% summary",
+                    total_prompt_tokens=100,
+                    total_completion_tokens=10,
                 ),
-                patch("app.main.get_transcript") as mock_transcript,
-                patch("app.main.generate_summary") as mock_summarize,
-            ):
-                response = client.post(
-                    "/api/summarize",
-                    json={"url": f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"},
-                )
-            assert response.status_code == 200
-            data = response.json()
-            assert data["summary"] == "Cached summary"
-            assert data["transcript"] == "Cached transcript"
-            mock_transcript.assert_not_called()
-            mock_summarize.assert_not_called()
-        finally:
-            app.dependency_overrides.pop(get_db, None)
+            ) as mock_summarize,
+            patch("app.main.save_record", new_callable=AsyncMock) as mock_save,
+            patch(
+                "app.main.save_summary_variant", new_callable=AsyncMock
+            ) as mock_save_variant,
+        ):
+            response = client.post(
+                "/api/summarize",
+                json={
+                    "url": f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}",
+                    "length_percent": 10,
+                },
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["summary"] == "Fresh 10% summary"
+        assert data["metadata"]["title"] == "Cached Title"
+        mock_transcript.assert_not_called()
+        assert mock_summarize.await_args.args[0] == "Cached transcript"
+        assert mock_summarize.await_args.kwargs["length_percent"] == 10
+        mock_save.assert_not_awaited()
+        variant_args = mock_save_variant.await_args.args
+        assert variant_args[1:3] == (_FAKE_VIDEO_ID, 10)
+        assert variant_args[5] == "Fresh 10% summary"
+
+    def test_variant_miss_derives_from_longer_cached_variant(self) -> None:
+        """A shorter variant is condensed from a cached longer one and its
+        stats record that it was derived."""
+        source = SummaryVariant(
+            video_id=_FAKE_VIDEO_ID,
+            length_percent=50,
+            model="gpt-4o-mini",
+            prompt_hash="abc123",
+            summary="Cached 50% summary",
+            created_at=datetime(2026, 1, 1, tzinfo=UTC),
+        )
+        with (
+            patch(
+                "app.main.get_by_video_id",
+                new_callable=AsyncMock,
+                return_value=self._FAKE_RECORD,
+            ),
+            patch(
+                "app.main.get_summary_variant",
+                new_callable=AsyncMock,
+                return_value=None,
+            ),
+            patch(
+                "app.main.get_derivation_source",
+                new_callable=AsyncMock,
+                return_value=source,
+            ),
+            patch(
+                "app.services.transcript.get_stored_transcript",
+                new_callable=AsyncMock,
+                return_value=_stored_transcript("Cached transcript"),
+            ),
+            patch(
+                "app.main.generate_summary",
+                new_callable=AsyncMock,
+                return_value=SummaryResult(
+                    content="Derived 20% summary",
+                    total_prompt_tokens=30,
+                    total_completion_tokens=10,
+                ),
+            ) as mock_summarize,
+            patch(
+                "app.main.save_summary_variant", new_callable=AsyncMock
+            ) as mock_save_variant,
+        ):
+            response = client.post(
+                "/api/summarize",
+                json={
+                    "url": f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}",
+                    "length_percent": 20,
+                },
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["summary"] == "Derived 20% summary"
+        assert data["stats"]["derived"] is True
+        kwargs = mock_summarize.await_args.kwargs
+        assert kwargs["source_summary"] == "Cached 50% summary"
+        assert kwargs["length_percent"] == 20
+        saved_stats = mock_save_variant.await_args.args[6]
+        assert saved_stats.derived is True
 
 
 # ---------------------------------------------------------------------------
@@ -780,3 +1083,935 @@ class TestGetHistoryItemEndpoint:
             assert data["error"] == "not_found"
         finally:
             app.dependency_overrides.pop(get_db, None)
+
+
+# ---------------------------------------------------------------------------
+# Concurrency: summaries must not block the event loop
+# ---------------------------------------------------------------------------
+
+
+class TestSummarizeConcurrency:
+    """In-flight summaries must not stall other requests on the same worker."""
+
+    _SUMMARY_SECONDS = 0.5
+
+    async def test_history_stays_fast_while_summaries_in_flight(self) -> None:
+        async def slow_summary(*_args: object, **_kwargs: object) -> SummaryResult:
+            await asyncio.sleep(self._SUMMARY_SECONDS)
+            return SummaryResult(
+                content="Slow summary.",
+                total_prompt_tokens=10,
+                total_completion_tokens=5,
+            )
+
+        transport = httpx.ASGITransport(app=app)
+        with (
+            patch("app.main.generate_summary", new=slow_summary),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=(
+                    "Hello world",
+                    [{"text": "Hello world", "start": 0.0, "duration": 1.0}],
+                ),
+            ),
+            patch("app.main.get_video_metadata", return_value=None),
+        ):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as ac:
+                t0 = time.monotonic()
+                # Distinct videos, so single-flight does not coalesce them
+                summaries = [
+                    asyncio.create_task(
+                        ac.post(
+                            "/api/summarize",
+                            json={
+                                "url": f"https://www.youtube.com/watch?v=video{i:06d}"
+                            },
+                        )
+                    )
+                    for i in range(10)
+                ]
+                # Let every summary reach its awaiting OpenAI call
+                await asyncio.sleep(0.05)
+
+                h0 = time.monotonic()
+                history = await ac.get("/api/history")
+                history_seconds = time.monotonic() - h0
+
+                responses = await asyncio.gather(*summaries)
+                total_seconds = time.monotonic() - t0
+
+        assert history.status_code == 200
+        assert history_seconds < self._SUMMARY_SECONDS / 2
+        assert all(r.status_code == 200 for r in responses)
+        # Ten summaries overlap instead of running back to back
+        assert total_seconds < self._SUMMARY_SECONDS * 3
+
+
+class TestSingleFlight:
+    """Concurrent identical requests share one generation."""
+
+    async def _post_concurrently(
+        self, path: str, bodies: list[dict]
+    ) -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return list(await asyncio.gather(*(ac.post(path, json=b) for b in bodies)))
+
+    async def test_identical_summaries_generate_once(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        calls = 0
+
+        async def slow_summary(*_args: object, **_kwargs: object) -> SummaryResult:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return SummaryResult("Shared summary.", 10, 5)
+
+        url = f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"
+        with (
+            patch("app.main.generate_summary", new=slow_summary),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=("Hello world", []),
+            ),
+            patch("app.main.get_video_metadata", return_value=None),
+        ):
+            responses = await self._post_concurrently(
+                "/api/summarize", [{"url": url}] * 5
+            )
+
+        assert calls == 1
+        assert all(r.status_code == 200 for r in responses)
+        assert {r.json()["summary"] for r in responses} == {"Shared summary."}
+        lock_calls = [
+            c
+            for c in default_get_db_override.execute.await_args_list
+            if "pg_advisory_lock" in c.args[0]
+        ]
+        assert len(lock_calls) == 1
+
+    async def test_different_lengths_are_not_coalesced(self) -> None:
+        calls = 0
+
+        async def slow_summary(*_args: object, **_kwargs: object) -> SummaryResult:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return SummaryResult("Summary.", 10, 5)
+
+        url = f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"
+        with (
+            patch("app.main.generate_summary", new=slow_summary),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=("Hello world", []),
+            ),
+            patch("app.main.get_video_metadata", return_value=None),
+        ):
+            await self._post_concurrently(
+                "/api/summarize",
+                [
+                    {"url": url, "length_percent": 10},
+                    {"url": url, "length_percent": 50},
+                ],
+            )
+
+        assert calls == 2
+
+    async def test_identical_fallacy_analyses_run_once(self) -> None:
+        from app.models import FallacyAnalysisResult, FallacySummary
+
+        calls = 0
+
+        async def slow_analysis(*_args: object, **_kwargs: object):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return FallacyAnalysisResult(
+                summary=FallacySummary(
+                    total_fallacies=0,
+                    high_severity=0,
+                    medium_severity=0,
+                    low_severity=0,
+                    primary_tactics=[],
+                ),
+                fallacies=[],
+            )
+
+        url = f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"
+        with (
+            patch("app.main.analyze_fallacies", new=slow_analysis),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=("Hello world", []),
+            ),
+        ):
+            responses = await self._post_concurrently(
+                "/api/fallacies", [{"url": url}] * 3
+            )
+
+        assert calls == 1
+        assert all(r.status_code == 200 for r in responses)
+
+
+# ---------------------------------------------------------------------------
+# Streaming summaries (Server-Sent Events)
+# ---------------------------------------------------------------------------
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    """Parse an SSE body into (event, data) pairs."""
+    import json
+
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestSummarizeStreamEndpoint:
+    """Integration tests for POST /api/summarize/stream."""
+
+    @staticmethod
+    async def _fake_stream(*_args: object, **_kwargs: object):
+        for delta in ["Streamed ", "summary."]:
+            yield delta
+        yield SummaryResult(
+            content="Streamed summary.",
+            total_prompt_tokens=30,
+            total_completion_tokens=4,
+        )
+
+    def test_streams_metadata_tokens_then_stats(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        with (
+            patch("app.main.stream_summary", new=self._fake_stream),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=(
+                    "Hello world",
+                    [{"text": "Hello world", "start": 0.0, "duration": 7.0}],
+                ),
+            ),
+            patch(
+                "app.main.get_video_metadata",
+                return_value=VideoMetadata(video_id=_FAKE_VIDEO_ID, title="T"),
+            ),
+        ):
+            response = client.post(
+                "/api/summarize/stream",
+                json={"url": f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"},
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(response.text)
+        assert [e for e, _ in events] == ["metadata", "token", "token", "stats"]
+        assert events[0][1]["metadata"]["title"] == "T"
+        assert events[0][1]["metadata"]["duration_seconds"] == 7
+        assert events[0][1]["transcript"] == "Hello world"
+        assert "".join(d["text"] for e, d in events if e == "token") == (
+            "Streamed summary."
+        )
+        assert events[-1][1]["stats"]["total_tokens"] == 34
+        assert events[-1][1]["storage_warning"] is False
+        # The fetched transcript is stored, then the completed summary is
+        # persisted through save_record
+        executed = [c.args for c in default_get_db_override.execute.await_args_list]
+        assert "INSERT INTO youtube_summarizer.transcripts " in executed[0][0]
+        assert "INSERT INTO youtube_summarizer.summaries " in executed[1][0]
+        assert "Streamed summary." in executed[1]
+
+    def test_cached_summary_is_streamed_without_generation(self) -> None:
+        fake_record = VideoRecord(
+            id=1,
+            video_id=_FAKE_VIDEO_ID,
+            title="Cached Title",
+            thumbnail_url=None,
+            summary="Cached summary",
+            transcript="Cached transcript",
+            created_at=_FAKE_CREATED_AT,
+        )
+        with (
+            patch(
+                "app.main.get_by_video_id",
+                new_callable=AsyncMock,
+                return_value=fake_record,
+            ),
+            patch(
+                "app.main.get_summary_variant",
+                new_callable=AsyncMock,
+                return_value=MagicMock(summary="Cached summary"),
+            ),
+            patch("app.main.stream_summary") as mock_stream,
+        ):
+            response = client.post(
+                "/api/summarize/stream",
+                json={"url": f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"},
+            )
+
+        events = _parse_sse(response.text)
+        assert [e for e, _ in events] == ["metadata", "token", "stats"]
+        assert events[1][1]["text"] == "Cached summary"
+        mock_stream.assert_not_called()
+
+    def test_invalid_url_returns_400_json(self) -> None:
+        response = client.post(
+            "/api/summarize/stream", json={"url": "not a url at all"}
+        )
+        assert response.status_code == 400
+        _assert_error_response(response.json(), "invalid_url")
+
+    def test_openai_error_is_sent_as_error_event(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        from openai import APIError
+
+        async def failing_stream(*_args: object, **_kwargs: object):
+            yield "Partial "
+            raise APIError(message="boom", request=MagicMock(), body=None)
+
+        with (
+            patch("app.main.stream_summary", new=failing_stream),
+            patch("app.services.transcript.get_transcript", return_value=("Hello", [])),
+            patch("app.main.get_video_metadata", return_value=None),
+        ):
+            response = client.post(
+                "/api/summarize/stream",
+                json={"url": f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"},
+            )
+
+        events = _parse_sse(response.text)
+        assert [e for e, _ in events] == ["metadata", "token", "error"]
+        assert events[-1][1]["error"] == "summarization_failed"
+        # Only the fetched transcript is stored; no summary is persisted
+        executed = [c.args[0] for c in default_get_db_override.execute.await_args_list]
+        assert not any("youtube_summarizer.summaries" in sql for sql in executed)
+
+
+class TestSharedOpenAIClient:
+    """The lifespan creates one OpenAI client that every endpoint reuses."""
+
+    def _make_response(self, content: str) -> MagicMock:
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = content
+        response.usage.prompt_tokens = 10
+        response.usage.completion_tokens = 2
+        return response
+
+    def test_lifespan_creates_and_closes_client(self) -> None:
+        shared = MagicMock()
+        shared.close = AsyncMock()
+
+        with (
+            patch("app.main.create_pool", new=AsyncMock(return_value=MagicMock())),
+            patch("app.main.close_pool", new=AsyncMock()),
+            patch("app.main.create_table", new=AsyncMock()),
+            patch("app.main.create_openai_client", return_value=shared),
+            patch("app.main.job_queue", new=AsyncMock()),
+            TestClient(app),
+        ):
+            assert app.state.openai_client is shared
+            shared.close.assert_not_awaited()
+
+        shared.close.assert_awaited_once()
+
+    def test_endpoints_use_injected_client(self) -> None:
+        from app.services.llm import get_openai_client
+
+        shared = MagicMock()
+        shared.chat.completions.create = AsyncMock(
+            return_value=self._make_response("An answer.")
+        )
+        app.dependency_overrides[get_openai_client] = lambda: shared
+        try:
+            with patch("app.services.qa.AsyncOpenAI") as mock_openai_class:
+                for question in ("First?", "Second?"):
+                    response = client.post(
+                        "/api/ask",
+                        json={"transcript": "Hello", "question": question},
+                    )
+                    assert response.status_code == 200
+        finally:
+            app.dependency_overrides.pop(get_openai_client, None)
+
+        assert shared.chat.completions.create.await_count == 2
+        mock_openai_class.assert_not_called()
+
+
+class TestAskEndpoint:
+    """/api/ask answers from a supplied or stored transcript."""
+
+    def _make_response(self, content: str) -> MagicMock:
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = content
+        response.usage.prompt_tokens = 10
+        response.usage.completion_tokens = 2
+        return response
+
+    @pytest.fixture
+    def openai_client(self):
+        from app.services.llm import get_openai_client
+
+        shared = MagicMock()
+        shared.chat.completions.create = AsyncMock(
+            return_value=self._make_response("An answer.")
+        )
+        app.dependency_overrides[get_openai_client] = lambda: shared
+        yield shared
+        app.dependency_overrides.pop(get_openai_client, None)
+
+    def test_loads_transcript_by_video_id(
+        self, default_get_db_override: AsyncMock, openai_client: MagicMock
+    ) -> None:
+        default_get_db_override.fetchval.return_value = "The stored transcript."
+
+        for question in ("First?", "Second?"):
+            response = client.post(
+                "/api/ask", json={"video_id": _FAKE_VIDEO_ID, "question": question}
+            )
+            assert response.status_code == 200
+
+        assert response.json() == {"answer": "An answer."}
+        messages = openai_client.chat.completions.create.call_args.kwargs["messages"]
+        assert "The stored transcript." in messages[0]["content"]
+        # The transcript is read from the database once, then from memory
+        default_get_db_override.fetchval.assert_awaited_once()
+
+    def test_unknown_video_returns_404(
+        self, default_get_db_override: AsyncMock, openai_client: MagicMock
+    ) -> None:
+        response = client.post(
+            "/api/ask", json={"video_id": _FAKE_VIDEO_ID, "question": "What?"}
+        )
+
+        assert response.status_code == 404
+        assert response.json()["error"] == "not_found"
+        openai_client.chat.completions.create.assert_not_awaited()
+
+    def test_long_history_is_compacted_and_summary_stored(
+        self, default_get_db_override: AsyncMock, openai_client: MagicMock
+    ) -> None:
+        history = []
+        for i in range(6):
+            history.append({"role": "user", "content": f"Question {i}?"})
+            history.append({"role": "assistant", "content": f"Answer {i}."})
+
+        with patch("app.main.settings.qa_history_turns", 2):
+            response = client.post(
+                "/api/ask",
+                json={
+                    "transcript": "Hello",
+                    "question": "What?",
+                    "history": history,
+                    "video_id": _FAKE_VIDEO_ID,
+                },
+            )
+
+        assert response.status_code == 200
+        calls = openai_client.chat.completions.create.call_args_list
+        # One call folds the older turns, one answers with the recent ones
+        assert len(calls) == 2
+        answer_messages = calls[1].kwargs["messages"]
+        assert "Summary of the earlier conversation" in answer_messages[0]["content"]
+        assert answer_messages[1] == history[8]
+        executed = [c.args for c in default_get_db_override.execute.await_args_list]
+        assert any("qa_summary = $2" in args[0] and args[3] == 8 for args in executed)
+
+    def test_summary_of_another_chat_is_not_reused(
+        self, default_get_db_override: AsyncMock, openai_client: MagicMock
+    ) -> None:
+        history = []
+        for i in range(6):
+            history.append({"role": "user", "content": f"Question {i}?"})
+            history.append({"role": "assistant", "content": f"Answer {i}."})
+        # Stored by a different chat about the same video
+        default_get_db_override.fetchrow.return_value = {
+            "text": "Asked about the weather.",
+            "covers": 8,
+            "digest": "another-chat",
+        }
+
+        with patch("app.main.settings.qa_history_turns", 2):
+            response = client.post(
+                "/api/ask",
+                json={
+                    "transcript": "Hello",
+                    "question": "What?",
+                    "history": history,
+                    "video_id": _FAKE_VIDEO_ID,
+                },
+            )
+
+        assert response.status_code == 200
+        calls = openai_client.chat.completions.create.call_args_list
+        assert len(calls) == 2
+        fold_prompt = calls[0].kwargs["messages"][1]["content"]
+        assert "weather" not in fold_prompt
+        assert "Question 0?" in fold_prompt
+        assert "weather" not in calls[1].kwargs["messages"][0]["content"]
+
+    def test_question_over_the_prompt_budget_returns_400(
+        self, openai_client: MagicMock
+    ) -> None:
+        with patch("app.services.qa.settings.qa_prompt_token_budget", 50):
+            response = client.post(
+                "/api/ask", json={"transcript": "Hello", "question": "Why? " * 500}
+            )
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "question_too_long"
+        openai_client.chat.completions.create.assert_not_awaited()
+
+    def test_requires_transcript_or_video_id(self, openai_client: MagicMock) -> None:
+        response = client.post("/api/ask", json={"question": "What?"})
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "invalid_request"
+
+
+class TestAskStreamEndpoint:
+    """Integration tests for POST /api/ask/stream."""
+
+    @staticmethod
+    async def _fake_stream(*_args: object, **_kwargs: object):
+        for delta in ["Forty", "-two."]:
+            yield delta
+        yield OpenAIResult("Forty-two.", 40, 3)
+
+    def test_streams_tokens_then_saves_exchange(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        with patch("app.main.stream_answer", new=self._fake_stream):
+            response = client.post(
+                "/api/ask/stream",
+                json={
+                    "transcript": "The answer is 42.",
+                    "question": "What?",
+                    "video_id": _FAKE_VIDEO_ID,
+                },
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(response.text)
+        assert [e for e, _ in events] == ["token", "token", "done"]
+        assert events[-1][1] == {"answer": "Forty-two."}
+        saved = default_get_db_override.execute.await_args.args
+        assert "INSERT INTO youtube_summarizer.qa_messages" in saved[0]
+        assert saved[1:4] == (_FAKE_VIDEO_ID, "What?", "Forty-two.")
+
+    def test_failure_is_reported_and_nothing_saved(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        from openai import APIError
+
+        async def failing_stream(*_args: object, **_kwargs: object):
+            yield "Partial "
+            raise APIError(message="boom", request=MagicMock(), body=None)
+
+        with patch("app.main.stream_answer", new=failing_stream):
+            response = client.post(
+                "/api/ask/stream",
+                json={
+                    "transcript": "The answer is 42.",
+                    "question": "What?",
+                    "video_id": _FAKE_VIDEO_ID,
+                },
+            )
+
+        events = _parse_sse(response.text)
+        assert [e for e, _ in events] == ["token", "error"]
+        assert events[-1][1]["error"] == "answer_failed"
+        default_get_db_override.execute.assert_not_awaited()
+
+    def test_unknown_video_returns_404(self) -> None:
+        response = client.post(
+            "/api/ask/stream", json={"video_id": _FAKE_VIDEO_ID, "question": "What?"}
+        )
+
+        assert response.status_code == 404
+
+
+class TestQaHistoryEndpoint:
+    """GET /api/history/{video_id}/qa pages through stored Q&A messages."""
+
+    def test_full_page_links_to_older_messages(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        default_get_db_override.fetch.return_value = [
+            {"id": 12, "role": "assistant", "content": "Answer."},
+            {"id": 11, "role": "user", "content": "Question?"},
+        ]
+
+        response = client.get(
+            f"/api/history/{_FAKE_VIDEO_ID}/qa", params={"limit": 2, "before": 13}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "video_id": _FAKE_VIDEO_ID,
+            "messages": [
+                {"id": 11, "role": "user", "content": "Question?"},
+                {"id": 12, "role": "assistant", "content": "Answer."},
+            ],
+            "next_before": 11,
+        }
+        assert default_get_db_override.fetch.await_args.args[1:] == (
+            _FAKE_VIDEO_ID,
+            13,
+            2,
+        )
+
+    def test_last_page_has_no_link(self, default_get_db_override: AsyncMock) -> None:
+        default_get_db_override.fetch.return_value = [
+            {"id": 1, "role": "user", "content": "Question?"},
+        ]
+
+        response = client.get(f"/api/history/{_FAKE_VIDEO_ID}/qa")
+
+        assert response.json()["next_before"] is None
+
+
+class TestBackgroundJobs:
+    """Requests with background=true run as polled jobs."""
+
+    @pytest.fixture(autouse=True)
+    async def running_queue(self, default_get_db_override: AsyncMock, fake_jobs):
+        from app.main import _fallacy_job, _summarize_job, job_queue
+
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__.return_value = default_get_db_override
+        app.state.pool = pool
+        app.state.openai_client = None
+        await job_queue.start(
+            pool,
+            {"summarize": _summarize_job, "fallacies": _fallacy_job},
+            workers=2,
+        )
+        yield
+        await job_queue.stop()
+        del app.state.pool
+        del app.state.openai_client
+
+    async def _poll(self, ac: httpx.AsyncClient, job_id: str) -> dict:
+        for _ in range(100):
+            job = (await ac.get(f"/api/jobs/{job_id}")).json()
+            if job["status"] in ("succeeded", "failed"):
+                return job
+            await asyncio.sleep(0.01)
+        raise AssertionError(f"job {job_id} did not finish")
+
+    async def test_returns_job_id_then_result(self) -> None:
+        progress: list[str] = []
+
+        async def fake_summary(*_args: object, **kwargs: object) -> SummaryResult:
+            kwargs["on_progress"]("chunks", 0, 1)
+            progress.append("summarized")
+            return SummaryResult("A background summary.", 10, 5)
+
+        url = f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"
+        transport = httpx.ASGITransport(app=app)
+        with (
+            patch("app.main.generate_summary", new=fake_summary),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=("Hello world", []),
+            ),
+            patch("app.main.get_video_metadata", return_value=None),
+        ):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as ac:
+                response = await ac.post(
+                    "/api/summarize", json={"url": url, "background": True}
+                )
+                assert response.status_code == 202
+                queued = response.json()
+                assert queued["status"] == "queued"
+                assert queued["kind"] == "summarize"
+
+                job = await self._poll(ac, queued["job_id"])
+
+        assert progress == ["summarized"]
+        assert job["status"] == "succeeded"
+        assert job["progress"]["stage"] == "persist"
+        assert job["result"]["summary"] == "A background summary."
+        # The transcript is served by /api/history/{video_id}, not the job
+        assert "transcript" not in job["result"]
+        assert job["error"] is None
+
+    async def test_pipeline_errors_fail_the_job(self) -> None:
+        from youtube_transcript_api._errors import VideoUnavailable
+
+        url = f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"
+        transport = httpx.ASGITransport(app=app)
+        with patch(
+            "app.services.transcript.get_transcript",
+            side_effect=VideoUnavailable(_FAKE_VIDEO_ID),
+        ):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as ac:
+                response = await ac.post(
+                    "/api/summarize", json={"url": url, "background": True}
+                )
+                job = await self._poll(ac, response.json()["job_id"])
+
+        assert job["status"] == "failed"
+        assert job["progress"]["stage"] == "transcript"
+        assert job["error"]["error"] == "video_not_found"
+        assert job["result"] is None
+
+    async def test_fallacy_analysis_runs_as_a_job(self) -> None:
+        from app.models import FallacyAnalysisResult, FallacySummary
+
+        analysis = FallacyAnalysisResult(
+            summary=FallacySummary(
+                total_fallacies=0,
+                high_severity=0,
+                medium_severity=0,
+                low_severity=0,
+                primary_tactics=[],
+            ),
+            fallacies=[],
+        )
+        url = f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"
+        transport = httpx.ASGITransport(app=app)
+        with (
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=("Hello world", []),
+            ),
+            patch("app.main.analyze_fallacies", new=AsyncMock(return_value=analysis)),
+        ):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as ac:
+                response = await ac.post(
+                    "/api/fallacies", json={"url": url, "background": True}
+                )
+                assert response.status_code == 202
+                job = await self._poll(ac, response.json()["job_id"])
+
+        assert job["kind"] == "fallacies"
+        assert job["status"] == "succeeded"
+        assert job["progress"]["stage"] == "persist"
+        assert job["result"]["summary"]["total_fallacies"] == 0
+
+    async def test_invalid_url_is_rejected_before_queueing(self) -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.post(
+                "/api/summarize",
+                json={"url": "https://example.com/video", "background": True},
+            )
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "invalid_url"
+
+    async def test_unknown_job_returns_404(self) -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            response = await ac.get("/api/jobs/missing")
+
+        assert response.status_code == 404
+        assert response.json()["error"] == "not_found"
+
+
+class TestSummarizeBatch:
+    """POST /api/summarize/batch streams one NDJSON line per video."""
+
+    @pytest.fixture(autouse=True)
+    def pool(self, default_get_db_override: AsyncMock):
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__.return_value = default_get_db_override
+        app.state.pool = pool
+        yield
+        del app.state.pool
+
+    async def _post(self, body: dict) -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await ac.post("/api/summarize/batch", json=body)
+
+    @staticmethod
+    def _lines(response: httpx.Response) -> list[dict]:
+        import json
+
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    async def test_does_not_hold_a_request_connection(self) -> None:
+        def no_request_connection() -> None:
+            raise AssertionError("batch must not check out a request connection")
+
+        app.dependency_overrides[get_db] = no_request_connection
+        try:
+            response = await self._post(
+                {"urls": [f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}"]}
+            )
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+        assert response.status_code == 200
+
+    async def test_invalid_urls_reject_the_whole_batch(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        response = await self._post(
+            {
+                "urls": [
+                    f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}",
+                    "https://example.com/video",
+                ]
+            }
+        )
+
+        assert response.status_code == 400
+        data = response.json()
+        _assert_error_response(data, "invalid_url")
+        assert "https://example.com/video" in data["details"]
+        default_get_db_override.fetch.assert_not_awaited()
+
+    async def test_cache_hits_come_from_one_query_and_misses_run(
+        self, default_get_db_override: AsyncMock
+    ) -> None:
+        import json
+
+        model, prompt_hash = summary_cache_key()
+        cached_row = {
+            **_FAKE_DB_ROW,
+            "transcript": "Test transcript",
+            "variant": json.dumps(
+                {
+                    "video_id": _FAKE_VIDEO_ID,
+                    "length_percent": 25,
+                    "model": model,
+                    "prompt_hash": prompt_hash,
+                    "summary": "Cached summary.",
+                    "stats": None,
+                    "created_at": _FAKE_CREATED_AT.isoformat(),
+                }
+            ),
+        }
+        default_get_db_override.fetch.return_value = [cached_row]
+        generate = AsyncMock(return_value=SummaryResult("Fresh summary.", 10, 5))
+
+        with (
+            patch("app.main.generate_summary", new=generate),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=("Hello world", []),
+            ),
+            patch("app.main.get_video_metadata", return_value=None),
+        ):
+            response = await self._post(
+                {
+                    "urls": [
+                        f"https://www.youtube.com/watch?v={_FAKE_VIDEO_ID}",
+                        "https://youtu.be/aaaaaaaaaaa",
+                        "https://youtu.be/bbbbbbbbbbb",
+                    ]
+                }
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = self._lines(response)
+        assert lines[0]["video_id"] == _FAKE_VIDEO_ID
+        assert lines[0]["result"]["summary"] == "Cached summary."
+        assert {line["video_id"] for line in lines[1:]} == {
+            "aaaaaaaaaaa",
+            "bbbbbbbbbbb",
+        }
+        assert all(line["result"]["summary"] == "Fresh summary." for line in lines[1:])
+        assert generate.await_count == 2
+
+        query, video_ids, *_ = default_get_db_override.fetch.await_args.args
+        assert "video_id = ANY($1)" in query
+        assert video_ids == [_FAKE_VIDEO_ID, "aaaaaaaaaaa", "bbbbbbbbbbb"]
+        assert default_get_db_override.fetch.await_count == 1
+
+    async def test_misses_run_with_bounded_concurrency(self) -> None:
+        running = 0
+        peak = 0
+
+        async def slow_summary(*_args: object, **_kwargs: object) -> SummaryResult:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return SummaryResult("Summary.", 10, 5)
+
+        urls = [f"https://youtu.be/video{i:06d}" for i in range(6)]
+        with (
+            patch("app.main.settings.batch_max_concurrency", 2),
+            patch("app.main.generate_summary", new=slow_summary),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=("Hello world", []),
+            ),
+            patch("app.main.get_video_metadata", return_value=None),
+        ):
+            response = await self._post({"urls": urls})
+
+        assert len(self._lines(response)) == 6
+        assert peak == 2
+
+    async def test_lines_arrive_in_completion_order(self) -> None:
+        async def summary_by_speed(text: str, **_kwargs: object) -> SummaryResult:
+            await asyncio.sleep(0.05 if text == "slow" else 0)
+            return SummaryResult(f"Summary of {text}.", 10, 5)
+
+        def transcript(video_id: str) -> tuple[str, list]:
+            return ("slow" if video_id == "slowslowslo" else "fast", [])
+
+        with (
+            patch("app.main.generate_summary", new=summary_by_speed),
+            patch("app.services.transcript.get_transcript", side_effect=transcript),
+            patch("app.main.get_video_metadata", return_value=None),
+        ):
+            response = await self._post(
+                {
+                    "urls": [
+                        "https://youtu.be/slowslowslo",
+                        "https://youtu.be/fastfastfas",
+                    ]
+                }
+            )
+
+        assert [line["video_id"] for line in self._lines(response)] == [
+            "fastfastfas",
+            "slowslowslo",
+        ]
+
+    async def test_duplicates_run_once_and_errors_are_per_video(self) -> None:
+        from youtube_transcript_api._errors import TranscriptsDisabled
+
+        with patch(
+            "app.services.transcript.get_transcript",
+            side_effect=TranscriptsDisabled("aaaaaaaaaaa"),
+        ) as mock_transcript:
+            response = await self._post(
+                {
+                    "urls": [
+                        "https://youtu.be/aaaaaaaaaaa",
+                        "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+                    ]
+                }
+            )
+
+        lines = self._lines(response)
+        assert len(lines) == 1
+        assert lines[0]["url"] == "https://youtu.be/aaaaaaaaaaa"
+        assert lines[0]["result"] is None
+        assert lines[0]["error"]["error"] == "transcript_unavailable"
+        assert mock_transcript.call_count == 1
@@ -0,0 +1,173 @@
+import random
+import time
+from unittest.mock import patch
+
+from app.models import ClearExample, Fallacy, FallacyAnalysisResult, FallacySummary
+from app.services.alignment import (
+    NormalizedText,
+    QuoteMatch,
+    align_fallacies,
+    align_quotes,
+    mark_quote,
+)
+from app.services.transcript import Transcript
+
+_TEXT = (
+    "Welcome back, everyone!  Now — everybody knows this is true.\n"
+    "So you should buy it now, before it's too late."
+)
+
+
+def _fallacy(quote: str, timestamp: str | None = None) -> Fallacy:
+    return Fallacy(
+        timestamp=timestamp,
+        quote=quote,
+        fallacy_name="Bandwagon",
+        category="Relevance",
+        severity="medium",
+        explanation="Popularity is not evidence.",
+        clear_example=ClearExample(scenario="s", why_wrong="w"),
+    )
+
+
+def _result(*fallacies: Fallacy) -> FallacyAnalysisResult:
+    return FallacyAnalysisResult(
+        summary=FallacySummary(
+            total_fallacies=len(fallacies),
+            high_severity=0,
+            medium_severity=len(fallacies),
+            low_severity=0,
+            primary_tactics=[],
+        ),
+        fallacies=list(fallacies),
+    )
+
+
+class TestNormalizedText:
+    def test_collapses_punctuation_and_case(self) -> None:
+        normalized = NormalizedText(_TEXT)
+
+        assert normalized.text.startswith("welcome back everyone now everybody")
+
+    def test_positions_map_back_to_the_original(self) -> None:
+        normalized = NormalizedText(_TEXT)
+
+        for word in ("everyone", "everybody", "buy", "late"):
+            position = normalized.text.index(word)
+            assert _TEXT[normalized.original(position) :].lower().startswith(word)
+
+
+class TestAlignQuotes:
+    def test_exact_quotes_ignore_punctuation_and_case(self) -> None:
+        [match] = align_quotes(_TEXT, ["Everybody knows this is true"])
+
+        assert match is not None
+        assert match.exact
+        assert _TEXT[match.start : match.end] == "everybody knows this is true"
+
+    def test_quotes_spanning_line_breaks(self) -> None:
+        [match] = align_quotes(_TEXT, ["this is true. So you should"])
+
+        assert match is not None
+        assert _TEXT[match.start : match.end] == "this is true.\nSo you should"
+
+    def test_paraphrased_quotes_match_approximately(self) -> None:
+        [match] = align_quotes(
+            _TEXT, ["so you should buy this now before its too late"]
+        )
+
+        assert match is not None
+        assert not match.exact
+        assert _TEXT[match.start : match.end].startswith("So you should buy")
+        assert _TEXT[match.start : match.end].endswith("too late")
+
+    def test_quotes_with_multi_character_lowercase_letters(self) -> None:
+        text = "We flew to İstanbul. The trip was done."
+
+        [match] = align_quotes(text, ["İstanbul. The trip"])
+
+        assert match is not None
+        assert match.exact
+        assert text[match.start : match.end] == "İstanbul. The trip"
+
+    def test_fuzzy_search_stops_at_the_work_budget(self) -> None:
+        quote = "so you should buy this now before its too late"
+
+        with patch("app.services.alignment._MAX_FUZZY_CELLS", 100):
+            assert align_quotes(_TEXT, [quote]) == [None]
+        assert align_quotes(_TEXT, [quote]) != [None]
+
+    def test_hallucinated_quotes_are_not_found(self) -> None:
+        assert align_quotes(_TEXT, ["vaccines cause the weather to change", ""]) == [
+            None,
+            None,
+        ]
+
+    def test_many_quotes_in_a_long_transcript_are_fast(self) -> None:
+        rng = random.Random(0)
+        words = [
+            "".join(rng.choices("abcdefghij", k=rng.randint(2, 8))) for _ in range(3000)
+        ]
+        text = " ".join(rng.choices(words, k=90_000))[:500_000]
+        positions = rng.sample(range(len(text) - 200), 100)
+        quotes = [text[p : p + 80].strip() for p in positions]
+
+        t0 = time.perf_counter()
+        matches = align_quotes(text, quotes)
+        elapsed = time.perf_counter() - t0
+
+        assert all(m is not None for m in matches)
+        assert elapsed < 0.5
+
+
+class TestAlignFallacies:
+    def test_found_quotes_get_positions_and_times(self) -> None:
+        segments = [
+            {"text": "Welcome back, everyone!", "start": 0.0, "duration": 2.0},
+            {
+                "text": "Now, everybody knows this is true.",
+                "start": 65.0,
+                "duration": 3.0,
+            },
+        ]
+        transcript = Transcript.from_segments(
+            " ".join(s["text"] for s in segments), segments
+        )
+        result = _result(
+            _fallacy("everybody knows this is true", timestamp="9:99"),
+            _fallacy("the moon is made of cheese", timestamp="0:30"),
+        )
+
+        align_fallacies(result, transcript)
+
+        found, missing = result.fallacies
+        assert found.quote_match == "exact"
+        assert found.timestamp == "1:05"
+        assert found.quote_start is not None and found.quote_end is not None
+        assert transcript.text[found.quote_start : found.quote_end] == (
+            "everybody knows this is true"
+        )
+        assert missing.quote_match == "not_found"
+        assert missing.timestamp == "0:30"
+        assert missing.quote_start is None
+
+    def test_untimed_transcripts_still_get_positions(self) -> None:
+        transcript = Transcript(_TEXT, [], [], [], stored=True)
+        result = _result(_fallacy("welcome back"))
+
+        align_fallacies(result, transcript)
+
+        assert result.fallacies[0].quote_start == 0
+        assert result.fallacies[0].timestamp is None
+
+    def test_marked_quotes_are_not_searched_again(self) -> None:
+        segments = [{"text": _TEXT, "start": 42.0, "duration": 9.0}]
+        transcript = Transcript.from_segments(_TEXT, segments)
+        fallacy = _fallacy("welcome back")
+        mark_quote(fallacy, QuoteMatch(start=0, end=12, exact=True))
+
+        with patch("app.services.alignment.align_quotes", return_value=[]) as search:
+            align_fallacies(_result(fallacy), transcript)
+
+        search.assert_called_once_with(_TEXT, [])
+        assert fallacy.timestamp == "0:42"
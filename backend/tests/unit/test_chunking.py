@@ -0,0 +1,108 @@
+import types
+from unittest.mock import MagicMock, patch
+
+from app.services.chunking import count_tokens, iter_chunks, iter_windows
+
+
+def _count_words(text: str) -> int:
+    """Deterministic stand-in tokenizer: one token per word."""
+    return len(text.split())
+
+
+class TestIterChunks:
+    """Test iter_chunks() with a word-counting tokenizer."""
+
+    def test_is_lazy_generator(self) -> None:
+        chunks = iter_chunks("One. Two.", 10, _count_words)
+
+        assert isinstance(chunks, types.GeneratorType)
+
+    def test_short_text_is_single_chunk(self) -> None:
+        text = "Hello there. This is short."
+
+        assert list(iter_chunks(text, 100, _count_words)) == [text]
+
+    def test_chunks_respect_token_budget(self) -> None:
+        text = " ".join(f"Sentence number {i} is here." for i in range(50))
+
+        chunks = list(iter_chunks(text, 12, _count_words))
+
+        assert len(chunks) > 1
+        assert all(_count_words(c) <= 12 for c in chunks)
+
+    def test_splits_at_sentence_boundaries(self) -> None:
+        text = "One two three. Four five six. Seven eight nine."
+
+        chunks = list(iter_chunks(text, 7, _count_words))
+
+        assert chunks == ["One two three. Four five six.", "Seven eight nine."]
+
+    def test_oversized_sentence_falls_back_to_words(self) -> None:
+        text = "a b c d e f g h i j"
+
+        chunks = list(iter_chunks(text, 4, _count_words))
+
+        assert chunks == ["a b c d", "e f g h", "i j"]
+
+    def test_preserves_all_words_in_order(self) -> None:
+        text = "Alpha beta. Gamma delta epsilon! Zeta eta theta iota? kappa lambda"
+
+        chunks = list(iter_chunks(text, 3, _count_words))
+
+        assert " ".join(chunks).split() == text.split()
+
+    def test_empty_text_yields_nothing(self) -> None:
+        assert list(iter_chunks("   ", 10, _count_words)) == []
+
+
+class TestIterWindows:
+    """Test iter_windows() with a word-counting tokenizer."""
+
+    def test_windows_repeat_trailing_sentences(self) -> None:
+        text = "One two three. Four five six. Seven eight nine. Ten eleven twelve."
+
+        windows = list(iter_windows(text, 6, 3, _count_words))
+
+        assert windows == [
+            "One two three. Four five six.",
+            "Four five six. Seven eight nine.",
+            "Seven eight nine. Ten eleven twelve.",
+        ]
+
+    def test_windows_respect_token_budget(self) -> None:
+        text = " ".join(f"Sentence number {i} is here." for i in range(50))
+
+        windows = list(iter_windows(text, 12, 5, _count_words))
+
+        assert len(windows) > 1
+        assert all(_count_words(w) <= 12 for w in windows)
+
+    def test_every_window_makes_progress(self) -> None:
+        text = "a b c d e f g h i j"
+
+        windows = list(iter_windows(text, 4, 10, _count_words))
+
+        assert windows[-1].endswith("j")
+        assert len(windows) < len(text.split())
+
+    def test_short_text_is_single_window(self) -> None:
+        text = "Hello there. This is short."
+
+        assert list(iter_windows(text, 100, 10, _count_words)) == [text]
+
+
+class TestCountTokens:
+    """Test count_tokens() tokenizer selection."""
+
+    @patch("app.services.chunking._get_encoding")
+    def test_uses_tokenizer_when_available(self, mock_get_encoding: MagicMock) -> None:
+        encoding = MagicMock()
+        encoding.encode_ordinary.return_value = [1, 2, 3]
+        mock_get_encoding.return_value = encoding
+
+        assert count_tokens("some text") == 3
+        encoding.encode_ordinary.assert_called_once_with("some text")
+
+    @patch("app.services.chunking._get_encoding", return_value=None)
+    def test_falls_back_to_char_estimate(self, _mock: MagicMock) -> None:
+        assert count_tokens("x" * 400) == 100
@@ -1,13 +1,30 @@
+import json
 from datetime import UTC, datetime
 from unittest.mock import AsyncMock
 
 from app.db import (
+    advisory_lock,
+    append_qa_exchange,
+    claim_job,
+    complete_job,
+    create_table,
+    fail_job,
     get_by_video_id,
+    get_cached_summaries,
+    get_derivation_source,
     get_full_record,
+    get_qa_messages,
+    get_qa_summary,
+    get_stored_transcript,
+    get_summary_variant,
+    heartbeat_job,
     list_recent,
+    save_qa_summary,
     save_record,
+    save_summary_variant,
+    save_transcript,
 )
-from app.models import HistoryItem, VideoRecord
+from app.models import HistoryItem, SummaryStats, SummaryVariant, VideoRecord
 
 _FAKE_VIDEO_ID = "dQw4w9WgXcQ"
 _FAKE_CREATED_AT = datetime(2026, 1, 1, tzinfo=UTC)
@@ -18,7 +35,6 @@ _FAKE_ROW: dict = {
     "title": "Test Video",
     "thumbnail_url": f"https://i.ytimg.com/vi/{_FAKE_VIDEO_ID}/hqdefault.jpg",
     "summary": "Test summary",
-    "transcript": "Test transcript",
     "created_at": _FAKE_CREATED_AT,
 }
 
@@ -35,7 +51,6 @@ class TestSaveRecord:
             title="Test Video",
             thumbnail_url=f"https://i.ytimg.com/vi/{_FAKE_VIDEO_ID}/hqdefault.jpg",
             summary="Test summary",
-            transcript="Test transcript",
         )
 
         mock_conn.execute.assert_awaited_once()
@@ -43,7 +58,7 @@ class TestSaveRecord:
         assert isinstance(result, VideoRecord)
         assert result.video_id == _FAKE_VIDEO_ID
         assert result.summary == "Test summary"
-        assert result.transcript == "Test transcript"
+        assert result.transcript is None
 
     async def test_save_record_returns_existing_on_conflict(self) -> None:
         """When INSERT conflicts (DO NOTHING), SELECT still returns the existing row."""
@@ -53,7 +68,6 @@ class TestSaveRecord:
             "title": "Existing Title",
             "thumbnail_url": None,
             "summary": "Existing summary",
-            "transcript": "Existing transcript",
             "created_at": _FAKE_CREATED_AT,
         }
 
@@ -67,12 +81,10 @@ class TestSaveRecord:
             title="New Title",
             thumbnail_url=None,
             summary="New summary",
-            transcript="New transcript",
         )
 
         assert result.id == 42
         assert result.summary == "Existing summary"
-        assert result.transcript == "Existing transcript"
 
 
 class TestGetByVideoId:
@@ -96,6 +108,59 @@ class TestGetByVideoId:
         assert isinstance(result, VideoRecord)
         assert result.video_id == _FAKE_VIDEO_ID
 
+    async def test_get_by_video_id_skips_legacy_columns(self) -> None:
+        """The transcript column left on migrated tables is never read."""
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = _FAKE_ROW
+
+        await get_by_video_id(mock_conn, _FAKE_VIDEO_ID)
+
+        query = mock_conn.fetchrow.await_args.args[0]
+        assert "*" not in query
+        assert "transcript" not in query
+
+
+class TestCreateTable:
+    async def test_keeps_legacy_columns_for_older_replicas(self) -> None:
+        """Older replicas still read transcript and qa_history during a rollout."""
+        mock_conn = AsyncMock()
+
+        await create_table(mock_conn)
+
+        statements = [c.args[0] for c in mock_conn.execute.await_args_list]
+        for table in ("transcripts", "qa_messages"):
+            copy = f"INSERT INTO youtube_summarizer.{table} "
+            assert any(copy in s and "SELECT" in s for s in statements)
+        assert not any("DROP COLUMN" in s for s in statements)
+
+    async def test_legacy_transcript_column_defaults_to_empty(self) -> None:
+        """Older replicas read rows created without it as a required string."""
+        mock_conn = AsyncMock()
+
+        await create_table(mock_conn)
+
+        [migration] = [
+            c.args[0]
+            for c in mock_conn.execute.await_args_list
+            if "INSERT INTO youtube_summarizer.transcripts" in c.args[0]
+        ]
+        assert "ALTER COLUMN transcript SET DEFAULT ''" in migration
+        assert "SET transcript = ''" in migration
+        assert "DROP NOT NULL" not in migration
+
+    async def test_qa_history_copy_skips_messages_already_copied(self) -> None:
+        mock_conn = AsyncMock()
+
+        await create_table(mock_conn)
+
+        [copy] = [
+            c.args[0]
+            for c in mock_conn.execute.await_args_list
+            if "jsonb_array_elements" in c.args[0]
+        ]
+        assert "m.ord > (" in copy
+        assert "LOCK TABLE youtube_summarizer.qa_messages" in copy
+
 
 class TestListRecent:
     async def test_list_recent_returns_items_in_order(self) -> None:
@@ -140,17 +205,108 @@ class TestListRecent:
         assert 10 in call_args.args
 
 
+class TestTranscripts:
+    async def test_save_transcript_stores_timing_as_arrays(self) -> None:
+        mock_conn = AsyncMock()
+
+        await save_transcript(
+            mock_conn, _FAKE_VIDEO_ID, "Hello world", [0.0, 1.5], [1.5, 2.0], [0, 6]
+        )
+
+        query, *args = mock_conn.execute.await_args.args
+        assert "ON CONFLICT (video_id) DO NOTHING" in query
+        assert args == [_FAKE_VIDEO_ID, "Hello world", [0.0, 1.5], [1.5, 2.0], [0, 6]]
+
+    async def test_get_stored_transcript_returns_text_and_timing(self) -> None:
+        row = {"text": "Hello", "starts": [0.0], "durations": [1.0], "offsets": [0]}
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = row
+
+        assert await get_stored_transcript(mock_conn, _FAKE_VIDEO_ID) == row
+
+    async def test_get_stored_transcript_returns_none_when_missing(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = None
+
+        assert await get_stored_transcript(mock_conn, _FAKE_VIDEO_ID) is None
+
+
+class TestQaMessages:
+    async def test_append_inserts_the_pair_in_one_statement(self) -> None:
+        mock_conn = AsyncMock()
+
+        await append_qa_exchange(mock_conn, _FAKE_VIDEO_ID, "What?", "That.")
+
+        mock_conn.execute.assert_awaited_once()
+        query, *args = mock_conn.execute.await_args.args
+        assert "INSERT INTO youtube_summarizer.qa_messages" in query
+        assert "deleted_at IS NULL" in query
+        assert args[:3] == [_FAKE_VIDEO_ID, "What?", "That."]
+
+    async def test_append_serializes_pairs_per_video(self) -> None:
+        """Both ids of a pair are drawn under a lock on the video."""
+        mock_conn = AsyncMock()
+
+        await append_qa_exchange(mock_conn, _FAKE_VIDEO_ID, "What?", "That.")
+        await append_qa_exchange(mock_conn, "other", "What?", "That.")
+
+        (query, *first), (_, *second) = [
+            c.args for c in mock_conn.execute.await_args_list
+        ]
+        assert "pg_advisory_xact_lock($4)" in query
+        assert query.index("pg_advisory_xact_lock") < query.index("INSERT")
+        assert first[3] != second[3]
+
+    async def test_get_qa_messages_returns_page_oldest_first(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.fetch.return_value = [
+            {"id": 2, "role": "assistant", "content": "That."},
+            {"id": 1, "role": "user", "content": "What?"},
+        ]
+
+        messages = await get_qa_messages(mock_conn, _FAKE_VIDEO_ID, limit=2)
+
+        assert [m.id for m in messages] == [1, 2]
+        assert mock_conn.fetch.await_args.args[1:] == (_FAKE_VIDEO_ID, None, 2)
+
+
+class TestQaSummary:
+    async def test_get_qa_summary_returns_text_and_coverage(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = {
+            "text": "Asked about X.",
+            "covers": 4,
+            "digest": "abc",
+        }
+
+        assert await get_qa_summary(mock_conn, _FAKE_VIDEO_ID) == {
+            "text": "Asked about X.",
+            "covers": 4,
+            "digest": "abc",
+        }
+
+    async def test_save_qa_summary_stores_the_digest(self) -> None:
+        mock_conn = AsyncMock()
+
+        await save_qa_summary(mock_conn, _FAKE_VIDEO_ID, "Asked about X.", 4, "abc")
+
+        query, *args = mock_conn.execute.await_args.args
+        assert "qa_summary_digest = $4" in query
+        assert args == [_FAKE_VIDEO_ID, "Asked about X.", 4, "abc"]
+
+
 class TestGetFullRecord:
     async def test_get_full_record_returns_transcript(self) -> None:
         """get_full_record returns a VideoRecord including the full transcript field."""
         mock_conn = AsyncMock()
-        mock_conn.fetchrow.return_value = _FAKE_ROW
+        mock_conn.fetchrow.return_value = {**_FAKE_ROW, "transcript": "Test transcript"}
 
         result = await get_full_record(mock_conn, _FAKE_VIDEO_ID)
 
         assert isinstance(result, VideoRecord)
         assert result.transcript == "Test transcript"
         assert result.video_id == _FAKE_VIDEO_ID
+        assert "youtube_summarizer.transcripts" in mock_conn.fetchrow.await_args.args[0]
 
     async def test_get_full_record_returns_none_when_missing(self) -> None:
         """get_full_record returns None when the video_id is not in the DB."""
@@ -160,3 +316,235 @@ class TestGetFullRecord:
         result = await get_full_record(mock_conn, "notfound1234")
 
         assert result is None
+
+
+class TestSummaryVariants:
+    _STATS = SummaryStats(
+        chars_in=1000, chars_out=100, total_tokens=300, generation_seconds=1.5
+    )
+
+    async def test_get_summary_variant_queries_full_key(self) -> None:
+        """get_summary_variant filters on every part of the cache key."""
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = None
+
+        result = await get_summary_variant(
+            mock_conn, _FAKE_VIDEO_ID, 10, "gpt-4o-mini", "abc123"
+        )
+
+        assert result is None
+        call_args = mock_conn.fetchrow.call_args.args
+        assert call_args[1:] == (_FAKE_VIDEO_ID, 10, "gpt-4o-mini", "abc123")
+
+    async def test_get_summary_variant_parses_stats_json(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = {
+            "id": 7,
+            "video_id": _FAKE_VIDEO_ID,
+            "length_percent": 10,
+            "model": "gpt-4o-mini",
+            "prompt_hash": "abc123",
+            "summary": "Short summary",
+            "stats": json.dumps(self._STATS.model_dump()),
+            "created_at": _FAKE_CREATED_AT,
+        }
+
+        result = await get_summary_variant(
+            mock_conn, _FAKE_VIDEO_ID, 10, "gpt-4o-mini", "abc123"
+        )
+
+        assert isinstance(result, SummaryVariant)
+        assert result.summary == "Short summary"
+        assert result.stats == self._STATS
+
+    async def test_save_summary_variant_keeps_existing_on_conflict(self) -> None:
+        mock_conn = AsyncMock()
+
+        await save_summary_variant(
+            mock_conn,
+            _FAKE_VIDEO_ID,
+            10,
+            "gpt-4o-mini",
+            "abc123",
+            "Short summary",
+            self._STATS,
+        )
+
+        query, *params = mock_conn.execute.call_args.args
+        assert "DO NOTHING" in query
+        assert params[:5] == [
+            _FAKE_VIDEO_ID,
+            10,
+            "gpt-4o-mini",
+            "abc123",
+            "Short summary",
+        ]
+        assert json.loads(params[5]) == self._STATS.model_dump()
+
+    async def test_get_derivation_source_prefers_closest_generated_variant(
+        self,
+    ) -> None:
+        """Only longer, non-derived variants qualify, closest length first."""
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = None
+
+        await get_derivation_source(
+            mock_conn, _FAKE_VIDEO_ID, 10, "gpt-4o-mini", "abc123"
+        )
+
+        query, *params = mock_conn.fetchrow.call_args.args
+        assert "length_percent > $4" in query
+        assert "'derived'" in query
+        assert "ORDER BY length_percent ASC LIMIT 1" in query
+        assert params == [_FAKE_VIDEO_ID, "gpt-4o-mini", "abc123", 10]
+
+
+class TestGetCachedSummaries:
+    async def test_resolves_many_videos_in_one_query(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.fetch.return_value = [
+            {
+                **_FAKE_ROW,
+                "variant": json.dumps(
+                    {
+                        "id": 7,
+                        "video_id": _FAKE_VIDEO_ID,
+                        "length_percent": 25,
+                        "model": "gpt-4o-mini",
+                        "prompt_hash": "abc123",
+                        "summary": "Variant summary",
+                        "stats": {
+                            "chars_in": 1000,
+                            "chars_out": 100,
+                            "total_tokens": 300,
+                            "generation_seconds": 1.5,
+                        },
+                        "created_at": _FAKE_CREATED_AT.isoformat(),
+                    }
+                ),
+            }
+        ]
+
+        result = await get_cached_summaries(
+            mock_conn, [_FAKE_VIDEO_ID, "missing0000"], 25, "gpt-4o-mini", "abc123"
+        )
+
+        mock_conn.fetch.assert_awaited_once()
+        query, *params = mock_conn.fetch.call_args.args
+        assert "s.video_id = ANY($1)" in query
+        assert params == [[_FAKE_VIDEO_ID, "missing0000"], 25, "gpt-4o-mini", "abc123"]
+        record, variant = result[_FAKE_VIDEO_ID]
+        assert record.summary == "Test summary"
+        assert variant.summary == "Variant summary"
+        assert variant.stats is not None
+        assert variant.stats.total_tokens == 300
+        assert "missing0000" not in result
+
+
+class TestAdvisoryLock:
+    async def test_locks_and_unlocks_same_key(self) -> None:
+        mock_conn = AsyncMock()
+
+        async with advisory_lock(mock_conn, "summary:abc:25"):
+            lock_sql, lock_id = mock_conn.execute.call_args.args
+            assert "pg_advisory_lock" in lock_sql
+
+        unlock_sql, unlock_id = mock_conn.execute.call_args.args
+        assert "pg_advisory_unlock" in unlock_sql
+        assert unlock_id == lock_id
+        assert -(2**63) <= lock_id < 2**63
+
+    async def test_unlocks_on_error(self) -> None:
+        mock_conn = AsyncMock()
+
+        try:
+            async with advisory_lock(mock_conn, "fallacies:abc"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+
+        assert "pg_advisory_unlock" in mock_conn.execute.call_args.args[0]
+
+    async def test_names_map_to_distinct_locks(self) -> None:
+        ids = []
+        for name in ("summary:a:25", "summary:a:50"):
+            mock_conn = AsyncMock()
+            async with advisory_lock(mock_conn, name):
+                ids.append(mock_conn.execute.call_args.args[1])
+
+        assert ids[0] != ids[1]
+
+
+_FAKE_JOB_ROW: dict = {
+    "id": "job1",
+    "kind": "summarize",
+    "payload": json.dumps({"video_id": _FAKE_VIDEO_ID, "length_percent": 25}),
+    "status": "running",
+    "progress": json.dumps({"stage": "chunks", "current": 2, "total": 4}),
+    "result": None,
+    "error": None,
+    "attempts": 1,
+    "max_attempts": 3,
+    "run_after": _FAKE_CREATED_AT,
+    "lease_owner": "worker-a",
+    "lease_expires_at": _FAKE_CREATED_AT,
+    "created_at": _FAKE_CREATED_AT,
+    "updated_at": _FAKE_CREATED_AT,
+}
+
+
+class TestJobs:
+    async def test_claim_skips_rows_locked_by_other_workers(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = _FAKE_JOB_ROW
+
+        job = await claim_job(mock_conn, "worker-a", 60)
+
+        query, worker_id, lease = mock_conn.fetchrow.call_args.args
+        assert "FOR UPDATE SKIP LOCKED" in query
+        assert "lease_expires_at < now()" in query
+        assert "attempts < max_attempts" in query
+        assert (worker_id, lease) == ("worker-a", 60)
+        assert job is not None
+        assert job.job_id == "job1"
+        assert job.payload == {"video_id": _FAKE_VIDEO_ID, "length_percent": 25}
+        assert job.progress is not None
+        assert job.progress.current == 2
+
+    async def test_claim_returns_none_when_nothing_is_runnable(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.fetchrow.return_value = None
+
+        assert await claim_job(mock_conn, "worker-a", 60) is None
+
+    async def test_heartbeat_reports_a_lost_lease(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.execute.return_value = "UPDATE 0"
+
+        owned = await heartbeat_job(mock_conn, "job1", "worker-a", 60, None)
+
+        assert owned is False
+        assert "lease_owner = $2" in mock_conn.execute.call_args.args[0]
+
+    async def test_fail_job_requeues_only_with_a_retry_delay(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.execute.return_value = "UPDATE 1"
+        error = {"error": "internal_error", "message": "boom", "details": None}
+
+        await fail_job(mock_conn, "job1", "worker-a", error, None, retry_delay=10.0)
+        retry_args = mock_conn.execute.call_args.args
+        await fail_job(mock_conn, "job1", "worker-a", error, None, retry_delay=None)
+        final_args = mock_conn.execute.call_args.args
+
+        assert "attempts < max_attempts" in retry_args[0]
+        assert retry_args[4:6] == (True, 10.0)
+        assert final_args[4:6] == (False, 0.0)
+
+    async def test_complete_job_stores_the_result(self) -> None:
+        mock_conn = AsyncMock()
+        mock_conn.execute.return_value = "UPDATE 1"
+
+        done = await complete_job(mock_conn, "job1", "worker-a", {"summary": "S"}, None)
+
+        assert done is True
+        assert json.loads(mock_conn.execute.call_args.args[3]) == {"summary": "S"}
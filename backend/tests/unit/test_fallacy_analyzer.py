@@ -1,7 +1,9 @@
+import asyncio
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.services.fallacy_analyzer import analyze_fallacies
+from app.models import ClearExample, Fallacy, FallacyAnalysisResult, FallacySummary
+from app.services.fallacy_analyzer import analyze_fallacies, merge_results
 
 
 def _make_valid_response_json() -> str:
@@ -33,9 +35,37 @@ def _make_valid_response_json() -> str:
     )
 
 
+def _count_words(text: str) -> int:
+    return len(text.split())
+
+
+def _fallacy(quote: str, name: str = "Ad Hominem", severity: str = "high") -> Fallacy:
+    return Fallacy(
+        quote=quote,
+        fallacy_name=name,
+        category="Relevance",
+        severity=severity,
+        explanation="Attacks the person rather than the argument.",
+        clear_example=ClearExample(scenario="A", why_wrong="B"),
+    )
+
+
+def _result(*fallacies: Fallacy) -> FallacyAnalysisResult:
+    return FallacyAnalysisResult(
+        summary=FallacySummary(
+            total_fallacies=len(fallacies),
+            high_severity=0,
+            medium_severity=0,
+            low_severity=0,
+            primary_tactics=[],
+        ),
+        fallacies=list(fallacies),
+    )
+
+
 class TestAnalyzeFallacies:
-    @patch("app.services.fallacy_analyzer.OpenAI")
-    def test_returns_fallacy_analysis_result(
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_returns_fallacy_analysis_result(
         self, mock_openai_class: MagicMock
     ) -> None:
         mock_client = MagicMock()
@@ -43,17 +73,18 @@ class TestAnalyzeFallacies:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = _make_valid_response_json()
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
-        result = analyze_fallacies("Some transcript text.")
+        result = await analyze_fallacies("Some transcript text.")
 
         assert result is not None
         assert result.summary.total_fallacies == 1
         assert len(result.fallacies) == 1
         assert result.fallacies[0].fallacy_name == "Ad Hominem"
 
-    @patch("app.services.fallacy_analyzer.OpenAI")
-    def test_system_prompt_contains_fallacy_instructions(
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_system_prompt_contains_fallacy_instructions(
         self, mock_openai_class: MagicMock
     ) -> None:
         mock_client = MagicMock()
@@ -61,17 +92,18 @@ class TestAnalyzeFallacies:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = _make_valid_response_json()
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
-        analyze_fallacies("Some text.")
+        await analyze_fallacies("Some text.")
 
         call_kwargs = mock_client.chat.completions.create.call_args
         messages = call_kwargs.kwargs["messages"]
         system_msg = next(m for m in messages if m["role"] == "system")
         assert "fallac" in system_msg["content"].lower()
 
-    @patch("app.services.fallacy_analyzer.OpenAI")
-    def test_transcript_passed_as_user_message(
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_transcript_passed_as_user_message(
         self, mock_openai_class: MagicMock
     ) -> None:
         mock_client = MagicMock()
@@ -79,68 +111,267 @@ class TestAnalyzeFallacies:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = _make_valid_response_json()
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
-        analyze_fallacies("My specific transcript content.")
+        await analyze_fallacies("My specific transcript content.")
 
         call_kwargs = mock_client.chat.completions.create.call_args
         messages = call_kwargs.kwargs["messages"]
         user_msg = next(m for m in messages if m["role"] == "user")
         assert "My specific transcript content." in user_msg["content"]
 
-    @patch("app.services.fallacy_analyzer.OpenAI")
-    def test_uses_json_mode(self, mock_openai_class: MagicMock) -> None:
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_uses_json_mode(self, mock_openai_class: MagicMock) -> None:
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = _make_valid_response_json()
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
-        analyze_fallacies("Some text.")
+        await analyze_fallacies("Some text.")
 
         call_kwargs = mock_client.chat.completions.create.call_args
         assert call_kwargs.kwargs["response_format"] == {"type": "json_object"}
 
-    @patch("app.services.fallacy_analyzer.OpenAI")
-    def test_returns_none_on_malformed_json(self, mock_openai_class: MagicMock) -> None:
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_returns_none_on_malformed_json(
+        self, mock_openai_class: MagicMock
+    ) -> None:
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = '{"bad": "data"}'
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
-        result = analyze_fallacies("Some text.")
+        result = await analyze_fallacies("Some text.")
 
         assert result is None
 
-    @patch("app.services.fallacy_analyzer.OpenAI")
-    def test_returns_none_on_api_error(self, mock_openai_class: MagicMock) -> None:
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_returns_none_on_api_error(
+        self, mock_openai_class: MagicMock
+    ) -> None:
         from openai import APIError
 
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.side_effect = APIError(
-            message="Rate limit exceeded",
-            request=MagicMock(),
-            body=None,
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=APIError(
+                message="Rate limit exceeded",
+                request=MagicMock(),
+                body=None,
+            )
         )
 
-        result = analyze_fallacies("Some text.")
+        result = await analyze_fallacies("Some text.")
 
         assert result is None
 
-    @patch("app.services.fallacy_analyzer.OpenAI")
-    def test_uses_30s_timeout(self, mock_openai_class: MagicMock) -> None:
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_uses_30s_timeout(self, mock_openai_class: MagicMock) -> None:
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = _make_valid_response_json()
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
-        analyze_fallacies("Some text.")
+        await analyze_fallacies("Some text.")
 
         call_kwargs = mock_client.chat.completions.create.call_args
         assert call_kwargs.kwargs.get("timeout") == 30
+
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_unparseable_response_is_not_cached(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        bad_response = MagicMock()
+        bad_response.choices = [MagicMock()]
+        bad_response.choices[0].message.content = '{"bad": "data"}'
+        bad_response.usage = None
+        good_response = MagicMock()
+        good_response.choices = [MagicMock()]
+        good_response.choices[0].message.content = _make_valid_response_json()
+        good_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=[bad_response, good_response]
+        )
+
+        assert await analyze_fallacies("Some text.") is None
+        result = await analyze_fallacies("Some text.")
+
+        assert result is not None
+        assert mock_client.chat.completions.create.call_count == 2
+
+    @patch("app.services.llm.llm_scheduler")
+    @patch("app.services.fallacy_analyzer.AsyncOpenAI")
+    async def test_queues_behind_interactive_calls(
+        self, mock_openai_class: MagicMock, mock_scheduler: MagicMock
+    ) -> None:
+        from app.services.scheduler import Priority
+
+        mock_scheduler.acquire = AsyncMock()
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = _make_valid_response_json()
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        await analyze_fallacies("Some text.")
+
+        assert mock_scheduler.acquire.call_args.args[1] == Priority.BACKGROUND
+
+
+class TestChunkedAnalysis:
+    @patch("app.services.fallacy_analyzer.count_tokens", _count_words)
+    @patch("app.services.fallacy_analyzer.settings")
+    async def test_long_transcript_is_analyzed_in_windows(
+        self, mock_settings: MagicMock
+    ) -> None:
+        mock_settings.fallacy_chunk_tokens = 6
+        mock_settings.fallacy_chunk_overlap_tokens = 3
+        mock_settings.fallacy_max_concurrency = 2
+        mock_client = MagicMock()
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = _make_valid_response_json()
+        mock_response.usage = None
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        progress: list[tuple[str, int, int]] = []
+
+        result = await analyze_fallacies(
+            "One two three. Four five six. Seven eight nine.",
+            client=mock_client,
+            on_progress=lambda *args: progress.append(args),
+        )
+
+        assert mock_client.chat.completions.create.call_count == 2
+        assert progress[0] == ("analyze", 0, 2)
+        assert progress[-1] == ("analyze", 2, 2)
+        # Both windows reported the same unlocatable quote; it is kept once
+        assert result is not None
+        assert result.summary.total_fallacies == 1
+
+    @patch("app.services.fallacy_analyzer.count_tokens", _count_words)
+    @patch("app.services.fallacy_analyzer.settings")
+    async def test_windows_are_merged_off_the_event_loop(
+        self, mock_settings: MagicMock
+    ) -> None:
+        mock_settings.fallacy_chunk_tokens = 6
+        mock_settings.fallacy_chunk_overlap_tokens = 3
+        mock_settings.fallacy_max_concurrency = 2
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = _make_valid_response_json()
+        mock_response.usage = None
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        on_loop: list[bool] = []
+
+        def merge(
+            text: str, results: list[FallacyAnalysisResult]
+        ) -> FallacyAnalysisResult:
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return merge_results(text, results)
+
+        with patch("app.services.fallacy_analyzer.merge_results", merge):
+            result = await analyze_fallacies(
+                "One two three. Four five six. Seven eight nine.", client=mock_client
+            )
+
+        assert result is not None
+        assert on_loop == [False]
+
+    @patch("app.services.fallacy_analyzer.count_tokens", _count_words)
+    @patch("app.services.fallacy_analyzer.settings")
+    async def test_failed_window_fails_the_analysis(
+        self, mock_settings: MagicMock
+    ) -> None:
+        mock_settings.fallacy_chunk_tokens = 6
+        mock_settings.fallacy_chunk_overlap_tokens = 3
+        mock_settings.fallacy_max_concurrency = 1
+        good = MagicMock()
+        good.choices = [MagicMock()]
+        good.choices[0].message.content = _make_valid_response_json()
+        good.usage = None
+        bad = MagicMock()
+        bad.choices = [MagicMock()]
+        bad.choices[0].message.content = '{"bad": "data"}'
+        bad.usage = None
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=[good, bad])
+
+        result = await analyze_fallacies(
+            "One two three. Four five six. Seven eight nine.", client=mock_client
+        )
+
+        assert result is None
+
+
+class TestMergeResults:
+    def test_overlapping_quotes_with_same_name_are_merged(self) -> None:
+        text = "He is a liar so his plan for the bridge is wrong and also costly."
+
+        result = merge_results(
+            text,
+            [
+                _result(_fallacy("He is a liar so his plan")),
+                _result(_fallacy("his plan for the bridge is wrong")),
+            ],
+        )
+
+        assert [f.quote for f in result.fallacies] == ["He is a liar so his plan"]
+        # Spans found while merging are kept for align_fallacies
+        assert result.fallacies[0].quote_match == "exact"
+        assert result.fallacies[0].quote_start == 0
+
+    def test_different_fallacies_on_same_quote_are_kept(self) -> None:
+        text = "Everyone knows he is a liar, so the plan is wrong."
+
+        result = merge_results(
+            text,
+            [
+                _result(_fallacy("he is a liar, so the plan is wrong")),
+                _result(
+                    _fallacy("Everyone knows he is a liar", name="Bandwagon"),
+                ),
+            ],
+        )
+
+        assert len(result.fallacies) == 2
+
+    def test_summary_is_recounted(self) -> None:
+        text = "First claim here now. Second claim there then. Third one again too."
+
+        result = merge_results(
+            text,
+            [
+                _result(
+                    _fallacy("First claim here now"),
+                    _fallacy("Second claim there then", severity="Medium"),
+                ),
+                _result(
+                    _fallacy("Third one again too", name="Straw Man", severity="low")
+                ),
+            ],
+        )
+
+        assert result.summary.total_fallacies == 3
+        assert result.summary.high_severity == 1
+        assert result.summary.medium_severity == 1
+        assert result.summary.low_severity == 1
+        assert result.summary.primary_tactics == ["Ad Hominem", "Straw Man"]
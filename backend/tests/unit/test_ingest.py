@@ -0,0 +1,161 @@
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from youtube_transcript_api._errors import TranscriptsDisabled
+
+from app.ingest import Checkpoint, ingest_video, main, read_urls, run
+from app.services.summarizer import SummaryResult
+
+
+def _pool() -> MagicMock:
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = AsyncMock()
+    return pool
+
+
+class TestReadUrls:
+    def test_skips_blank_lines_and_comments(self, tmp_path: Path) -> None:
+        path = tmp_path / "urls.txt"
+        path.write_text(
+            "# reading list\n"
+            "https://youtu.be/aaaaaaaaaaa\n"
+            "\n"
+            "  https://youtu.be/bbbbbbbbbbb  \n"
+        )
+
+        assert read_urls(path) == [
+            "https://youtu.be/aaaaaaaaaaa",
+            "https://youtu.be/bbbbbbbbbbb",
+        ]
+
+
+class TestCheckpoint:
+    def test_records_survive_a_restart(self, tmp_path: Path) -> None:
+        path = tmp_path / "data" / "ingest.checkpoint"
+        Checkpoint(path).record("aaaaaaaaaaa", "ok")
+
+        assert Checkpoint(path).done == {"aaaaaaaaaaa"}
+
+
+class TestIngestVideo:
+    async def test_stored_videos_are_not_summarized_again(self) -> None:
+        conn = AsyncMock()
+        with (
+            patch("app.ingest.get_by_video_id", new=AsyncMock(return_value=object())),
+            patch("app.ingest.generate_summary", new=AsyncMock()) as generate,
+        ):
+            tokens = await ingest_video(conn, MagicMock(), "aaaaaaaaaaa", 25)
+
+        assert tokens is None
+        generate.assert_not_awaited()
+
+    async def test_saves_record_and_variant(self) -> None:
+        conn = AsyncMock()
+        conn.fetchrow.return_value = None  # no stored transcript
+        save_record = AsyncMock()
+        save_variant = AsyncMock()
+        with (
+            patch("app.ingest.get_by_video_id", new=AsyncMock(return_value=None)),
+            patch(
+                "app.services.transcript.get_transcript",
+                return_value=("Hello world", []),
+            ),
+            patch("app.ingest.get_video_metadata", return_value=None),
+            patch(
+                "app.ingest.generate_summary",
+                new=AsyncMock(return_value=SummaryResult("Summary.", 30, 12)),
+            ),
+            patch("app.ingest.save_record", new=save_record),
+            patch("app.ingest.save_summary_variant", new=save_variant),
+        ):
+            tokens = await ingest_video(conn, MagicMock(), "aaaaaaaaaaa", 25)
+
+        assert tokens == 42
+        assert save_record.await_args.kwargs["summary"] == "Summary."
+        assert save_variant.await_args.args[2] == 25
+
+
+class TestRun:
+    async def test_resumes_from_checkpoint(self, tmp_path: Path) -> None:
+        checkpoint = Checkpoint(tmp_path / "ingest.checkpoint")
+        checkpoint.record("aaaaaaaaaaa", "ok")
+        ingest = AsyncMock(return_value=100)
+
+        with patch("app.ingest.ingest_video", new=ingest):
+            stats = await run(
+                [
+                    "https://youtu.be/aaaaaaaaaaa",
+                    "https://youtu.be/bbbbbbbbbbb",
+                    "https://youtu.be/ccccccccccc",
+                    "https://www.youtube.com/watch?v=ccccccccccc",
+                    "not a url",
+                ],
+                pool=_pool(),
+                client=MagicMock(),
+                checkpoint=checkpoint,
+                workers=2,
+                length_percent=25,
+                progress_interval=60,
+            )
+
+        assert sorted(c.args[2] for c in ingest.await_args_list) == [
+            "bbbbbbbbbbb",
+            "ccccccccccc",
+        ]
+        assert stats.summarized == 2
+        assert stats.tokens == 200
+        assert Checkpoint(checkpoint.path).done == {
+            "aaaaaaaaaaa",
+            "bbbbbbbbbbb",
+            "ccccccccccc",
+        }
+
+    async def test_only_permanent_failures_are_checkpointed(
+        self, tmp_path: Path
+    ) -> None:
+        checkpoint = Checkpoint(tmp_path / "ingest.checkpoint")
+
+        async def ingest(_conn: object, _client: object, video_id: str, _lp: int):
+            if video_id == "aaaaaaaaaaa":
+                raise TranscriptsDisabled(video_id)
+            raise RuntimeError("database went away")
+
+        with patch("app.ingest.ingest_video", new=ingest):
+            stats = await run(
+                ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"],
+                pool=_pool(),
+                client=MagicMock(),
+                checkpoint=checkpoint,
+                workers=1,
+                length_percent=25,
+                progress_interval=60,
+            )
+
+        assert stats.failed == 2
+        assert Checkpoint(checkpoint.path).done == {"aaaaaaaaaaa"}
+
+    async def test_prints_throughput(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        with patch("app.ingest.ingest_video", new=AsyncMock(return_value=500)):
+            await run(
+                ["https://youtu.be/aaaaaaaaaaa"],
+                pool=_pool(),
+                client=MagicMock(),
+                checkpoint=Checkpoint(tmp_path / "ingest.checkpoint"),
+                workers=1,
+                length_percent=25,
+                progress_interval=60,
+            )
+
+        out = capsys.readouterr().out
+        assert "1/1 videos" in out
+        assert "videos/min" in out
+        assert "tokens/min" in out
+
+
+class TestMain:
+    def test_rejects_invalid_length_percent(self) -> None:
+        with pytest.raises(SystemExit):
+            main(["urls.txt", "--length-percent", "12"])
@@ -0,0 +1,243 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.config import settings
+from app.models import ErrorResponse, SummarizeResponse
+from app.services.jobs import JobFailedError, JobQueue, ProgressCallback, retry_delay
+from tests.conftest import FakeJobTable
+
+
+@pytest.fixture(autouse=True)
+def fast_jobs(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "job_poll_seconds", 0.01)
+    monkeypatch.setattr(settings, "job_retry_backoff_seconds", 0.01)
+    monkeypatch.setattr(settings, "job_max_attempts", 3)
+
+
+@pytest.fixture
+async def queue(fake_jobs: FakeJobTable) -> AsyncIterator[JobQueue]:
+    queue = JobQueue()
+    yield queue
+    await queue.stop()
+
+
+async def _start(queue: JobQueue, handler: Any, workers: int = 1) -> None:
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.return_value = AsyncMock()
+    await queue.start(pool, {"summarize": handler}, workers=workers)
+
+
+async def _wait_for_status(table: FakeJobTable, job_id: str, *statuses: str) -> None:
+    for _ in range(200):
+        if table.rows[job_id]["status"] in statuses:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {statuses}")
+
+
+def _response(summary: str) -> SummarizeResponse:
+    return SummarizeResponse(summary=summary, transcript="transcript")
+
+
+class TestJobQueue:
+    async def test_runs_job_and_stores_result(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            report("chunks", 1, 2)
+            return _response(f"summary of {payload['video_id']}")
+
+        await _start(queue, run)
+        job = await queue.submit(AsyncMock(), "summarize", {"video_id": "abc"})
+        assert job.status == "queued"
+        await _wait_for_status(fake_jobs, job.job_id, "succeeded")
+
+        row = fake_jobs.rows[job.job_id]
+        assert row["result"]["summary"] == "summary of abc"
+        assert row["progress"] == {"stage": "chunks", "current": 1, "total": 2}
+        assert row["attempts"] == 1
+        assert row["lease_owner"] is None
+
+    async def test_progress_is_written_while_running(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        release = asyncio.Event()
+
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            report("transcript", 0, 1)
+            await release.wait()
+            return _response("done")
+
+        await _start(queue, run)
+        job = await queue.submit(AsyncMock(), "summarize", {})
+        await _wait_for_status(fake_jobs, job.job_id, "running")
+        await asyncio.sleep(0.05)
+
+        assert fake_jobs.rows[job.job_id]["progress"]["stage"] == "transcript"
+        release.set()
+        await _wait_for_status(fake_jobs, job.job_id, "succeeded")
+
+    async def test_client_errors_fail_without_retry(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            raise JobFailedError(
+                ErrorResponse(error="video_not_found", message="Gone.")
+            )
+
+        await _start(queue, run)
+        job = await queue.submit(AsyncMock(), "summarize", {})
+        await _wait_for_status(fake_jobs, job.job_id, "failed")
+
+        row = fake_jobs.rows[job.job_id]
+        assert row["error"]["error"] == "video_not_found"
+        assert row["attempts"] == 1
+
+    async def test_retryable_errors_are_retried_with_backoff(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        attempts = 0
+
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise JobFailedError(
+                    ErrorResponse(error="summarization_failed", message="Later."),
+                    retryable=True,
+                )
+            return _response("second time lucky")
+
+        await _start(queue, run)
+        job = await queue.submit(AsyncMock(), "summarize", {})
+        await _wait_for_status(fake_jobs, job.job_id, "succeeded")
+
+        row = fake_jobs.rows[job.job_id]
+        assert row["attempts"] == 2
+        assert row["result"]["summary"] == "second time lucky"
+        assert row["error"] is None
+
+    async def test_unexpected_errors_fail_after_max_attempts(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            raise RuntimeError("boom")
+
+        await _start(queue, run)
+        job = await queue.submit(AsyncMock(), "summarize", {})
+        await _wait_for_status(fake_jobs, job.job_id, "failed")
+
+        row = fake_jobs.rows[job.job_id]
+        assert row["attempts"] == 3
+        assert row["error"]["error"] == "internal_error"
+
+    async def test_expired_lease_is_taken_over(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            return _response("recovered")
+
+        job = await fake_jobs.insert_job(None, "orphan", "summarize", {}, 3)
+        fake_jobs.rows[job.job_id].update(
+            status="running",
+            attempts=1,
+            lease_owner="dead-replica",
+            lease_expires_at=time.monotonic() - 1,
+        )
+        await _start(queue, run)
+        await _wait_for_status(fake_jobs, job.job_id, "succeeded")
+
+        assert fake_jobs.rows[job.job_id]["attempts"] == 2
+
+    async def test_lost_lease_cancels_the_work(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        cancelled = asyncio.Event()
+        report_progress: ProgressCallback | None = None
+
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            nonlocal report_progress
+            report_progress = report
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return _response("never")
+
+        await _start(queue, run)
+        job = await queue.submit(AsyncMock(), "summarize", {})
+        await _wait_for_status(fake_jobs, job.job_id, "running")
+        await asyncio.sleep(0.01)
+
+        # Another replica took the job over; the next heartbeat notices
+        fake_jobs.rows[job.job_id]["lease_owner"] = "other-replica"
+        assert report_progress is not None
+        report_progress("chunks", 1, 2)
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+        assert fake_jobs.rows[job.job_id]["status"] == "running"
+        assert fake_jobs.rows[job.job_id]["lease_owner"] == "other-replica"
+
+    async def test_heartbeat_gives_up_on_a_busy_pool_before_the_lease_ends(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        renewed = asyncio.Event()
+
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            report("chunks", 1, 2)
+            await renewed.wait()
+            return _response("done")
+
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__.return_value = AsyncMock()
+
+        def acquire(timeout: float | None = None) -> MagicMock:
+            if timeout is not None:
+                renewed.set()
+                raise TimeoutError  # every connection is busy
+            return pool.acquire.return_value
+
+        pool.acquire.side_effect = acquire
+        await queue.start(pool, {"summarize": run}, workers=1)
+        job = await queue.submit(AsyncMock(), "summarize", {})
+        await _wait_for_status(fake_jobs, job.job_id, "succeeded")
+
+        timeouts = [
+            c.kwargs["timeout"] for c in pool.acquire.call_args_list if c.kwargs
+        ]
+        assert timeouts
+        assert all(t < settings.job_lease_seconds for t in timeouts)
+
+    async def test_workers_bound_concurrency(
+        self, queue: JobQueue, fake_jobs: FakeJobTable
+    ) -> None:
+        running = 0
+        peak = 0
+
+        async def run(payload: dict, report: ProgressCallback) -> SummarizeResponse:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return _response("done")
+
+        await _start(queue, run, workers=2)
+        jobs = [await queue.submit(AsyncMock(), "summarize", {}) for _ in range(5)]
+        for job in jobs:
+            await _wait_for_status(fake_jobs, job.job_id, "succeeded")
+
+        assert peak == 2
+
+
+class TestRetryDelay:
+    def test_doubles_with_each_attempt(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(settings, "job_retry_backoff_seconds", 5.0)
+
+        assert [retry_delay(n) for n in (1, 2, 3)] == [5.0, 10.0, 20.0]
@@ -0,0 +1,305 @@
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+
+from app.config import settings
+from app.services.llm import (
+    LLMCache,
+    OpenAIResult,
+    cache_key,
+    chat_completion,
+    create_openai_client,
+    llm_cache,
+    stream_completion,
+)
+
+_MESSAGES = [
+    {"role": "system", "content": "Be brief."},
+    {"role": "user", "content": "Hello"},
+]
+
+
+def _make_response(content: str, prompt: int = 10, completion: int = 2) -> MagicMock:
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    response.usage.prompt_tokens = prompt
+    response.usage.completion_tokens = completion
+    return response
+
+
+def _make_stream(deltas: list[str], prompt: int = 10, completion: int = 2) -> MagicMock:
+    chunks = []
+    for delta in deltas:
+        chunk = MagicMock()
+        chunk.usage = None
+        chunk.choices[0].delta.content = delta
+        chunks.append(chunk)
+    final = MagicMock()
+    final.choices = []
+    final.usage.prompt_tokens = prompt
+    final.usage.completion_tokens = completion
+    chunks.append(final)
+    stream = MagicMock()
+    stream.__aiter__.return_value = chunks
+    stream.close = AsyncMock()
+    return stream
+
+
+def _make_pool(conn: AsyncMock) -> MagicMock:
+    @asynccontextmanager
+    async def acquire(timeout: float | None = None):  # type: ignore[no-untyped-def]
+        yield conn
+
+    pool = MagicMock()
+    pool.acquire = acquire
+    return pool
+
+
+def _make_busy_pool() -> MagicMock:
+    """A pool with every connection taken: acquiring times out."""
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__.side_effect = TimeoutError
+    return pool
+
+
+class TestCacheKey:
+    def test_same_request_same_key(self) -> None:
+        assert cache_key("m", _MESSAGES) == cache_key("m", list(_MESSAGES))
+
+    def test_key_covers_model_messages_and_format(self) -> None:
+        base = cache_key("m", _MESSAGES)
+
+        assert cache_key("other", _MESSAGES) != base
+        assert cache_key("m", _MESSAGES[:1]) != base
+        assert cache_key("m", _MESSAGES, {"type": "json_object"}) != base
+
+
+class TestLLMCache:
+    async def test_counts_hits_and_misses(self) -> None:
+        cache = LLMCache(max_bytes=1000, ttl_seconds=60)
+
+        assert await cache.get("k") is None
+        await cache.set("k", OpenAIResult("answer", 5, 1))
+        assert await cache.get("k") == OpenAIResult("answer", 5, 1)
+
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["entries"] == 1
+        assert stats["bytes"] == len("answer")
+
+    async def test_evicts_least_recently_used_past_byte_limit(self) -> None:
+        cache = LLMCache(max_bytes=10, ttl_seconds=60)
+        await cache.set("a", OpenAIResult("aaaa", 0, 0))
+        await cache.set("b", OpenAIResult("bbbb", 0, 0))
+        await cache.get("a")  # a is now more recent than b
+
+        await cache.set("c", OpenAIResult("cccc", 0, 0))
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert await cache.get("c") is not None
+        assert cache.stats()["bytes"] == 8
+
+    async def test_skips_entries_larger_than_the_cache(self) -> None:
+        cache = LLMCache(max_bytes=3, ttl_seconds=60)
+
+        await cache.set("k", OpenAIResult("too long", 0, 0))
+
+        assert cache.stats()["entries"] == 0
+
+    async def test_discard_forgets_entry(self) -> None:
+        cache = LLMCache(max_bytes=100, ttl_seconds=60)
+        await cache.set("k", OpenAIResult("answer", 0, 0))
+
+        await cache.discard("k")
+
+        assert await cache.get("k") is None
+        assert cache.stats()["bytes"] == 0
+
+    async def test_discard_deletes_from_database_tier(self) -> None:
+        conn = AsyncMock()
+        conn.execute.return_value = "DELETE 0"
+        cache = LLMCache(max_bytes=100, ttl_seconds=60)
+        await cache.attach_pool(_make_pool(conn))
+        await cache.set("k", OpenAIResult("unparseable", 5, 1))
+
+        await cache.discard("k")
+
+        query, *args = conn.execute.call_args.args
+        assert query.startswith("DELETE FROM youtube_summarizer.llm_cache")
+        assert args == ["k"]
+
+    async def test_falls_back_to_database_tier(self) -> None:
+        conn = AsyncMock()
+        conn.execute.return_value = "DELETE 0"
+        conn.fetchrow.return_value = {
+            "content": "stored",
+            "prompt_tokens": 7,
+            "completion_tokens": 3,
+        }
+        cache = LLMCache(max_bytes=100, ttl_seconds=60)
+        await cache.attach_pool(_make_pool(conn))
+
+        result = await cache.get("k")
+
+        assert result == OpenAIResult("stored", 7, 3)
+        assert cache.stats()["db_hits"] == 1
+        # Promoted into memory, so the next lookup skips the database
+        await cache.get("k")
+        assert cache.stats()["memory_hits"] == 1
+        assert conn.fetchrow.call_count == 1
+
+    async def test_writes_through_to_database_tier(self) -> None:
+        conn = AsyncMock()
+        conn.execute.return_value = "DELETE 0"
+        cache = LLMCache(max_bytes=100, ttl_seconds=60)
+        await cache.attach_pool(_make_pool(conn))
+
+        await cache.set("k", OpenAIResult("answer", 5, 1))
+
+        assert conn.execute.call_args.args[1:] == ("k", "answer", 5, 1)
+
+    async def test_busy_pool_degrades_to_miss_and_skipped_write(self) -> None:
+        cache = LLMCache(max_bytes=100, ttl_seconds=60)
+        cache._pool = pool = _make_busy_pool()
+
+        assert await cache.get("k") is None
+        await cache.set("k", OpenAIResult("answer", 5, 1))
+        await cache.discard("k")
+
+        assert cache.stats()["misses"] == 1
+        for call in pool.acquire.call_args_list:
+            assert call.kwargs["timeout"] == settings.llm_cache_acquire_timeout
+
+    async def test_database_errors_degrade_to_miss(self) -> None:
+        conn = AsyncMock()
+        conn.execute.return_value = "DELETE 0"
+        conn.fetchrow.side_effect = OSError("connection lost")
+        cache = LLMCache(max_bytes=100, ttl_seconds=60)
+        await cache.attach_pool(_make_pool(conn))
+
+        assert await cache.get("k") is None
+        assert cache.stats()["misses"] == 1
+
+
+class TestChatCompletion:
+    async def test_second_identical_call_is_served_from_cache(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(
+            return_value=_make_response("Hi there.", 12, 3)
+        )
+
+        first = await chat_completion(
+            client, model="gpt-4o-mini", messages=_MESSAGES, timeout=30
+        )
+        second = await chat_completion(
+            client, model="gpt-4o-mini", messages=_MESSAGES, timeout=30
+        )
+
+        assert first == second == OpenAIResult("Hi there.", 12, 3)
+        assert client.chat.completions.create.call_count == 1
+        assert llm_cache.stats()["memory_hits"] == 1
+
+    async def test_passes_response_format_only_when_given(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=_make_response("{}"))
+
+        await chat_completion(
+            client, model="gpt-4o-mini", messages=_MESSAGES, timeout=30
+        )
+        assert "response_format" not in client.chat.completions.create.call_args.kwargs
+
+        await chat_completion(
+            client,
+            model="gpt-4o-mini",
+            messages=_MESSAGES,
+            timeout=30,
+            response_format={"type": "json_object"},
+        )
+        assert client.chat.completions.create.call_args.kwargs["response_format"] == {
+            "type": "json_object"
+        }
+
+    @patch("app.services.qa.AsyncOpenAI")
+    async def test_shared_by_qa_service(self, mock_openai_class: MagicMock) -> None:
+        from app.services.qa import ask_question
+
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_make_response("Forty-two.")
+        )
+
+        await ask_question("transcript", "What?", [])
+        answer = await ask_question("transcript", "What?", [])
+
+        assert answer == "Forty-two."
+        assert mock_client.chat.completions.create.call_count == 1
+
+
+class TestStreamCompletion:
+    async def test_yields_deltas_then_result_and_caches_it(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(
+            return_value=_make_stream(["Hi ", "there."], 12, 3)
+        )
+
+        first = [
+            item
+            async for item in stream_completion(
+                client, model="gpt-4o-mini", messages=_MESSAGES, timeout=30
+            )
+        ]
+        second = [
+            item
+            async for item in stream_completion(
+                client, model="gpt-4o-mini", messages=_MESSAGES, timeout=30
+            )
+        ]
+
+        assert first == ["Hi ", "there.", OpenAIResult("Hi there.", 12, 3)]
+        assert second == ["Hi there.", OpenAIResult("Hi there.", 12, 3)]
+        assert client.chat.completions.create.call_count == 1
+
+    @patch("app.services.llm.llm_scheduler")
+    async def test_abandoned_stream_is_closed_released_and_not_cached(
+        self, mock_scheduler: MagicMock
+    ) -> None:
+        mock_scheduler.acquire = AsyncMock()
+        stream = _make_stream(["Hi ", "there."])
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=stream)
+
+        completion = stream_completion(
+            client, model="gpt-4o-mini", messages=_MESSAGES, timeout=30
+        )
+        assert await anext(completion) == "Hi "
+        await completion.aclose()
+
+        stream.close.assert_awaited_once()
+        estimated = mock_scheduler.acquire.await_args.args[0]
+        mock_scheduler.reconcile.assert_called_once_with(estimated, 0)
+        assert await llm_cache.get(cache_key("gpt-4o-mini", _MESSAGES)) is None
+
+
+class TestCreateOpenAIClient:
+    @patch("app.services.llm.AsyncOpenAI")
+    @patch("app.services.llm.DefaultAsyncHttpxClient")
+    def test_uses_configured_pool_limits(
+        self, mock_http_client: MagicMock, mock_openai_class: MagicMock
+    ) -> None:
+        from app.config import settings
+
+        create_openai_client()
+
+        assert mock_openai_class.call_args.kwargs["http_client"] is (
+            mock_http_client.return_value
+        )
+        assert mock_http_client.call_args.kwargs["limits"] == httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry,
+        )
@@ -0,0 +1,249 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.llm import OpenAIResult
+from app.services.qa import (
+    HistorySummary,
+    QuestionTooLongError,
+    ask_question,
+    compact_history,
+    history_digest,
+    stream_answer,
+)
+
+
+def _count_words(text: str) -> int:
+    return len(text.split())
+
+
+def _make_response(content: str) -> MagicMock:
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    response.usage.prompt_tokens = 10
+    response.usage.completion_tokens = 2
+    return response
+
+
+def _turns(count: int) -> list[dict]:
+    history = []
+    for i in range(count):
+        history.append({"role": "user", "content": f"Question {i}?"})
+        history.append({"role": "assistant", "content": f"Answer {i}."})
+    return history
+
+
+class _FakeStream:
+    """Async iterator over streamed completion chunks, like openai's AsyncStream."""
+
+    def __init__(self, deltas: list[str], prompt: int, completion: int) -> None:
+        self._chunks = []
+        for delta in deltas:
+            chunk = MagicMock()
+            chunk.usage = None
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = delta
+            self._chunks.append(chunk)
+        final = MagicMock()
+        final.choices = []
+        final.usage.prompt_tokens = prompt
+        final.usage.completion_tokens = completion
+        self._chunks.append(final)
+        self.close = AsyncMock()
+
+    def __aiter__(self):  # type: ignore[no-untyped-def]
+        return self._iterate()
+
+    async def _iterate(self):  # type: ignore[no-untyped-def]
+        for chunk in self._chunks:
+            yield chunk
+
+
+class TestStreamAnswer:
+    async def test_yields_deltas_then_result(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(
+            return_value=_FakeStream(["Forty", "-two."], 40, 3)
+        )
+
+        items = [
+            item
+            async for item in stream_answer(
+                "The answer is 42.", "What?", [], client=client
+            )
+        ]
+
+        assert items[:2] == ["Forty", "-two."]
+        assert items[-1] == OpenAIResult("Forty-two.", 40, 3)
+        assert client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    async def test_abandoned_stream_is_closed_and_not_cached(self) -> None:
+        first = _FakeStream(["Forty", "-two."], 40, 3)
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(
+            side_effect=[first, _FakeStream(["Again."], 40, 1)]
+        )
+
+        answer = stream_answer("The answer is 42.", "What?", [], client=client)
+        assert await anext(answer) == "Forty"
+        await answer.aclose()
+
+        first.close.assert_awaited_once()
+        items = [
+            item
+            async for item in stream_answer(
+                "The answer is 42.", "What?", [], client=client
+            )
+        ]
+        assert items[0] == "Again."
+
+    async def test_completed_stream_is_cached(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(
+            return_value=_FakeStream(["Forty-two."], 40, 3)
+        )
+
+        [
+            item
+            async for item in stream_answer(
+                "The answer is 42.", "What?", [], client=client
+            )
+        ]
+        items = [
+            item
+            async for item in stream_answer(
+                "The answer is 42.", "What?", [], client=client
+            )
+        ]
+
+        assert items == ["Forty-two.", OpenAIResult("Forty-two.", 40, 3)]
+        assert client.chat.completions.create.call_count == 1
+
+
+@patch("app.services.qa.settings.qa_history_turns", 2)
+class TestCompactHistory:
+    async def test_short_history_is_kept_verbatim(self) -> None:
+        client = MagicMock()
+        history = _turns(2)
+
+        recent, summary = await compact_history(history, None, client=client)
+
+        assert recent == history
+        assert summary is None
+        client.chat.completions.create.assert_not_called()
+
+    async def test_older_turns_are_folded_into_summary(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(
+            return_value=_make_response("Asked about 0 and 1.")
+        )
+        history = _turns(4)
+
+        recent, summary = await compact_history(history, None, client=client)
+
+        assert recent == history[4:]
+        assert summary == HistorySummary(
+            "Asked about 0 and 1.", covers=4, digest=history_digest(history[:4])
+        )
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][1]
+        assert "Question 1?" in prompt["content"]
+        assert "Question 2?" not in prompt["content"]
+
+    async def test_only_new_turns_are_folded(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(
+            return_value=_make_response("Asked about 0, 1 and 2.")
+        )
+        history = _turns(5)
+        stored = HistorySummary(
+            "Asked about 0 and 1.", covers=4, digest=history_digest(history[:4])
+        )
+
+        recent, summary = await compact_history(history, stored, client=client)
+
+        assert recent == history[6:]
+        assert summary is not None and summary.covers == 6
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][1]
+        assert "Asked about 0 and 1." in prompt["content"]
+        assert "Question 1?" not in prompt["content"]
+        assert "Question 2?" in prompt["content"]
+
+    async def test_up_to_date_summary_is_reused(self) -> None:
+        client = MagicMock()
+        history = _turns(4)
+        stored = HistorySummary(
+            "Asked about 0 and 1.", covers=4, digest=history_digest(history[:4])
+        )
+
+        recent, summary = await compact_history(history, stored, client=client)
+
+        assert recent == history[4:]
+        assert summary is stored
+        client.chat.completions.create.assert_not_called()
+
+    async def test_summary_of_another_conversation_is_ignored(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(
+            return_value=_make_response("Asked about 0 and 1.")
+        )
+        other_chat = [{**m, "content": m["content"].upper()} for m in _turns(2)]
+        stored = HistorySummary(
+            "Asked about the weather.", covers=4, digest=history_digest(other_chat)
+        )
+        history = _turns(4)
+
+        recent, summary = await compact_history(history, stored, client=client)
+
+        assert recent == history[4:]
+        assert summary is not None and summary.text == "Asked about 0 and 1."
+        assert summary.digest == history_digest(history[:4])
+        prompt = client.chat.completions.create.call_args.kwargs["messages"][1]
+        assert "Asked about the weather." not in prompt["content"]
+        assert "Question 0?" in prompt["content"]
+
+
+class TestPromptBudget:
+    @patch("app.services.qa.count_tokens", _count_words)
+    @patch("app.services.qa.settings.qa_prompt_token_budget", 80)
+    async def test_oldest_turns_are_dropped_to_fit(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=_make_response("Ok."))
+        history = _turns(20)
+
+        await ask_question("The answer is 42.", "What?", history, client=client)
+
+        messages = client.chat.completions.create.call_args.kwargs["messages"]
+        assert sum(_count_words(m["content"]) + 4 for m in messages) <= 80
+        assert 2 < len(messages) < len(history)
+        assert messages[-2] == history[-1]
+        assert messages[-1] == {"role": "user", "content": "What?"}
+
+    @patch("app.services.qa.count_tokens", _count_words)
+    @patch("app.services.qa.settings.qa_prompt_token_budget", 80)
+    async def test_summary_and_last_passage_are_cut_to_fit(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=_make_response("Ok."))
+        transcript = " ".join(f"fact{i}" for i in range(100)) + "."
+        summary = " ".join(["Asked", "about", "facts."] * 30)
+
+        await ask_question(
+            transcript, "What?", [], history_summary=summary, client=client
+        )
+
+        messages = client.chat.completions.create.call_args.kwargs["messages"]
+        assert sum(_count_words(m["content"]) + 4 for m in messages) <= 80
+        assert "fact0 fact1" in messages[0]["content"]
+        assert "fact99" not in messages[0]["content"]
+        assert messages[-1] == {"role": "user", "content": "What?"}
+
+    @patch("app.services.qa.count_tokens", _count_words)
+    @patch("app.services.qa.settings.qa_prompt_token_budget", 80)
+    async def test_question_over_the_budget_is_rejected(self) -> None:
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock()
+
+        with pytest.raises(QuestionTooLongError):
+            await ask_question("The answer is 42.", "Why? " * 100, [], client=client)
+
+        client.chat.completions.create.assert_not_called()
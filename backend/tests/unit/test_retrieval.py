@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+from app.services.retrieval import PassageIndex, PassageIndexCache
+
+
+def _count_words(text: str) -> int:
+    return len(text.split())
+
+
+_TRANSCRIPT = (
+    "Welcome to the show about gardening. "
+    "Today we plant tomatoes in raised beds. "
+    "Tomatoes need full sun and regular watering. "
+    "Next we talk about composting kitchen scraps. "
+    "Compost adds nutrients to the soil. "
+    "Finally we cover pruning roses in winter."
+)
+
+
+class TestPassageIndex:
+    def test_finds_the_passage_about_the_question(self) -> None:
+        index = PassageIndex(_TRANSCRIPT, 8, 0, _count_words)
+
+        passages = index.search("How do I prune roses?", 1)
+
+        assert passages == ["Finally we cover pruning roses in winter."]
+
+    def test_results_are_in_transcript_order(self) -> None:
+        index = PassageIndex(_TRANSCRIPT, 8, 0, _count_words)
+
+        passages = index.search("compost tomatoes", 3)
+
+        positions = [_TRANSCRIPT.index(p) for p in passages]
+        assert positions == sorted(positions)
+        assert any("Compost" in p for p in passages)
+
+    def test_unknown_terms_fall_back_to_opening_passages(self) -> None:
+        index = PassageIndex(_TRANSCRIPT, 8, 0, _count_words)
+
+        passages = index.search("xyzzy?", 2)
+
+        assert passages == index.passages[:2]
+
+    def test_context_size_is_bounded_by_k(self) -> None:
+        long_text = _TRANSCRIPT * 200
+        index = PassageIndex(long_text, 8, 2, _count_words)
+
+        passages = index.search("tomatoes sun watering", 3)
+
+        assert len(passages) == 3
+        assert all(_count_words(p) <= 8 for p in passages)
+
+
+class TestPassageIndexCache:
+    async def test_index_is_built_once_per_video(self) -> None:
+        cache = PassageIndexCache(max_entries=2)
+
+        with patch("app.services.retrieval.count_tokens", _count_words):
+            first = await cache.get("aaaaaaaaaaa", _TRANSCRIPT)
+            second = await cache.get("aaaaaaaaaaa", _TRANSCRIPT)
+
+        assert first is second
+
+    async def test_changed_transcript_rebuilds_index(self) -> None:
+        cache = PassageIndexCache(max_entries=2)
+
+        first = await cache.get("aaaaaaaaaaa", _TRANSCRIPT)
+        second = await cache.get("aaaaaaaaaaa", "Something else entirely.")
+
+        assert first is not second
+
+    async def test_evicts_least_recently_used(self) -> None:
+        cache = PassageIndexCache(max_entries=1)
+
+        first = await cache.get("aaaaaaaaaaa", _TRANSCRIPT)
+        await cache.get("bbbbbbbbbbb", _TRANSCRIPT)
+
+        assert await cache.get("aaaaaaaaaaa", _TRANSCRIPT) is not first
@@ -0,0 +1,111 @@
+import asyncio
+
+from app.services.scheduler import (
+    LLMScheduler,
+    Priority,
+    TokenBucket,
+    estimate_tokens,
+)
+
+
+class TestEstimateTokens:
+    def test_counts_prompt_framing_and_completion_reserve(self) -> None:
+        messages = [
+            {"role": "system", "content": "x" * 400},
+            {"role": "user", "content": "y" * 40},
+        ]
+
+        assert estimate_tokens(messages) == 100 + 10 + 2 * 4 + 1_000
+
+
+class TestTokenBucket:
+    def test_starts_full(self) -> None:
+        bucket = TokenBucket(60)
+
+        assert bucket.delay(60, bucket._updated) == 0
+
+    def test_delay_is_time_to_refill_the_shortfall(self) -> None:
+        bucket = TokenBucket(60)  # one unit per second
+        now = bucket._updated
+        bucket.take(60)
+
+        assert bucket.delay(3, now) == 3.0
+        assert bucket.delay(3, now + 2) == 1.0
+
+    def test_debt_from_underestimates_delays_later_calls(self) -> None:
+        bucket = TokenBucket(60)
+        now = bucket._updated
+        bucket.take(60)
+        bucket.adjust(-30)  # the call used 30 more than reserved
+
+        assert bucket.delay(1, now) == 31.0
+
+    def test_disabled_bucket_never_waits(self) -> None:
+        bucket = TokenBucket(0)
+        bucket.take(1_000)
+
+        assert bucket.delay(1_000, bucket._updated) == 0
+
+
+class TestLLMScheduler:
+    async def test_admits_immediately_under_limits(self) -> None:
+        scheduler = LLMScheduler(rpm=100, tpm=10_000)
+
+        await asyncio.wait_for(scheduler.acquire(500, Priority.INTERACTIVE), 1)
+
+        stats = scheduler.stats()
+        assert stats["completed"] == 1
+        assert stats["queue_depth"] == 0
+
+    async def test_spreads_burst_at_the_request_rate(self) -> None:
+        scheduler = LLMScheduler(rpm=1200, tpm=0)  # 20 requests per second
+        scheduler._requests.level = 0
+
+        t0 = asyncio.get_running_loop().time()
+        await asyncio.gather(
+            *(scheduler.acquire(1, Priority.INTERACTIVE) for _ in range(4))
+        )
+        elapsed = asyncio.get_running_loop().time() - t0
+
+        assert 0.15 <= elapsed < 1.0
+        assert scheduler.stats()["max_wait_ms"] >= 150
+
+    async def test_interactive_calls_jump_ahead_of_background(self) -> None:
+        scheduler = LLMScheduler(rpm=1200, tpm=0)
+        scheduler._requests.level = 0
+        order: list[str] = []
+
+        async def call(name: str, priority: Priority) -> None:
+            await scheduler.acquire(1, priority)
+            order.append(name)
+
+        background = [
+            asyncio.create_task(call(f"fallacies-{i}", Priority.BACKGROUND))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queue_depth"] == 2
+        interactive = asyncio.create_task(call("summary", Priority.INTERACTIVE))
+        await asyncio.gather(*background, interactive)
+
+        assert order == ["summary", "fallacies-0", "fallacies-1"]
+
+    async def test_waits_for_token_budget(self) -> None:
+        scheduler = LLMScheduler(rpm=0, tpm=6_000)  # 100 tokens per second
+        scheduler._tokens.level = 0
+
+        t0 = asyncio.get_running_loop().time()
+        await scheduler.acquire(20, Priority.INTERACTIVE)
+
+        assert asyncio.get_running_loop().time() - t0 >= 0.15
+
+    async def test_cancelled_waiter_does_not_block_the_queue(self) -> None:
+        scheduler = LLMScheduler(rpm=1200, tpm=0)
+        scheduler._requests.level = 0
+        stuck = asyncio.create_task(scheduler.acquire(1, Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+
+        stuck.cancel()
+        await asyncio.wait_for(scheduler.acquire(1, Priority.BACKGROUND), 1)
+
+        assert scheduler.stats()["queue_depth"] == 0
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    async def test_concurrent_callers_share_one_execution(self) -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        async def work() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+        assert results == ["result"] * 5
+        assert calls == 1
+        assert flights.shared == 4
+        assert flights.in_flight() == 0
+
+    async def test_different_keys_run_separately(self) -> None:
+        flights = SingleFlight()
+        calls: list[str] = []
+
+        async def work(key: str) -> str:
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(
+            flights.do("a", lambda: work("a")), flights.do("b", lambda: work("b"))
+        )
+
+        assert results == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    async def test_sequential_calls_are_not_cached(self) -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        async def work() -> int:
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flights.do("k", work) == 1
+        assert await flights.do("k", work) == 2
+
+    async def test_exception_is_shared(self) -> None:
+        flights = SingleFlight()
+
+        async def work() -> None:
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flights.do("k", work), flights.do("k", work), return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+
+    async def test_follower_takes_over_when_leader_is_cancelled(self) -> None:
+        flights = SingleFlight()
+        calls = 0
+
+        async def work() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await follower == "done"
+        assert calls == 2
@@ -1,8 +1,20 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+from collections.abc import AsyncIterator
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.services.summarizer import generate_summary
+from app.services.summarizer import (
+    SummaryResult,
+    generate_summary,
+    stream_summary,
+    summary_cache_key,
+)
+
+
+def _count_words(text: str) -> int:
+    """Deterministic stand-in tokenizer: one token per word."""
+    return len(text.split())
 
 
 class TestGenerateSummary:
@@ -14,42 +26,51 @@ class TestGenerateSummary:
         response = MagicMock()
         response.choices = [MagicMock()]
         response.choices[0].message.content = "This is a summary of the video."
+        response.usage = None
         return response
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_returns_summary_text(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_returns_summary_text(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
-        result = generate_summary("This is a transcript about Python programming.")
+        result = await generate_summary(
+            "This is a transcript about Python programming."
+        )
 
-        assert result == "This is a summary of the video."
+        assert result.content == "This is a summary of the video."
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_uses_gpt4o_mini_model(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_uses_gpt4o_mini_model(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
-        generate_summary("Some transcript text.")
+        await generate_summary("Some transcript text.")
 
         call_kwargs = mock_client.chat.completions.create.call_args
         assert call_kwargs.kwargs["model"] == "gpt-4o-mini"
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_includes_system_prompt(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_includes_system_prompt(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
-        generate_summary("Some transcript text.")
+        await generate_summary("Some transcript text.")
 
         call_kwargs = mock_client.chat.completions.create.call_args
         messages = call_kwargs.kwargs["messages"]
@@ -57,37 +78,41 @@ class TestGenerateSummary:
         content = system_msg["content"].lower()
         assert "summary" in content or "summarize" in content
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_passes_transcript_as_user_message(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_passes_transcript_as_user_message(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
         transcript = "Hello, this is a test transcript about coding."
-        generate_summary(transcript)
+        await generate_summary(transcript)
 
         call_kwargs = mock_client.chat.completions.create.call_args
         messages = call_kwargs.kwargs["messages"]
         user_message = next(m for m in messages if m["role"] == "user")
         assert transcript in user_message["content"]
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_sets_timeout(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_sets_timeout(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
-        generate_summary("Some text.")
+        await generate_summary("Some text.")
 
         call_kwargs = mock_client.chat.completions.create.call_args
         assert call_kwargs.kwargs.get("timeout") == 30
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_chunked_summarization_for_long_transcript(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_chunked_summarization_for_long_transcript(
         self, mock_openai_class: MagicMock
     ) -> None:
         """Test that very long transcripts are chunked and individually summarized."""
@@ -98,27 +123,28 @@ class TestGenerateSummary:
         chunk_response_1 = MagicMock()
         chunk_response_1.choices = [MagicMock()]
         chunk_response_1.choices[0].message.content = "Summary of chunk 1."
+        chunk_response_1.usage = None
 
         chunk_response_2 = MagicMock()
         chunk_response_2.choices = [MagicMock()]
         chunk_response_2.choices[0].message.content = "Summary of chunk 2."
+        chunk_response_2.usage = None
 
         final_response = MagicMock()
         final_response.choices = [MagicMock()]
         final_response.choices[0].message.content = "Combined final summary."
+        final_response.usage = None
 
-        mock_client.chat.completions.create.side_effect = [
-            chunk_response_1,
-            chunk_response_2,
-            final_response,
-        ]
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=[chunk_response_1, chunk_response_2, final_response]
+        )
 
         # Create a transcript that exceeds the token limit (~100K tokens ≈ 400K chars)
         long_transcript = "word " * 120_000  # ~600K chars, well over 100K tokens
 
-        result = generate_summary(long_transcript)
+        result = await generate_summary(long_transcript)
 
-        assert result == "Combined final summary."
+        assert result.content == "Combined final summary."
         # Should have been called multiple times (chunks + final)
         assert mock_client.chat.completions.create.call_count >= 3
 
@@ -132,20 +158,23 @@ class TestGenerateSummaryWithLength:
         response = MagicMock()
         response.choices = [MagicMock()]
         response.choices[0].message.content = "A length-guided summary."
+        response.usage = None
         return response
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_includes_target_word_count_in_prompt(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_includes_target_word_count_in_prompt(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         """When transcript_word_count and length_percent are provided,
         the system prompt should include the target word count."""
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
         # 1000 words * 20% = 200 target words
-        generate_summary(
+        await generate_summary(
             "word " * 1000,
             transcript_word_count=1000,
             length_percent=20,
@@ -157,17 +186,19 @@ class TestGenerateSummaryWithLength:
         assert "200" in system_msg["content"]
         assert "20%" in system_msg["content"]
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_default_behavior_no_length_params(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_default_behavior_no_length_params(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         """Without length params, the system prompt should be the original
         (no word count target)."""
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
-        generate_summary("Some transcript text.")
+        await generate_summary("Some transcript text.")
 
         call_kwargs = mock_client.chat.completions.create.call_args
         messages = call_kwargs.kwargs["messages"]
@@ -176,16 +207,18 @@ class TestGenerateSummaryWithLength:
         assert "approximately" not in system_msg["content"]
         assert "words" not in system_msg["content"].lower().split("key")[0]
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_target_calculation_at_50_percent(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_target_calculation_at_50_percent(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         """50% of 500 words = 250 target words."""
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
-        generate_summary(
+        await generate_summary(
             "word " * 500,
             transcript_word_count=500,
             length_percent=50,
@@ -196,16 +229,18 @@ class TestGenerateSummaryWithLength:
         system_msg = next(m for m in messages if m["role"] == "system")
         assert "250" in system_msg["content"]
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_target_calculation_at_10_percent(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_target_calculation_at_10_percent(
         self, mock_openai_class: MagicMock, mock_openai_response: MagicMock
     ) -> None:
         """10% of 2000 words = 200 target words."""
         mock_client = MagicMock()
         mock_openai_class.return_value = mock_client
-        mock_client.chat.completions.create.return_value = mock_openai_response
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
 
-        generate_summary(
+        await generate_summary(
             "word " * 2000,
             transcript_word_count=2000,
             length_percent=10,
@@ -216,8 +251,8 @@ class TestGenerateSummaryWithLength:
         system_msg = next(m for m in messages if m["role"] == "system")
         assert "200" in system_msg["content"]
 
-    @patch("app.services.summarizer.OpenAI")
-    def test_chunked_summarization_includes_target_in_combine(
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_chunked_summarization_includes_target_in_combine(
         self, mock_openai_class: MagicMock
     ) -> None:
         """For chunked transcripts, the combine step should include the
@@ -228,25 +263,26 @@ class TestGenerateSummaryWithLength:
         chunk_response_1 = MagicMock()
         chunk_response_1.choices = [MagicMock()]
         chunk_response_1.choices[0].message.content = "Summary of chunk 1."
+        chunk_response_1.usage = None
 
         chunk_response_2 = MagicMock()
         chunk_response_2.choices = [MagicMock()]
         chunk_response_2.choices[0].message.content = "Summary of chunk 2."
+        chunk_response_2.usage = None
 
         final_response = MagicMock()
         final_response.choices = [MagicMock()]
         final_response.choices[0].message.content = "Combined final summary."
+        final_response.usage = None
 
-        mock_client.chat.completions.create.side_effect = [
-            chunk_response_1,
-            chunk_response_2,
-            final_response,
-        ]
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=[chunk_response_1, chunk_response_2, final_response]
+        )
 
         # Create a transcript that exceeds the token limit
         long_transcript = "word " * 120_000
 
-        generate_summary(
+        await generate_summary(
             long_transcript,
             transcript_word_count=120_000,
             length_percent=25,
@@ -258,3 +294,412 @@ class TestGenerateSummaryWithLength:
         system_msg = next(m for m in messages if m["role"] == "system")
         # 25% of 120,000 = 30,000
         assert "30000" in system_msg["content"]
+
+
+class TestGenerateSummaryMapReduce:
+    """Test parallel chunk summarization with bounded concurrency."""
+
+    @staticmethod
+    def _make_response(content: str, prompt: int, completion: int) -> MagicMock:
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = content
+        response.usage.prompt_tokens = prompt
+        response.usage.completion_tokens = completion
+        return response
+
+    @patch("app.services.summarizer.count_tokens", _count_words)
+    @patch("app.services.summarizer._MAX_TOKENS_PER_CHUNK", 20)
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_chunks_run_in_parallel_up_to_cap(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        in_flight = 0
+        peak = 0
+
+        async def fake_create(**kwargs: object) -> MagicMock:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return self._make_response("Partial.", 10, 2)
+
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=fake_create)
+
+        # 8 chunks of 20 words each
+        await generate_summary("word " * 160, max_concurrency=3)
+
+        assert peak == 3
+
+    @patch("app.services.summarizer.count_tokens", _count_words)
+    @patch("app.services.summarizer._MAX_TOKENS_PER_CHUNK", 20)
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_token_totals_include_every_chunk_and_combine(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=[
+                self._make_response("Part 1.", 100, 10),
+                self._make_response("Part 2.", 200, 20),
+                self._make_response("Final.", 50, 5),
+            ]
+        )
+
+        result = await generate_summary("word " * 30, max_concurrency=2)
+
+        assert result.content == "Final."
+        assert result.total_prompt_tokens == 350
+        assert result.total_completion_tokens == 35
+
+    @patch("app.services.summarizer.count_tokens", _count_words)
+    @patch("app.services.summarizer._MAX_TOKENS_PER_CHUNK", 46)
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_combine_receives_partials_in_chunk_order(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        async def fake_create(**kwargs: object) -> MagicMock:
+            messages = kwargs["messages"]
+            user = next(m for m in messages if m["role"] == "user")["content"]
+            if user.startswith("first"):
+                # Finish the first chunk last
+                await asyncio.sleep(0.02)
+                return self._make_response("A", 1, 1)
+            if user.startswith("second"):
+                return self._make_response("B", 1, 1)
+            return self._make_response("Final.", 1, 1)
+
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=fake_create)
+
+        transcript = "first " + "x " * 45 + "second " + "y " * 45
+        await generate_summary(transcript)
+
+        last_call = mock_client.chat.completions.create.call_args_list[-1]
+        user_msg = next(m for m in last_call.kwargs["messages"] if m["role"] == "user")
+        assert user_msg["content"] == "A\n\nB"
+
+
+class TestGenerateSummaryTreeReduce:
+    """Test hierarchical combining when there are too many partial summaries."""
+
+    @staticmethod
+    async def _fake_create(**kwargs: object) -> MagicMock:
+        """Echo chunk labels and bracket combined groups so the tree is visible."""
+        messages = kwargs["messages"]
+        system = next(m for m in messages if m["role"] == "system")["content"]
+        user = next(m for m in messages if m["role"] == "user")["content"]
+        if system.startswith("You are a helpful assistant that summarizes"):
+            content = user.split()[0]
+        else:
+            content = "(" + "+".join(user.split("\n\n")) + ")"
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = content
+        response.usage.prompt_tokens = 1
+        response.usage.completion_tokens = 1
+        return response
+
+    @staticmethod
+    def _transcript(labels: str) -> str:
+        # Each label word plus padding fills exactly one 20-word chunk
+        return " ".join(label + " x" * 19 for label in labels)
+
+    @patch("app.services.summarizer._COMBINE_GROUP_SIZE", 2)
+    @patch("app.services.summarizer.count_tokens", _count_words)
+    @patch("app.services.summarizer._MAX_TOKENS_PER_CHUNK", 20)
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_partials_are_combined_level_by_level(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=self._fake_create)
+
+        result = await generate_summary(self._transcript("ABCDE"))
+
+        # Level 1: (A+B) (C+D) E -> level 2: ((A+B)+(C+D)) E -> final combine
+        assert result.content == "(((A+B)+(C+D))+E)"
+        # 5 chunk calls + 2 + 1 intermediate combines + 1 final combine
+        assert mock_client.chat.completions.create.call_count == 9
+        assert result.total_prompt_tokens == 9
+        assert result.total_completion_tokens == 9
+
+    @patch("app.services.summarizer._COMBINE_GROUP_SIZE", 2)
+    @patch("app.services.summarizer.count_tokens", _count_words)
+    @patch("app.services.summarizer._MAX_TOKENS_PER_CHUNK", 20)
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_only_final_combine_gets_length_target(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=self._fake_create)
+
+        await generate_summary(
+            self._transcript("ABCD"),
+            transcript_word_count=1000,
+            length_percent=20,
+        )
+
+        calls = mock_client.chat.completions.create.call_args_list
+        combine_prompts = [
+            next(m for m in c.kwargs["messages"] if m["role"] == "system")["content"]
+            for c in calls
+            if "Combine" in c.kwargs["messages"][0]["content"]
+        ]
+        assert len(combine_prompts) == 3
+        assert all("20%" not in p for p in combine_prompts[:-1])
+        assert "20%" in combine_prompts[-1]
+
+    @patch("app.services.summarizer.count_tokens", _count_words)
+    @patch("app.services.summarizer._MAX_TOKENS_PER_CHUNK", 20)
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_no_intermediate_level_when_partials_fit(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=self._fake_create)
+
+        result = await generate_summary(self._transcript("ABC"))
+
+        assert result.content == "(A+B+C)"
+        assert mock_client.chat.completions.create.call_count == 4
+
+    @patch("app.services.summarizer._COMBINE_GROUP_SIZE", 2)
+    @patch("app.services.summarizer.count_tokens", _count_words)
+    @patch("app.services.summarizer._MAX_TOKENS_PER_CHUNK", 20)
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_reports_chunk_and_combine_progress(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=self._fake_create)
+        progress: list[tuple[str, int, int]] = []
+
+        await generate_summary(
+            self._transcript("ABCDE"),
+            on_progress=lambda *step: progress.append(step),
+        )
+
+        assert progress == [
+            ("chunks", 0, 5),
+            ("chunks", 1, 5),
+            ("chunks", 2, 5),
+            ("chunks", 3, 5),
+            ("chunks", 4, 5),
+            ("chunks", 5, 5),
+            ("combine", 0, 3),
+            ("combine", 1, 3),
+            ("combine", 2, 3),
+        ]
+
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_short_transcript_reports_a_single_chunk(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(side_effect=self._fake_create)
+        progress: list[tuple[str, int, int]] = []
+
+        await generate_summary(
+            "A short transcript.", on_progress=lambda *step: progress.append(step)
+        )
+
+        assert progress == [("chunks", 0, 1)]
+
+
+def _make_stream_chunks(deltas: list[str], prompt: int, completion: int) -> object:
+    """Build an async iterator of streamed chat completion chunks."""
+
+    async def chunks() -> AsyncIterator[MagicMock]:
+        for delta in deltas:
+            chunk = MagicMock()
+            chunk.usage = None
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = delta
+            yield chunk
+        usage_chunk = MagicMock()
+        usage_chunk.choices = []
+        usage_chunk.usage.prompt_tokens = prompt
+        usage_chunk.usage.completion_tokens = completion
+        yield usage_chunk
+
+    return chunks()
+
+
+class TestStreamSummary:
+    """Test stream_summary() with a mocked streaming OpenAI client."""
+
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_yields_deltas_then_result(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_make_stream_chunks(["This ", "is ", "streamed."], 40, 3)
+        )
+
+        items = [item async for item in stream_summary("Some transcript text.")]
+
+        assert items[:3] == ["This ", "is ", "streamed."]
+        result = items[-1]
+        assert isinstance(result, SummaryResult)
+        assert result.content == "This is streamed."
+        assert result.total_prompt_tokens == 40
+        assert result.total_completion_tokens == 3
+        call_kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert call_kwargs["stream"] is True
+
+    @patch("app.services.summarizer.count_tokens", _count_words)
+    @patch("app.services.summarizer._MAX_TOKENS_PER_CHUNK", 20)
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_streams_only_the_combine_step_for_long_transcripts(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        partial = MagicMock()
+        partial.choices = [MagicMock()]
+        partial.choices[0].message.content = "Partial."
+        partial.usage.prompt_tokens = 10
+        partial.usage.completion_tokens = 1
+
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=[partial, partial, _make_stream_chunks(["Done."], 5, 1)]
+        )
+
+        transcript = " ".join(f"word{i}" for i in range(40))
+        items = [item async for item in stream_summary(transcript)]
+
+        assert items[0] == "Done."
+        assert items[-1].total_prompt_tokens == 25
+        assert items[-1].total_completion_tokens == 3
+        last_call = mock_client.chat.completions.create.call_args_list[-1]
+        system_msg = last_call.kwargs["messages"][0]["content"]
+        assert "Combine" in system_msg
+
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_completed_stream_is_cached(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_make_stream_chunks(["This ", "is ", "streamed."], 40, 3)
+        )
+
+        [item async for item in stream_summary("Short transcript.")]
+        items = [item async for item in stream_summary("Short transcript.")]
+
+        assert items[0] == "This is streamed."
+        assert items[-1].total_prompt_tokens == 40
+        assert mock_client.chat.completions.create.call_count == 1
+
+    @patch("app.services.llm.llm_scheduler")
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_abandoned_stream_is_closed_and_released(
+        self, mock_openai_class: MagicMock, mock_scheduler: MagicMock
+    ) -> None:
+        mock_scheduler.acquire = AsyncMock()
+        stream = MagicMock()
+        chunks = []
+        for delta in ["This ", "is."]:
+            chunk = MagicMock()
+            chunk.usage = None
+            chunk.choices[0].delta.content = delta
+            chunks.append(chunk)
+        stream.__aiter__.return_value = chunks
+        stream.close = AsyncMock()
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=stream)
+
+        summary = stream_summary("Short transcript.")
+        assert await anext(summary) == "This "
+        await summary.aclose()
+
+        stream.close.assert_awaited_once()
+        estimated = mock_scheduler.acquire.await_args.args[0]
+        mock_scheduler.reconcile.assert_called_once_with(estimated, 0)
+
+
+class TestSummaryCacheKey:
+    """Test summary_cache_key() used to key cached summary variants."""
+
+    def test_is_stable(self) -> None:
+        assert summary_cache_key() == summary_cache_key()
+
+    def test_includes_model(self) -> None:
+        model, _ = summary_cache_key()
+        assert model == "gpt-4o-mini"
+
+    def test_changes_when_prompt_changes(self) -> None:
+        _, before = summary_cache_key()
+        with patch("app.services.summarizer._SYSTEM_PROMPT", "Summarize briefly."):
+            _, after = summary_cache_key()
+        assert before != after
+
+
+class TestGenerateSummaryFromSource:
+    """Test the re-length path that condenses a longer cached summary."""
+
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_condenses_source_summary_in_one_call(
+        self, mock_openai_class: MagicMock
+    ) -> None:
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = "Shorter summary."
+        response.usage = None
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(return_value=response)
+
+        result = await generate_summary(
+            "word " * 500_000,
+            transcript_word_count=500_000,
+            length_percent=10,
+            source_summary="A much longer existing summary.",
+        )
+
+        assert result.content == "Shorter summary."
+        mock_client.chat.completions.create.assert_awaited_once()
+        messages = mock_client.chat.completions.create.call_args.kwargs["messages"]
+        assert messages[0]["content"].startswith(
+            "You are a helpful assistant. The following is a summary"
+        )
+        # 10% of 500,000 = 50,000
+        assert "50000" in messages[0]["content"]
+        assert messages[1]["content"] == "A much longer existing summary."
+
+    @patch("app.services.summarizer.count_tokens")
+    @patch("app.services.summarizer.AsyncOpenAI")
+    async def test_does_not_tokenize_transcript(
+        self, mock_openai_class: MagicMock, mock_count: MagicMock
+    ) -> None:
+        mock_client = MagicMock()
+        mock_openai_class.return_value = mock_client
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_make_stream_chunks(["Short."], 20, 2)
+        )
+
+        items = [
+            item
+            async for item in stream_summary(
+                "Transcript.", length_percent=10, source_summary="Long summary."
+            )
+        ]
+
+        assert items[0] == "Short."
+        assert items[-1].total_prompt_tokens == 20
+        mock_count.assert_not_called()
@@ -0,0 +1,43 @@
+from app.services.timestamps import TimestampIndex, format_timestamp
+from app.services.transcript import Transcript
+
+_SEGMENTS = [
+    {"text": "Welcome back", "start": 0.0, "duration": 2.0},
+    {"text": "everyone knows this is true", "start": 2.5, "duration": 3.0},
+    {"text": "so buy now", "start": 3725.0, "duration": 1.5},
+]
+_TEXT = "Welcome back everyone knows this is true so buy now"
+
+
+def _transcript() -> Transcript:
+    return Transcript.from_segments(_TEXT, _SEGMENTS)
+
+
+class TestTimestampIndex:
+    def test_maps_offsets_to_the_containing_segment(self) -> None:
+        index = TimestampIndex(_transcript())
+
+        assert index.seconds_at(0) == 0.0
+        assert index.seconds_at(12) == 0.0  # the space after a segment
+        assert index.seconds_at(13) == 2.5
+        assert index.seconds_at(_TEXT.index("buy")) == 3725.0
+        assert index.seconds_at(len(_TEXT)) == 3725.0
+
+    def test_offsets_outside_the_text_have_no_time(self) -> None:
+        index = TimestampIndex(_transcript())
+
+        assert index.seconds_at(-1) is None
+        assert index.seconds_at(len(_TEXT) + 1) is None
+
+    def test_untimed_transcript_has_no_times(self) -> None:
+        index = TimestampIndex(Transcript(_TEXT, [], [], [], stored=True))
+
+        assert not index.timed
+        assert index.seconds_at(0) is None
+
+
+class TestFormatTimestamp:
+    def test_minutes_and_hours(self) -> None:
+        assert format_timestamp(7.9) == "0:07"
+        assert format_timestamp(125) == "2:05"
+        assert format_timestamp(3725) == "1:02:05"
@@ -1,8 +1,14 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from app.services.transcript import calculate_duration, get_transcript
+from app.services.transcript import (
+    Transcript,
+    TranscriptTextCache,
+    calculate_duration,
+    get_transcript,
+    resolve_transcript,
+)
 
 
 class TestGetTranscript:
@@ -170,3 +176,114 @@ class TestCalculateDuration:
         ]
         # 7200.0 + 3.0 = 7203.0 → 7203 (2 hours)
         assert calculate_duration(segments) == 7203
+
+
+class TestTranscriptSegments:
+    _SEGMENTS = [
+        {"text": "Hello there", "start": 0.0, "duration": 1.5},
+        {"text": "general Kenobi", "start": 1.5, "duration": 2.0},
+    ]
+
+    def test_offsets_point_at_each_segment_in_the_text(self) -> None:
+        transcript = Transcript.from_segments(
+            "Hello there general Kenobi", self._SEGMENTS
+        )
+
+        assert transcript.offsets == [0, 12]
+        assert transcript.starts == [0.0, 1.5]
+        assert transcript.durations == [1.5, 2.0]
+
+    def test_segments_round_trip(self) -> None:
+        transcript = Transcript.from_segments(
+            "Hello there general Kenobi", self._SEGMENTS
+        )
+
+        assert transcript.segments == self._SEGMENTS
+
+    def test_untimed_transcript_has_no_segments(self) -> None:
+        transcript = Transcript("Hello", [], [], [], stored=True)
+
+        assert transcript.segments == []
+
+
+class TestResolveTranscript:
+    async def test_prefers_the_stored_transcript(self) -> None:
+        conn = AsyncMock()
+        conn.fetchrow.return_value = {
+            "text": "Stored text",
+            "starts": [0.0],
+            "durations": [2.0],
+            "offsets": [0],
+        }
+
+        with patch("app.services.transcript.get_transcript") as mock_get:
+            transcript = await resolve_transcript(conn, "dQw4w9WgXcQ")
+
+        assert transcript.text == "Stored text"
+        assert transcript.segments == [
+            {"text": "Stored text", "start": 0.0, "duration": 2.0}
+        ]
+        assert transcript.stored is True
+        mock_get.assert_not_called()
+
+    async def test_fetches_and_stores_on_a_miss(self) -> None:
+        conn = AsyncMock()
+        conn.fetchrow.return_value = None
+        segments = [{"text": "Hello", "start": 0.0, "duration": 1.0}]
+
+        with patch(
+            "app.services.transcript.get_transcript", return_value=("Hello", segments)
+        ):
+            transcript = await resolve_transcript(conn, "dQw4w9WgXcQ")
+
+        assert transcript.text == "Hello"
+        assert transcript.segments == segments
+        assert transcript.stored is False
+        query, *args = conn.execute.await_args.args
+        assert "youtube_summarizer.transcripts" in query
+        assert args == ["dQw4w9WgXcQ", "Hello", [0.0], [1.0], [0]]
+
+    async def test_database_errors_fall_back_to_youtube(self) -> None:
+        conn = AsyncMock()
+        conn.fetchrow.side_effect = OSError("connection lost")
+        conn.execute.side_effect = OSError("connection lost")
+
+        with patch(
+            "app.services.transcript.get_transcript", return_value=("Hello", [])
+        ):
+            transcript = await resolve_transcript(conn, "dQw4w9WgXcQ")
+
+        assert transcript.text == "Hello"
+
+
+class TestTranscriptTextCache:
+    async def test_loads_each_transcript_once(self) -> None:
+        conn = AsyncMock()
+        conn.fetchval.return_value = "Stored text"
+        cache = TranscriptTextCache(max_bytes=1024)
+
+        assert await cache.get(conn, "dQw4w9WgXcQ") == "Stored text"
+        assert await cache.get(conn, "dQw4w9WgXcQ") == "Stored text"
+
+        conn.fetchval.assert_awaited_once()
+
+    async def test_missing_transcripts_are_not_cached(self) -> None:
+        conn = AsyncMock()
+        conn.fetchval.return_value = None
+        cache = TranscriptTextCache(max_bytes=1024)
+
+        assert await cache.get(conn, "dQw4w9WgXcQ") is None
+        assert await cache.get(conn, "dQw4w9WgXcQ") is None
+
+        assert conn.fetchval.await_count == 2
+
+    async def test_evicts_least_recently_used_past_size_limit(self) -> None:
+        conn = AsyncMock()
+        conn.fetchval.side_effect = ["a" * 6, "b" * 6, "a" * 6]
+        cache = TranscriptTextCache(max_bytes=10)
+
+        await cache.get(conn, "aaaaaaaaaaa")
+        await cache.get(conn, "bbbbbbbbbbb")
+        await cache.get(conn, "aaaaaaaaaaa")
+
+        assert conn.fetchval.await_count == 3